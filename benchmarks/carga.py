@@ -0,0 +1,250 @@
+"""Teste de carga com sessões simultâneas do dashboard.
+
+Executa o `main.py` real pela API de testes do Streamlit (AppTest) em várias
+sessões simultâneas por processo. Cada processo representa um worker: as
+sessões compartilham os caches do processo, como no servidor. Cada sessão segue
+uma sequência aleatória (com semente) de ações realistas: troca de UF, escolha
+de municípios, clique no mapa, detalhamento de UF e troca de aba. O relatório
+traz latência p50/p95/p99 dos reruns, vazão e pico de RSS por worker, com o
+commit testado, para comparar execuções. Uso:
+
+    PYTHONPATH=src python benchmarks/carga.py --sessoes 8 --passos 20 --saida carga.json
+
+O clique no mapa é simulado pelo efeito que o tratamento do clique tem no
+estado da sessão, já que o AppTest não envia eventos do componente folium.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ARQUIVO_APP = os.path.join(RAIZ, "main.py")
+
+# Peso relativo de cada ação na sequência simulada
+ACOES = {
+    "trocar_ufs": 3,
+    "escolher_municipios": 3,
+    "clicar_mapa": 3,
+    "detalhar_uf": 2,
+    "limpar_municipios": 2,
+    "trocar_aba": 1,
+}
+
+
+def _rodar(app, acao, latencias, erros):
+    """Executar um rerun da sessão e registrar a latência."""
+    inicio = time.perf_counter()
+    app.run()
+    latencias.append((acao, time.perf_counter() - inicio))
+    if app.exception:
+        erros.append((acao, str(app.exception[0].value)[:200]))
+
+
+def _opcoes(app, rotulo):
+    for widget in app.multiselect:
+        if widget.label == rotulo:
+            return widget
+    return None
+
+
+def simular_sessao(numero, passos, semente, timeout):
+    """Executar uma sessão com `passos` ações aleatórias após a carga inicial."""
+    from streamlit.testing.v1 import AppTest
+
+    rng = np.random.default_rng([semente, numero])
+    nomes, pesos = list(ACOES), np.array(list(ACOES.values()), dtype=float)
+    latencias, erros = [], []
+
+    app = AppTest.from_file(ARQUIVO_APP, default_timeout=timeout)
+    _rodar(app, "carga_inicial", latencias, erros)
+
+    for _ in range(passos):
+        acao = nomes[rng.choice(len(nomes), p=pesos / pesos.sum())]
+        aba = app.session_state["aba_ativa"] if "aba_ativa" in app.session_state else "Mapa"
+
+        if acao == "trocar_aba" or aba != "Mapa":
+            app.radio(key="aba_ativa").set_value("Introdução" if aba == "Mapa" else "Mapa")
+            acao = "trocar_aba"
+        elif acao == "trocar_ufs":
+            widget = _opcoes(app, "Estado (UF)")
+            if widget is None or not widget.options:
+                continue
+            k = int(rng.integers(1, len(widget.options) + 1))
+            widget.set_value(list(rng.choice(widget.options, size=k, replace=False)))
+        elif acao in ("escolher_municipios", "clicar_mapa"):
+            widget = _opcoes(app, "Município")
+            if widget is None or not widget.options:
+                continue
+            escolhido = str(rng.choice(widget.options))
+            if acao == "escolher_municipios":
+                widget.set_value(list(dict.fromkeys(widget.value + [escolhido])))
+            else:
+                # Efeito do clique: o município entra no filtro e a página é refeita
+                selecionados = list(app.session_state["municipios_selecionados"])
+                app.session_state["municipios_selecionados"] = list(dict.fromkeys(selecionados + [escolhido]))
+        elif acao == "detalhar_uf":
+            if "mapa_expandidos" not in app.session_state:
+                continue
+            chave, expandidos = app.session_state["mapa_expandidos"]
+            ufs = list(chave[0])
+            if not ufs:
+                continue
+            app.session_state["mapa_expandidos"] = (chave, tuple(sorted(set(expandidos) | {str(rng.choice(ufs))})))
+        elif acao == "limpar_municipios":
+            widget = _opcoes(app, "Município")
+            if widget is None:
+                continue
+            widget.set_value([])
+            app.session_state["municipios_selecionados"] = []
+
+        _rodar(app, acao, latencias, erros)
+
+    return latencias, erros
+
+
+def executar_worker(args):
+    """Executar `sessoes` sessões simultâneas (threads) em um processo."""
+    worker, sessoes, passos, semente, dataset, timeout = args
+    os.environ["MDA_DATASET"] = dataset
+    os.chdir(RAIZ)
+    sys.path.insert(0, os.path.join(RAIZ, "src"))
+    from mda_app.config.settings import DATA_CONFIG
+
+    # A configuração pode já ter sido importada (geração do dataset no mesmo processo)
+    DATA_CONFIG["dataset"] = dataset
+
+    amostras = []
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessoes) as executor:
+        futuros = [
+            executor.submit(simular_sessao, worker * sessoes + numero, passos, semente, timeout)
+            for numero in range(sessoes)
+        ]
+        resultados = [futuro.result() for futuro in futuros]
+    duracao = time.perf_counter() - inicio
+
+    for latencias, _ in resultados:
+        amostras.extend(latencias)
+    erros = [erro for _, lista in resultados for erro in lista]
+    # ru_maxrss é dado em KiB no Linux
+    pico_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {
+        "worker": worker,
+        "amostras": amostras,
+        "erros": erros,
+        "duracao_s": duracao,
+        "pico_rss_mb": pico_rss_mb,
+    }
+
+
+def _percentis(valores):
+    if not valores:
+        return {}
+    p50, p95, p99 = np.percentile(valores, [50, 95, 99])
+    return {"p50_ms": p50 * 1000, "p95_ms": p95 * 1000, "p99_ms": p99 * 1000, "n": len(valores)}
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def resumir(resultados, parametros):
+    """Consolidar os resultados dos workers em um relatório comparável."""
+    amostras = [amostra for resultado in resultados for amostra in resultado["amostras"]]
+    latencias = [duracao for _, duracao in amostras]
+    # Reruns após a carga inicial medem o uso interativo
+    interativas = [duracao for acao, duracao in amostras if acao != "carga_inicial"]
+    por_acao = {}
+    for acao, duracao in amostras:
+        por_acao.setdefault(acao, []).append(duracao)
+    duracao = max(resultado["duracao_s"] for resultado in resultados)
+
+    return {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "parametros": parametros,
+        "reruns": len(latencias),
+        "vazao_reruns_s": len(latencias) / duracao if duracao else 0.0,
+        "latencia": _percentis(latencias),
+        "latencia_interativa": _percentis(interativas),
+        "latencia_por_acao": {acao: _percentis(valores) for acao, valores in sorted(por_acao.items())},
+        "pico_rss_mb_por_worker": {resultado["worker"]: round(resultado["pico_rss_mb"], 1) for resultado in resultados},
+        "erros": [erro for resultado in resultados for erro in resultado["erros"]],
+    }
+
+
+def imprimir(relatorio):
+    """Mostrar o resumo do relatório no terminal."""
+    print(f"commit {relatorio['commit']} | {relatorio['reruns']} reruns | "
+          f"{relatorio['vazao_reruns_s']:.2f} reruns/s")
+    for nome in ("latencia", "latencia_interativa"):
+        lat = relatorio[nome]
+        if lat:
+            print(f"{nome:22s} p50 {lat['p50_ms']:8.1f} ms  p95 {lat['p95_ms']:8.1f} ms  p99 {lat['p99_ms']:8.1f} ms")
+    for acao, lat in relatorio["latencia_por_acao"].items():
+        print(f"  {acao:20s} p50 {lat['p50_ms']:8.1f} ms  p95 {lat['p95_ms']:8.1f} ms  (n={lat['n']})")
+    for worker, rss in relatorio["pico_rss_mb_por_worker"].items():
+        print(f"worker {worker}: pico RSS {rss:.1f} MB")
+    if relatorio["erros"]:
+        print(f"{len(relatorio['erros'])} erros; primeiro: {relatorio['erros'][0]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Teste de carga do dashboard com sessões simultâneas")
+    parser.add_argument("--sessoes", type=int, default=8, help="Sessões simultâneas por worker")
+    parser.add_argument("--workers", type=int, default=1, help="Processos (workers) independentes")
+    parser.add_argument("--passos", type=int, default=20, help="Ações por sessão após a carga inicial")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--dataset", default=None, help="Dataset a usar (padrão: sintético nacional)")
+    parser.add_argument("--municipios", type=int, default=None, help="Municípios do dataset sintético")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Tempo máximo de um rerun (s)")
+    parser.add_argument("--saida", default=None, help="Arquivo JSON do relatório")
+    args = parser.parse_args(argv)
+
+    dataset = args.dataset
+    if dataset is None:
+        sys.path.insert(0, os.path.join(RAIZ, "src"))
+        from dataset_sintetico import MUNICIPIOS_BRASIL, gravar_dataset
+
+        municipios = args.municipios or MUNICIPIOS_BRASIL
+        dataset = os.path.join(RAIZ, "benchmarks", ".cache", f"nacional_{municipios}_{args.semente}.geojson")
+        if not os.path.exists(dataset):
+            os.makedirs(os.path.dirname(dataset), exist_ok=True)
+            gravar_dataset(dataset, n_municipios=municipios, semente=args.semente)
+
+    tarefas = [
+        (worker, args.sessoes, args.passos, args.semente, os.path.abspath(dataset), args.timeout)
+        for worker in range(args.workers)
+    ]
+    if args.workers == 1:
+        resultados = [executar_worker(tarefas[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            resultados = list(executor.map(executar_worker, tarefas))
+
+    parametros = {chave: valor for chave, valor in vars(args).items() if chave != "saida"}
+    parametros["dataset"] = os.path.relpath(dataset, RAIZ) if dataset.startswith(RAIZ) else dataset
+    relatorio = resumir(resultados, parametros)
+    imprimir(relatorio)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Dataset sintético em escala nacional para os testes de carga.
+
+Gera municípios em grade dentro de blocos por UF (27 UFs), com todas as colunas
+usadas pelo dashboard e geometrias densificadas para aproximar o tamanho real
+dos polígonos. A mesma semente gera sempre o mesmo arquivo. Uso:
+
+    PYTHONPATH=src python benchmarks/dataset_sintetico.py --saida /tmp/nacional.geojson
+"""
+
+import argparse
+import math
+
+import geopandas as gpd
+import numpy as np
+import shapely
+from mda_app.config.settings import REGIOES_ESTADOS
+
+# Número de municípios do Brasil
+MUNICIPIOS_BRASIL = 5570
+
+# Vértices aproximados por polígono após a densificação
+VERTICES_POR_MUNICIPIO = 200
+
+
+def gerar_dataset(n_municipios=MUNICIPIOS_BRASIL, semente=0, vertices=VERTICES_POR_MUNICIPIO):
+    """Gerar o GeoDataFrame sintético (EPSG:4674)."""
+    rng = np.random.default_rng(semente)
+    ufs = [uf for ufs_regiao in REGIOES_ESTADOS.values() for uf in ufs_regiao]
+    por_uf = np.full(len(ufs), n_municipios // len(ufs))
+    por_uf[: n_municipios % len(ufs)] += 1
+
+    linhas = []
+    geometrias = []
+    lado_celula = 0.25
+    for posicao_uf, (uf, quantidade) in enumerate(zip(ufs, por_uf)):
+        colunas = max(1, math.ceil(math.sqrt(quantidade)))
+        # Blocos das UFs dispostos em 6 colunas sobre o território
+        x0 = -73.0 + (posicao_uf % 6) * 6.5
+        y0 = -33.0 + (posicao_uf // 6) * 7.0
+        for i in range(quantidade):
+            x = x0 + (i % colunas) * lado_celula
+            y = y0 + (i // colunas) * lado_celula
+            geometrias.append(shapely.box(x, y, x + lado_celula, y + lado_celula))
+            codigo = f"{posicao_uf + 11:02d}{i:05d}"
+            nome = f"Município {uf} {i}"
+            linha = {
+                "CD_MUN": codigo, "NM_MUN": nome, "mun_nome": nome, "SIGLA_UF": uf,
+                "ckey": f"{nome}-{uf}", "populacao": int(rng.integers(1_000, 1_000_000)),
+            }
+            for coluna in ["nota_veg", "nota_area", "nota_relevo", "nota_insalub", "nota_insalub_2",
+                           "nota_p_q1", "nota_p_q2", "nota_p_q3", "nota_p_q4"]:
+                linha[coluna] = float(rng.uniform(0.5, 8))
+            for q in range(1, 5):
+                linha[f"nota_total_q{q}"] = float(rng.uniform(6, 60))
+            linha["nota_media"] = float(np.mean([linha[f"nota_total_q{q}"] for q in range(1, 5)]))
+            area = float(rng.uniform(5_000, 500_000))
+            georef = area * float(rng.uniform(0.3, 1.0))
+            num_imoveis = int(rng.integers(10, 5_000))
+            linha.update(
+                area_municip=area, area_cidade=area, area_georef=georef,
+                percent_area_georef=georef / area * 100, num_imoveis=num_imoveis,
+                area_car_total=georef * 0.4, area_car_media=georef * 0.4 / num_imoveis,
+                perimetro_total_car=num_imoveis * 3.0, perimetro_medio_car=3.0, area_max_perim=50.0,
+                valor_mun_area=georef * float(rng.uniform(49.83, 202.87)),
+                valor_mun_perim=num_imoveis * 3.0 * float(rng.uniform(500, 2_000)),
+            )
+            linhas.append(linha)
+
+    # Densificar as bordas para chegar perto do número de vértices pedido
+    geometrias = shapely.segmentize(np.array(geometrias), lado_celula * 4 / vertices)
+    return gpd.GeoDataFrame(linhas, geometry=geometrias, crs="EPSG:4674")
+
+
+def gravar_dataset(caminho, **kwargs):
+    """Gerar e gravar o dataset (GeoJSON, GeoPackage ou GeoParquet, pela extensão)."""
+    gdf = gerar_dataset(**kwargs)
+    if caminho.endswith(".parquet"):
+        gdf.to_parquet(caminho, write_covering_bbox=True)
+    else:
+        gdf.to_file(caminho)
+    return caminho
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gerar dataset sintético nacional")
+    parser.add_argument("--saida", required=True)
+    parser.add_argument("--municipios", type=int, default=MUNICIPIOS_BRASIL)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--vertices", type=int, default=VERTICES_POR_MUNICIPIO)
+    args = parser.parse_args(argv)
+    gravar_dataset(args.saida, n_municipios=args.municipios, semente=args.semente, vertices=args.vertices)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""API HTTP local de precificação municipal.
+
+Expõe o mesmo carregamento, filtros, agregações e precificação trimestral do
+dashboard, sem depender do Streamlit em execução. Uso:
+
+    python -m mda_app.api.servidor --dataset data/raw/precificacao_al_ii.geojson --porta 8502
+
+Rotas:
+    GET  /saude                      Versão do dataset carregado
+    GET  /municipios?uf=AL,SE        Atributos dos municípios (sem geometria)
+    GET  /precos?municipio=Maceió    Preço por município e por trimestre
+    GET  /agregados?uf=AL            Indicadores e totais trimestrais da seleção
+    POST /consulta                   Consulta em lote: {"tipo": "precos", "ufs": [...], "municipios": [...]}
+    POST /localizar                  Município, notas e preços de pontos ou parcelas:
+                                     {"pontos": [[lon, lat], ...]} ou FeatureCollection GeoJSON (EPSG:4326)
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from shapely.errors import ShapelyError
+from mda_app.config.settings import DATA_CONFIG
+from mda_app.core.data_loader import ler_dados, processar_dados_geograficos
+from mda_app.core.filtros import aplicar_filtros
+from mda_app.core.geolocalizacao import LocalizadorMunicipios
+from mda_app.core.leitor import versao_dataset
+from mda_app.core.precificacao import (
+    calcular_indicadores, calcular_precos_municipios, calcular_totais_trimestrais
+)
+
+logger = logging.getLogger(__name__)
+
+TIPOS_CONSULTA = ("municipios", "precos", "agregados")
+
+# Quantidade de respostas serializadas mantidas em memória
+LIMITE_RESPOSTAS = 1024
+
+# Pontos ou parcelas aceitos por requisição de /localizar
+LIMITE_LOCALIZAR = 100_000
+
+
+def _para_json(valor):
+    """Converter tipos numpy/pandas para tipos serializáveis em JSON."""
+    if isinstance(valor, np.integer):
+        return int(valor)
+    if isinstance(valor, np.floating):
+        return float(valor)
+    return str(valor)
+
+
+def _lista_valores(valor, nome):
+    """Normalizar um filtro do corpo JSON: lista de valores ou texto separado por vírgula."""
+    if valor is None:
+        return []
+    if isinstance(valor, str):
+        return [v.strip() for v in valor.split(",") if v.strip()]
+    if isinstance(valor, list) and all(isinstance(v, (str, int)) and not isinstance(v, bool) for v in valor):
+        return [str(v).strip() for v in valor if str(v).strip()]
+    raise ValueError(f"'{nome}' deve ser uma lista de textos ou um texto separado por vírgula")
+
+
+class ServicoPrecificacao:
+    """Consultas de precificação sobre um conjunto de dados já processado.
+
+    Os preços de todos os municípios são calculados uma única vez na criação do
+    serviço; as consultas apenas filtram linhas. Respostas são guardadas por
+    ETag, que combina a versão do dataset com a consulta normalizada.
+    """
+
+    def __init__(self, gdf, versao):
+        self.versao = versao
+        self.dados = pd.DataFrame(gdf.drop(columns=gdf.geometry.name)) if isinstance(gdf, gpd.GeoDataFrame) else gdf
+        self.precos = calcular_precos_municipios(self.dados)
+        self.coluna_nome = "mun_nome" if "mun_nome" in self.dados.columns else "NM_MUN"
+        self._faixa_criterio = (float(self.dados["nota_media"].min()), float(self.dados["nota_media"].max()))
+        self.localizador = LocalizadorMunicipios(gdf) if isinstance(gdf, gpd.GeoDataFrame) else None
+        self._respostas = OrderedDict()
+        self._trava = threading.Lock()
+
+    @classmethod
+    def de_arquivo(cls, caminho=None):
+        """Criar o serviço a partir do arquivo de dados de origem."""
+        caminho = caminho or DATA_CONFIG["dataset"]
+        gdf = processar_dados_geograficos(ler_dados(caminho))
+        return cls(gdf, versao_dataset(caminho))
+
+    def _selecionar(self, df, ufs, municipios):
+        """Aplicar os mesmos filtros do dashboard, aceitando nome, CD_MUN ou ckey."""
+        if municipios:
+            chaves = set(municipios)
+            mascara = df[self.coluna_nome].isin(chaves)
+            for coluna in ("CD_MUN", "ckey"):
+                if coluna in df.columns:
+                    mascara |= df[coluna].astype(str).isin(chaves)
+            df = df[mascara]
+            municipios = None
+        return aplicar_filtros(df, ufs, municipios, "nota_media", self._faixa_criterio)
+
+    def consultar(self, tipo, ufs=None, municipios=None):
+        """Executar uma consulta e devolver o resultado serializável em JSON."""
+        if tipo not in TIPOS_CONSULTA:
+            raise ValueError(f"Tipo de consulta inválido: {tipo}")
+        ufs = sorted(set(ufs or []))
+        municipios = sorted(set(municipios or []))
+
+        if tipo == "agregados":
+            selecao = self._selecionar(self.dados, ufs, municipios)
+            resultado = {"indicadores": {}, "totais_trimestrais": [0.0] * 4}
+            if len(selecao) > 0:
+                resultado["indicadores"] = calcular_indicadores(selecao)
+                resultado["totais_trimestrais"] = calcular_totais_trimestrais(selecao)
+            return resultado
+
+        base = self.precos if tipo == "precos" else self.dados
+        selecao = self._selecionar(base, ufs, municipios)
+        # Valores ausentes viram null (NaN não é JSON válido)
+        registros = selecao.astype(object).where(selecao.notna(), None).to_dict(orient="records")
+        return {"total": len(registros), "registros": registros}
+
+    def etag(self, tipo, ufs=None, municipios=None):
+        """ETag de uma consulta, calculada sem executá-la."""
+        if tipo not in TIPOS_CONSULTA:
+            raise ValueError(f"Tipo de consulta inválido: {tipo}")
+        consulta = json.dumps(
+            [tipo, sorted(set(ufs or [])), sorted(set(municipios or []))], ensure_ascii=False
+        )
+        return '"' + hashlib.sha256(f"{self.versao}:{consulta}".encode()).hexdigest()[:32] + '"'
+
+    def responder(self, tipo, ufs=None, municipios=None):
+        """Obter (etag, corpo JSON em bytes) de uma consulta, usando o cache de respostas."""
+        etag = self.etag(tipo, ufs, municipios)
+
+        with self._trava:
+            corpo = self._respostas.get(etag)
+            if corpo is not None:
+                self._respostas.move_to_end(etag)
+                return etag, corpo
+
+        resultado = self.consultar(tipo, ufs, municipios)
+        resultado["versao"] = self.versao
+        corpo = json.dumps(resultado, ensure_ascii=False, default=_para_json).encode("utf-8")
+
+        with self._trava:
+            self._respostas[etag] = corpo
+            while len(self._respostas) > LIMITE_RESPOSTAS:
+                self._respostas.popitem(last=False)
+        return etag, corpo
+
+    def localizar(self, corpo):
+        """Localizar e precificar os pontos ou parcelas de uma requisição.
+
+        Args:
+            corpo: {"pontos": [[lon, lat], ...]} ou FeatureCollection GeoJSON em EPSG:4326
+
+        Returns:
+            Resultado serializável em JSON com um registro por entrada, na ordem recebida
+        """
+        if self.localizador is None:
+            raise ValueError("Serviço carregado sem geometrias")
+        if corpo.get("type") == "FeatureCollection":
+            entradas = gpd.GeoDataFrame.from_features(corpo["features"], crs="EPSG:4326")
+        elif "pontos" in corpo:
+            pontos = np.asarray(corpo["pontos"], dtype=float).reshape(-1, 2)
+            entradas = gpd.GeoDataFrame(geometry=gpd.points_from_xy(pontos[:, 0], pontos[:, 1]), crs="EPSG:4326")
+        else:
+            raise ValueError('Envie {"pontos": [[lon, lat], ...]} ou uma FeatureCollection GeoJSON')
+        if len(entradas) > LIMITE_LOCALIZAR:
+            raise ValueError(f"Máximo de {LIMITE_LOCALIZAR} entradas por requisição")
+
+        precos = self.localizador.precificar(entradas)
+        registros = precos.astype(object).where(precos.notna(), None).to_dict(orient="records")
+        return {
+            "total": len(registros),
+            "localizadas": int(precos["SIGLA_UF"].notna().sum()),
+            "registros": registros,
+            "versao": self.versao,
+        }
+
+
+def _lista_parametro(parametros, nome):
+    """Ler parâmetro de query que aceita repetição e valores separados por vírgula."""
+    valores = []
+    for valor in parametros.get(nome, []):
+        valores.extend(v.strip() for v in valor.split(",") if v.strip())
+    return valores
+
+
+class ManipuladorPrecificacao(BaseHTTPRequestHandler):
+    """Manipulador HTTP das rotas da API de precificação."""
+
+    servico = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, formato, *args):
+        logger.debug("%s - %s", self.address_string(), formato % args)
+
+    def _enviar(self, status, corpo=b"", etag=None, tipo_conteudo="application/json; charset=utf-8"):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        self.send_header("Content-Type", tipo_conteudo)
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        if corpo and self.command != "HEAD":
+            self.wfile.write(corpo)
+
+    def _enviar_erro(self, status, mensagem):
+        self._enviar(status, json.dumps({"erro": mensagem}, ensure_ascii=False).encode("utf-8"))
+
+    def _responder_consulta(self, tipo, ufs, municipios):
+        # Revalidação antes de montar o corpo: um 304 não executa a consulta
+        etag = self.servico.etag(tipo, ufs, municipios)
+        if etag in [e.strip() for e in self.headers.get("If-None-Match", "").split(",")]:
+            self._enviar(304, etag=etag)
+            return
+        etag, corpo = self.servico.responder(tipo, ufs, municipios)
+        self._enviar(200, corpo, etag=etag)
+
+    def _tratar(self, rota):
+        """Executar uma rota, devolvendo 400 para consultas inválidas e 500 para falhas internas."""
+        try:
+            rota()
+        except (ValueError, TypeError, AttributeError, KeyError, ShapelyError) as erro:
+            self._enviar_erro(400, f"Consulta inválida: {erro}")
+        except Exception:
+            logger.exception("Falha ao responder %s %s", self.command, self.path)
+            self._enviar_erro(500, "Erro interno")
+
+    def do_GET(self):
+        self._tratar(self._rotear_get)
+
+    def _rotear_get(self):
+        url = urlsplit(self.path)
+        rota = url.path.rstrip("/") or "/"
+        parametros = parse_qs(url.query)
+
+        if rota == "/saude":
+            corpo = json.dumps({"status": "ok", "versao": self.servico.versao}).encode("utf-8")
+            self._enviar(200, corpo)
+        elif rota.lstrip("/") in TIPOS_CONSULTA:
+            self._responder_consulta(
+                rota.lstrip("/"),
+                _lista_parametro(parametros, "uf"),
+                _lista_parametro(parametros, "municipio"),
+            )
+        else:
+            self._enviar_erro(404, f"Rota não encontrada: {url.path}")
+
+    do_HEAD = do_GET
+
+    def do_POST(self):
+        self._tratar(self._rotear_post)
+
+    def _rotear_post(self):
+        rota = urlsplit(self.path).path.rstrip("/")
+        if rota not in ("/consulta", "/localizar"):
+            self._enviar_erro(404, f"Rota não encontrada: {self.path}")
+            return
+        tamanho = int(self.headers.get("Content-Length", 0))
+        consulta = json.loads(self.rfile.read(tamanho) or b"{}")
+        if not isinstance(consulta, dict):
+            raise ValueError("o corpo deve ser um objeto JSON")
+        if rota == "/localizar":
+            resultado = self.servico.localizar(consulta)
+            self._enviar(200, json.dumps(resultado, ensure_ascii=False, default=_para_json).encode("utf-8"))
+            return
+        self._responder_consulta(
+            consulta.get("tipo", "precos"),
+            _lista_valores(consulta.get("ufs"), "ufs"),
+            _lista_valores(consulta.get("municipios"), "municipios"),
+        )
+
+
+def criar_servidor(servico, host="127.0.0.1", porta=8502):
+    """Criar servidor HTTP multithread associado ao serviço de precificação."""
+    manipulador = type("Manipulador", (ManipuladorPrecificacao,), {"servico": servico})
+    servidor = ThreadingHTTPServer((host, porta), manipulador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def main(argv=None):
+    """Iniciar a API de precificação pela linha de comando."""
+    parser = argparse.ArgumentParser(description="API HTTP de precificação municipal")
+    parser.add_argument("--dataset", default=DATA_CONFIG["dataset"], help="Arquivo de dados de origem")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8502)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    servico = ServicoPrecificacao.de_arquivo(args.dataset)
+    servidor = criar_servidor(servico, args.host, args.porta)
+    logger.info("API de precificação em http://%s:%s (versão %s)", args.host, args.porta, servico.versao)
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
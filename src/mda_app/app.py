@@ -1,28 +1,36 @@
 """Aplicação principal MDA Precificação de Áreas."""
 
+import copy
+import hashlib
+import os
+import tempfile
 import streamlit as st
-import numpy as np
-from mda_app.config.settings import APP_CONFIG
-from mda_app.core.data_loader import carregar_dados, processar_dados_geograficos
+import pandas as pd
+from mda_app.config.settings import APP_CONFIG, DATA_CONFIG, REGIOES_ESTADOS
+from mda_app.core.data_loader import (
+    carregar_dados, carregar_dados_compactos, carregar_dissolucoes, carregar_indice_municipios,
+    carregar_diferencas, carregar_localizador, carregar_versoes, descartar_versao,
+    ler_selecao_duckdb, versao_fonte
+)
+from mda_app.core import consulta_duckdb
+from mda_app.core.busca import LIMITE_SUGESTOES
+from mda_app.core.dissolucoes import identificar_poligonos, montar_niveis_mapa
+from mda_app.core.esquema_compacto import descompactar_dados, relatorio_colunas
+from mda_app.core.exportacao import FORMATOS, diretorio_exportacoes, exportar_selecao, url_download
+from mda_app.core.geolocalizacao import precificar_arquivo
+from mda_app.core.filtros import aplicar_filtros
+from mda_app.core.trimestres import medias_trimestrais, tensor_trimestral
+from mda_app.core.precificacao import calcular_totais_trimestrais
+from mda_app.core.recarga import RecarregadorDataset
 from mda_app.components.ui_components import render_header, render_metrics
-from mda_app.components.visualizations import criar_mapa, criar_histograma, criar_scatter_plot
+from mda_app.components.visualizations import (
+    criar_mapa, criar_histograma, criar_scatter_plot,
+    criar_gauge, criar_grafico_trimestral, criar_grafico_composicao_uf
+)
 from mda_app.utils.formatters import reais
-
-
-def calcular_valor_por_nota(pontuacao, area):
-    """Calcula valor baseado na pontuação e área."""
-    if pontuacao <= 15:
-        return area * 49.83
-    elif pontuacao <= 25:
-        return area * 59.80
-    elif pontuacao <= 35:
-        return area * 104.78
-    elif pontuacao <= 45:
-        return area * 134.88
-    elif pontuacao <= 55:
-        return area * 164.95
-    else:
-        return area * 202.87
+from mda_app.utils.cache import descartar_compartilhados, reutilizar_entre_sessoes, reutilizar_na_sessao
+from mda_app.utils.memoria import ContabilidadeMemoria
+from mda_app.utils.paralelo import ConstrucoesPagina
 
 
 def configurar_pagina():
@@ -46,20 +54,54 @@ def configurar_estilos():
         """, unsafe_allow_html=True)
 
 
-def criar_filtros(gdf):
+def _selecionar_municipios():
+    """Guardar a escolha feita no seletor de municípios."""
+    st.session_state.municipios_selecionados = list(st.session_state.multiselect_municipios)
+    st.session_state.municipios_alterados = True
+
+
+@st.fragment
+def filtro_municipios(indice, uf_sel):
+    """Busca de municípios por nome, código IBGE ou ckey.
+
+    Roda como fragmento: confirmar a busca (Enter) refaz só este trecho da
+    página, e as opções do seletor são apenas os municípios escolhidos mais as
+    melhores sugestões, nunca a lista inteira de municípios.
+    """
+    # Municípios selecionados (também por clique no mapa), somente das UFs escolhidas
+    selecionados = indice.nas_ufs(st.session_state.get("municipios_selecionados", []), uf_sel)
+    st.session_state.municipios_selecionados = selecionados
+    st.session_state.multiselect_municipios = selecionados
+    
+    consulta = st.text_input(
+        "Buscar município",
+        key="busca_municipio",
+        placeholder="Nome, código IBGE ou ckey"
+    )
+    sugestoes = indice.buscar(consulta, ufs=uf_sel, limite=LIMITE_SUGESTOES)
+    
+    st.multiselect(
+        "Município",
+        options=list(dict.fromkeys(selecionados + sugestoes)),
+        placeholder="Todos os municípios",
+        help="Deixe vazio para mostrar todos. Use a busca para encontrar outros municípios.",
+        key="multiselect_municipios",
+        on_change=_selecionar_municipios
+    )
+    
+    # A seleção afeta a página inteira: refazer o app, não só o fragmento
+    if st.session_state.pop("municipios_alterados", False):
+        st.rerun(scope="app")
+
+
+def criar_filtros(indice):
     """Criar filtros na área principal."""
     
     # Criar colunas para os filtros
     col1, col2, col3 = st.columns(3)
     
     # Mapeamento de regiões e estados
-    regioes_estados = {
-        "Norte": ["AC", "AP", "AM", "PA", "RO", "RR", "TO"],
-        "Nordeste": ["AL", "BA", "CE", "MA", "PB", "PE", "PI", "RN", "SE"],
-        "Centro-Oeste": ["DF", "GO", "MT", "MS"],
-        "Sudeste": ["ES", "MG", "RJ", "SP"],
-        "Sul": ["PR", "RS", "SC"]
-    }
+    regioes_estados = REGIOES_ESTADOS
     
     with col1:
         # Filtro de Região
@@ -69,39 +111,17 @@ def criar_filtros(gdf):
     with col2:
         # Filtro de UF baseado na região
         if regiao_sel == "Todas":
-            ufs_disponiveis = sorted(gdf["SIGLA_UF"].unique())
+            ufs_disponiveis = indice.ufs
         else:
-            ufs_disponiveis = sorted([uf for uf in regioes_estados[regiao_sel] if uf in gdf["SIGLA_UF"].unique()])
+            ufs_disponiveis = sorted([uf for uf in regioes_estados[regiao_sel] if uf in indice.ufs])
         
         uf_sel = st.multiselect("Estado (UF)", options=ufs_disponiveis, default=ufs_disponiveis)
     
     with col3:
-        # Filtro de Municípios (baseado nas UFs selecionadas)
+        # Filtro de Municípios (baseado nas UFs selecionadas); vazio = todos
         if uf_sel:
-            gdf_filtrado_uf = gdf[gdf["SIGLA_UF"].isin(uf_sel)]
-            if 'mun_nome' in gdf_filtrado_uf.columns:
-                municipios = sorted(gdf_filtrado_uf["mun_nome"].unique())
-            else:
-                municipios = sorted(gdf_filtrado_uf["NM_MUN"].unique())
-            
-            # Inicializar estado de municípios selecionados
-            if 'municipios_selecionados' not in st.session_state:
-                st.session_state.municipios_selecionados = []
-            
-            municipios_sel = st.multiselect(
-                "Município",
-                options=municipios,
-                default=st.session_state.municipios_selecionados,
-                placeholder="Todos os municípios",
-                help="Deixe vazio para mostrar todos",
-                key="multiselect_municipios"
-            )
-            
-            if municipios_sel != st.session_state.municipios_selecionados:
-                st.session_state.municipios_selecionados = municipios_sel
-            
-            if not municipios_sel:
-                municipios_sel = municipios
+            filtro_municipios(indice, uf_sel)
+            municipios_sel = list(st.session_state.municipios_selecionados)
         else:
             municipios_sel = []
     
@@ -109,32 +129,358 @@ def criar_filtros(gdf):
     
     # Critério fixo em nota_media
     criterio_sel = "nota_media"
-    crit_min, crit_max = float(gdf[criterio_sel].min()), float(gdf[criterio_sel].max())
-    crit_sel = (crit_min, crit_max)
+    crit_sel = indice.faixa_nota
     
     return uf_sel, municipios_sel, criterio_sel, crit_sel
 
 
-def aplicar_filtros(gdf, uf_sel, municipios_sel, criterio_sel, crit_sel):
-    """Aplicar filtros aos dados."""
-    # Determinar qual coluna de nome usar
-    coluna_nome = 'mun_nome' if 'mun_nome' in gdf.columns else 'NM_MUN'
+def carregar_base(ufs_carregar, versao):
+    """Dados processados das UFs a carregar (em cache por versão dos dados).
+
+    Returns:
+        Tupla (gdf, geometrias compactadas ou None); (None, None) no backend
+        DuckDB, que lê apenas a seleção filtrada
+    """
+    if DATA_CONFIG["backend"] == "duckdb":
+        return None, None
+    if DATA_CONFIG["esquema_compacto"]:
+        # Geometrias ficam em WKB e só são materializadas para a seleção filtrada
+        return carregar_dados_compactos(ufs_carregar, versao)
+    return carregar_dados(ufs_carregar, versao), None
+
+
+def filtrar_selecao(gdf, geometrias, uf_sel, municipios_sel, criterio_sel, crit_sel):
+    """Municípios da seleção, com geometria (ver `carregar_base`)."""
+    if gdf is None:
+        # Filtros em SQL sobre o dataset processado
+        return ler_selecao_duckdb(uf_sel, municipios_sel, criterio_sel, crit_sel)
+    filtrado = aplicar_filtros(gdf, uf_sel, municipios_sel, criterio_sel, crit_sel)
+    if geometrias is not None and len(filtrado) > 0:
+        filtrado = descompactar_dados(filtrado, geometrias)
+    return filtrado
+
+
+def construir_mapa(chave_mapa, camada_mapa, criterio_sel):
+    """Mapa da camada, compartilhado entre as sessões pela chave (versão, seleção e detalhes)."""
+    return reutilizar_entre_sessoes(
+        ("mapa", chave_mapa), lambda: criar_mapa(camada_mapa, criterio_sel, mostrar_controle_camadas=True)
+    )
+
+
+def aquecer_versao(versao):
+    """Preencher os caches de uma versão dos dados com a seleção inicial da página.
+
+    A seleção é a mesma que `criar_filtros` produz na primeira visita (todas as
+    UFs, nenhum município, faixa completa da nota média), então quem abre a
+    página encontra índice, dados, dissoluções e mapa prontos.
+    """
+    indice = carregar_indice_municipios(versao)
+    uf_sel, criterio_sel, crit_sel = indice.ufs, "nota_media", indice.faixa_nota
+    ufs_carregar = tuple(sorted(uf_sel)) or None
+    gdf, geometrias = carregar_base(ufs_carregar, versao)
+    gdf_filtrado = filtrar_selecao(gdf, geometrias, uf_sel, [], criterio_sel, crit_sel)
+    if len(gdf_filtrado) == 0:
+        return
+    camada = montar_niveis_mapa(gdf_filtrado, carregar_dissolucoes(ufs_carregar, versao), uf_sel, set(indice.ufs))
+    chave_selecao = (versao, tuple(uf_sel), (), criterio_sel, crit_sel)
+    construir_mapa((chave_selecao, ()), gdf_filtrado if camada is None else camada, criterio_sel)
+
+
+def descartar_versao_substituida(versao):
+    """Liberar os caches (dados, índice, dissoluções e mapas) de uma versão substituída."""
+    descartar_versao(versao, carregar_indice_municipios(versao).ufs)
+    descartar_compartilhados(lambda chave: chave[0] == "mapa" and chave[1][0][0] == versao)
+
+
+@st.cache_resource
+def obter_recarregador():
+    """Observador da versão dos dados, iniciado uma vez por processo.
+
+    A primeira chamada aquece a versão atual; depois, versões novas são
+    aquecidas em segundo plano antes de se tornarem a versão ativa.
+    """
+    return RecarregadorDataset(versao_fonte, aquecer_versao, DATA_CONFIG["intervalo_recarga"],
+                               descartar=descartar_versao_substituida).iniciar()
+
+
+def _formatar_numero(valor, casas=2):
+    return f"{valor:,.{casas}f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def resumir_selecao(gdf_filtrado):
+    """Agregados dos cards de vários municípios (chaves omitidas quando faltam colunas)."""
+    colunas = gdf_filtrado.columns
+    resumo = {}
+    if 'area_municip' in colunas:
+        resumo["area_total"] = gdf_filtrado['area_municip'].sum()
+    if 'area_car_media' in colunas:
+        resumo["area_car_media"] = gdf_filtrado['area_car_media'].mean()
+    
+    # Valor por hectare dos municípios com área georreferenciável
+    if 'valor_mun_area' in colunas and 'area_georef' in colunas:
+        com_area = gdf_filtrado[gdf_filtrado['area_georef'] > 0]
+        if len(com_area) > 0:
+            valor_por_ha = com_area['valor_mun_area'] / com_area['area_georef']
+            resumo["valor_ha_medio"] = valor_por_ha.mean()
+            resumo["valor_ha_minimo"] = valor_por_ha.min()
+            resumo["valor_ha_maximo"] = valor_por_ha.max()
+    return resumo
+
+
+def calcular_metricas(gdf_filtrado, resumo=None):
+    """Calcular os cards de métricas da visão Mapa.
+
+    Args:
+        gdf_filtrado: Municípios filtrados
+        resumo: Agregados já calculados (ex.: pelo backend DuckDB); se None,
+            calculados com `resumir_selecao`
+
+    Returns:
+        Lista de (coluna, rótulo, valor formatado); um município ocupa 4
+        colunas, vários municípios ocupam 5
+    """
+    colunas = gdf_filtrado.columns
+    metricas = []
+    
+    if len(gdf_filtrado) == 1:
+        # Um município: valores do próprio município
+        municipio = gdf_filtrado.iloc[0]
+        if 'area_municip' in colunas:
+            metricas.append((0, "Área total do Município (ha)", _formatar_numero(municipio['area_municip'])))
+        if 'area_car_total' in colunas:
+            metricas.append((1, "Área CAR Total (ha)", _formatar_numero(municipio['area_car_total'])))
+        if 'area_car_media' in colunas:
+            metricas.append((2, "Tamanho Médio Imóvel CAR (ha)", _formatar_numero(municipio['area_car_media'])))
+        if 'valor_mun_area' in colunas and 'area_georef' in colunas and municipio['area_georef'] > 0:
+            metricas.append((3, "Valor Médio/ha", reais(municipio['valor_mun_area'] / municipio['area_georef'])))
+        return metricas
+    
+    if resumo is None:
+        resumo = resumir_selecao(gdf_filtrado)
+    if "area_total" in resumo:
+        metricas.append((0, "Área Total (ha)", _formatar_numero(resumo["area_total"], 0)))
+    if "area_car_media" in resumo:
+        metricas.append((1, "Tamanho Médio Imóvel CAR (ha)", _formatar_numero(resumo["area_car_media"])))
+    if "valor_ha_medio" in resumo:
+        metricas.append((2, "Valor Médio/ha", reais(resumo["valor_ha_medio"])))
+        metricas.append((3, "Valor Mínimo/ha", reais(resumo["valor_ha_minimo"])))
+        metricas.append((4, "Valor Máximo/ha", reais(resumo["valor_ha_maximo"])))
+    return metricas
+
+
+def montar_grafico_trimestral(gdf_filtrado):
+    """Gráfico do grau de dificuldade por trimestre (município único ou médias gerais)."""
+    tensor = tensor_trimestral(gdf_filtrado, criterios=("nota_total",))
+    return criar_grafico_trimestral([float(v) for v in medias_trimestrais(tensor)])
+
+
+def montar_gauge(gdf_filtrado):
+    """Medidor do percentual de área georreferenciável (média dos municípios)."""
+    if 'percent_area_georef' in gdf_filtrado.columns:
+        percentual = float(gdf_filtrado['percent_area_georef'].mean())
+    else:
+        percentual = 0.0
+    return criar_gauge(percentual)
+
+
+# Notas exibidas na composição média por UF
+COLUNAS_NOTAS_UF = ["nota_veg", "nota_area", "nota_relevo", "nota_insalub_media",
+                    "nota_p_q1", "nota_p_q2", "nota_p_q3", "nota_p_q4"]
+
+
+def medias_notas_uf(gdf, uf_sel):
+    """Média das notas por UF das UFs selecionadas (ignora o filtro de município)."""
+    colunas_presentes = [c for c in COLUNAS_NOTAS_UF if c in gdf.columns]
+    return (
+        gdf[gdf["SIGLA_UF"].isin(uf_sel)]
+        .groupby("SIGLA_UF", observed=True)[colunas_presentes]
+        .mean()
+        .reset_index()
+    )
+
+
+def montar_composicao_uf(df_uf):
+    """Gráfico da composição média das notas por UF.
+
+    Args:
+        df_uf: Médias das notas por UF (`medias_notas_uf` ou backend DuckDB)
+
+    Returns:
+        Figura, ou None se houver menos de 3 notas no conjunto de dados
+    """
+    colunas_presentes = [c for c in COLUNAS_NOTAS_UF if c in df_uf.columns]
+    if len(colunas_presentes) < 3:
+        return None
+    
+    # Ordenar por complexidade/custo
+    df_uf = df_uf.copy()
+    df_uf['total_notas'] = df_uf[colunas_presentes].sum(axis=1)
+    df_uf = df_uf.sort_values("total_notas", ascending=False)
+    
+    # Traços na ordem da legenda, apenas das colunas presentes
+    ordem_legenda = ["nota_p_q1", "nota_p_q2", "nota_p_q3", "nota_p_q4",
+                     "nota_insalub_media", "nota_relevo", "nota_area", "nota_veg"]
+    ordem_legenda = [col for col in ordem_legenda if col in colunas_presentes]
+    return criar_grafico_composicao_uf(df_uf, ordem_legenda)
+
+
+def montar_tabela(gdf_filtrado):
+    """Tabela de municípios (sem geometria e sem o fid interno)."""
+    return gdf_filtrado.drop(columns=[c for c in ("geometry", "fid") if c in gdf_filtrado.columns])
+
+
+def mostrar_variacao_versoes(gdf_filtrado):
+    """Variação de notas e valores dos municípios filtrados entre duas versões do dataset."""
+    versoes = carregar_versoes()
+    if len(versoes) < 2 or "CD_MUN" not in gdf_filtrado.columns:
+        return
+    
+    with st.expander("📈 Variação entre versões do dataset"):
+        col_anterior, col_atual = st.columns(2)
+        anterior = col_anterior.selectbox("Versão anterior", options=versoes, index=len(versoes) - 2,
+                                          key="versao_anterior")
+        atual = col_atual.selectbox("Versão atual", options=versoes, index=len(versoes) - 1, key="versao_atual")
+        if anterior == atual:
+            st.info("Escolha duas versões diferentes.")
+            return
+        
+        diferencas = carregar_diferencas(anterior, atual)
+        diferencas = diferencas[diferencas.index.isin(gdf_filtrado["CD_MUN"])]
+        if len(diferencas) == 0:
+            st.info("Nenhum município da seleção mudou entre as versões.")
+            return
+        
+        coluna_nome = 'mun_nome' if 'mun_nome' in gdf_filtrado.columns else 'NM_MUN'
+        nomes = gdf_filtrado.set_index("CD_MUN")[coluna_nome]
+        diferencas = diferencas.assign(municipio=nomes.reindex(diferencas.index).to_numpy())
+        
+        col1, col2 = st.columns(2)
+        col1.metric("Municípios alterados", len(diferencas))
+        if "valor_mun_area_delta" in diferencas.columns:
+            col2.metric("Variação do valor total (área)", reais(diferencas["valor_mun_area_delta"].sum()))
+        st.dataframe(diferencas[["municipio", *diferencas.columns[:-1]]], use_container_width=True)
+
+
+# Formatos aceitos na precificação em lote (Shapefile em .zip)
+FORMATOS_LOTE = ["csv", "parquet", "gpkg", "geojson", "json", "zip"]
+
+
+def link_download(caminho, nome_arquivo, rotulo):
+    """Link para um arquivo gerado em disco, servido pelo Streamlit sem carregá-lo na memória."""
+    url = url_download(caminho)
+    if url is None:
+        st.info(f"Arquivo gerado no servidor em `{caminho}` (fora de `static/` ou grande demais para download).")
+        return
+    st.markdown(f'<a href="{url}" download="{nome_arquivo}">{rotulo}</a>', unsafe_allow_html=True)
+
+
+# Linhas do resultado exibidas na página (o arquivo baixado tem todas)
+LINHAS_PREVIA_LOTE = 1_000
+
+
+def precificar_envio(arquivo, crs, versao):
+    """Precificar em lotes o arquivo enviado; o CSV resultante fica no diretório de exportações.
+
+    Returns:
+        Tupla (resumo de `precificar_arquivo`, caminho do CSV)
+    """
+    conteudo = arquivo.getvalue()
+    chave = hashlib.sha256(f"{versao}:{crs}:".encode() + conteudo).hexdigest()[:24]
+    diretorio = diretorio_exportacoes()
+    saida = os.path.join(diretorio, f"lote_{chave}.csv")
+    # Os leitores precisam de um caminho com a extensão original. O arquivo
+    # enviado fica no diretório temporário do sistema (o de exportações pode
+    # ser servido pelo Streamlit); a saída é gravada à parte e renomeada, então
+    # sessões simultâneas não se misturam
+    descritor, entrada = tempfile.mkstemp(suffix=os.path.splitext(arquivo.name)[1].lower())
+    with os.fdopen(descritor, "wb") as enviado:
+        enviado.write(conteudo)
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix=".tmp")
+    os.close(descritor)
+    try:
+        resumo = precificar_arquivo(entrada, temporario, carregar_localizador(versao), crs)
+        os.replace(temporario, saida)
+    finally:
+        os.remove(entrada)
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    return resumo, saida
+
+
+def mostrar_precificacao_lote(versao):
+    """Visão de precificação em lote: município, notas e preços de cada ponto ou parcela enviada."""
+    st.title("• Precificação em lote")
+    st.markdown(
+        "Envie coordenadas de imóveis (CSV ou Parquet com colunas `longitude`/`latitude`, `lon`/`lat` ou "
+        "`x`/`y`, ou geometrias em uma coluna `wkt`) ou parcelas (GeoPackage, GeoJSON, GeoParquet ou Shapefile em "
+        ".zip). Cada entrada recebe o município, as notas e o valor por hectare de cada trimestre; parcelas "
+        "recebem também a área e o valor total."
+    )
+    col_arquivo, col_crs = st.columns([3, 1])
+    with col_arquivo:
+        arquivo = st.file_uploader("Pontos ou parcelas", type=FORMATOS_LOTE, key="arquivo_lote")
+    with col_crs:
+        crs = st.text_input("CRS das coordenadas (CSV/Parquet)", value="EPSG:4326", key="crs_lote")
+    if arquivo is None:
+        return
     
-    # Começar com todos os dados
-    gdf_filtrado = gdf.copy()
+    try:
+        with st.spinner("Localizando e precificando..."):
+            resumo, caminho = reutilizar_na_sessao(
+                "precificacao_lote", (versao, arquivo.file_id, crs), lambda: precificar_envio(arquivo, crs, versao)
+            )
+    except ValueError as erro:
+        st.error(f"⚠️ {erro}")
+        return
     
-    # Aplicar filtro de UF se houver seleção
-    if uf_sel:
-        gdf_filtrado = gdf_filtrado[gdf_filtrado["SIGLA_UF"].isin(uf_sel)]
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Entradas", _formatar_numero(resumo["entradas"], 0))
+    col2.metric("Localizadas", _formatar_numero(resumo["localizadas"], 0))
+    if resumo["area_ha"] > 0:
+        col3.metric("Área das parcelas (ha)", _formatar_numero(resumo["area_ha"]))
+        for coluna, (trimestre, valor) in zip(st.columns(4), enumerate(resumo["valores"], start=1)):
+            coluna.metric(f"{trimestre}º Trimestre", f"R$ {_formatar_numero(valor / 1_000_000, 3)} Mi")
     
-    # Aplicar filtro de Município se houver seleção
-    if municipios_sel:
-        gdf_filtrado = gdf_filtrado[gdf_filtrado[coluna_nome].isin(municipios_sel)]
+    if not os.path.exists(caminho):
+        # Removido pela limpeza do diretório de exportações: gerar de novo
+        precificar_envio(arquivo, crs, versao)
+    st.dataframe(pd.read_csv(caminho, nrows=LINHAS_PREVIA_LOTE), use_container_width=True)
+    if resumo["entradas"] > LINHAS_PREVIA_LOTE:
+        st.caption(f"Primeiras {LINHAS_PREVIA_LOTE} linhas; o arquivo baixado tem todas.")
     
-    # Aplicar filtro de critério (sempre aplicado)
-    gdf_filtrado = gdf_filtrado[gdf_filtrado[criterio_sel].between(*crit_sel)]
+    link_download(caminho, "precificacao_lote.csv", "⬇️ Baixar preços")
+
+
+def mostrar_diagnostico_memoria(memoria, relatorio, colunas=None):
+    """Visão de depuração: memória por etapa desta execução e maiores objetos retidos.
+
+    `colunas` é o relatório por coluna da base compacta (`MDA_ESQUEMA_COMPACTO=1`).
+    """
+    with st.expander("🛠️ Diagnóstico de memória"):
+        st.markdown("**Etapas desta execução**")
+        st.dataframe(memoria.etapas, use_container_width=True)
+        if colunas is not None:
+            st.markdown("**Memória por coluna da base compacta**")
+            st.dataframe(colunas, use_container_width=True)
+        if relatorio is None:
+            return
+        col1, col2 = st.columns(2)
+        col1.metric("Memória rastreada (MB)", _formatar_numero(relatorio["rastreado_kb"] / 1024, 1))
+        if relatorio["pico_rss_mb"] is not None:
+            col2.metric("Pico de RSS do processo (MB)", _formatar_numero(relatorio["pico_rss_mb"], 1))
+        st.markdown("**Maiores objetos retidos**")
+        st.dataframe(relatorio["objetos"], use_container_width=True)
+        st.markdown("**Estado por sessão**")
+        st.dataframe(relatorio["sessoes"], use_container_width=True)
+        st.markdown("**Maiores pontos de alocação**")
+        st.dataframe(relatorio["alocacoes"], use_container_width=True)
+
+
+def _id_sessao():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
     
-    return gdf_filtrado
+    contexto = get_script_run_ctx()
+    return contexto.session_id if contexto is not None else None
 
 
 def main():
@@ -145,15 +491,18 @@ def main():
     # Renderizar cabeçalho
     render_header()
     
-    # Carregar e processar dados
-    gdf = carregar_dados()
-    gdf = processar_dados_geograficos(gdf)
-    
-    # Criar abas
-    abas = st.tabs(["Mapa", "Introdução"])
+    # Navegação entre visões: apenas o código da visão ativa é executado
+    # (st.tabs executaria o corpo de todas as abas a cada interação)
+    aba_ativa = st.radio(
+        "Navegação",
+        options=["Mapa", "Precificação em lote", "Introdução"],
+        horizontal=True,
+        label_visibility="collapsed",
+        key="aba_ativa"
+    )
     
-    # Aba Introdução (índice 1)
-    with abas[1]:
+    # Visão Introdução
+    if aba_ativa == "Introdução":
         st.title("• Introdução")
         st.markdown("""
 <p style="text-align: justify;">
@@ -234,80 +583,157 @@ predominante no município (aberta, intermediária e fechada) e nota específica
     **Downloads**''')
         st.markdown(f'[📑Minuta de Instrução Normativa de Referência SEI/INCRA – 20411255]({url})')
     
-    # Aba Mapa (índice 0)
-    with abas[0]:
-        # Criar filtros dentro da aba Mapa
-        uf_sel, municipios_sel, criterio_sel, crit_sel = criar_filtros(gdf)
+    # Visão Precificação em lote
+    elif aba_ativa == "Precificação em lote":
+        mostrar_precificacao_lote(obter_recarregador().versao)
+    
+    # Visão Mapa (calculada sob demanda, apenas quando ativa)
+    else:
+        # Versão ativa dos dados, lida uma vez: uma versão nova só passa a valer
+        # (na próxima interação) depois de aquecida em segundo plano
+        versao = obter_recarregador().versao
+        
+        # Memória por etapa (só com MDA_MEMORIA=1)
+        memoria = ContabilidadeMemoria(sessao=_id_sessao())
+        memoria.marcar("indice_e_filtros")
+        
+        # Criar filtros dentro da visão Mapa (índice com UF, nomes, códigos e nota média)
+        indice_municipios = carregar_indice_municipios(versao)
+        uf_sel, municipios_sel, criterio_sel, crit_sel = criar_filtros(indice_municipios)
+        
+        # Carregar e processar dados apenas das UFs selecionadas
+        memoria.marcar("dados")
+        ufs_carregar = tuple(sorted(uf_sel)) or None
+        # Filtros e agregações em SQL no backend DuckDB: apenas a seleção filtrada é materializada
+        usar_duckdb = DATA_CONFIG["backend"] == "duckdb"
+        gdf, geometrias = carregar_base(ufs_carregar, versao)
+        
+        # Resultados pesados são reutilizados enquanto a seleção não mudar
+        chave_selecao = (versao, tuple(uf_sel), tuple(municipios_sel), criterio_sel, crit_sel)
         
         # Aplicar filtros
-        gdf_filtrado = aplicar_filtros(gdf, uf_sel, municipios_sel, criterio_sel, crit_sel)
+        memoria.marcar("filtragem")
+        gdf_filtrado = reutilizar_na_sessao(
+            "gdf_filtrado", chave_selecao,
+            lambda: filtrar_selecao(gdf, geometrias, uf_sel, municipios_sel, criterio_sel, crit_sel)
+        )
         
         # Verificar se há dados após aplicar filtros
         if len(gdf_filtrado) == 0:
             st.warning("⚠️ Nenhum município encontrado com os filtros selecionados. Por favor, ajuste os filtros.")
             st.stop()
         
-        gdf_filtrado2 = gdf_filtrado.to_crs(epsg=5880)
+        # Regiões/UFs detalhadas por clique valem apenas para a seleção atual
+        expandidos_sel = st.session_state.get("mapa_expandidos")
+        if not expandidos_sel or expandidos_sel[0] != chave_selecao:
+            st.session_state.mapa_expandidos = expandidos_sel = (chave_selecao, ())
+        expandidos = expandidos_sel[1]
         
-        # Criar mapa
-        m = criar_mapa(gdf_filtrado, criterio_sel, mostrar_controle_camadas=True)
+        # Nível do mapa: regiões e UFs dissolvidas enquanto couberem na seleção
+        # (montado na thread do script, com o estado da sessão já lido)
+        municipios_explicitos = bool(st.session_state.get("municipios_selecionados"))
         
-        from streamlit_folium import st_folium
-        from shapely.geometry import Point
+        def montar_camada_mapa():
+            camada = montar_niveis_mapa(
+                gdf_filtrado,
+                carregar_dissolucoes(ufs_carregar, versao),
+                uf_sel,
+                set(indice_municipios.ufs),
+                municipios_explicitos=municipios_explicitos,
+                expandidos=expandidos
+            )
+            return gdf_filtrado if camada is None else camada
+        
+        memoria.marcar("camada_mapa")
+        chave_mapa = (chave_selecao, expandidos)
+        camada_mapa = reutilizar_na_sessao("camada_mapa", chave_mapa, montar_camada_mapa)
+        
+        # Agregações da seleção: em SQL no backend DuckDB, senão sobre os dados em memória
+        selecao = dict(ufs=uf_sel, municipios=municipios_sel, criterio=criterio_sel, faixa=crit_sel)
         
-        # Inicializar controle de último clique
-        if 'ultimo_clique' not in st.session_state:
-            st.session_state.ultimo_clique = None
+        def metricas():
+            if usar_duckdb and len(gdf_filtrado) > 1:
+                return calcular_metricas(gdf_filtrado, consulta_duckdb.resumo_selecao(**selecao))
+            return calcular_metricas(gdf_filtrado)
         
-        # Renderizar mapa e capturar eventos
+        def totais_trimestrais():
+            if usar_duckdb:
+                return consulta_duckdb.totais_trimestrais(**selecao)
+            return calcular_totais_trimestrais(gdf_filtrado)
+        
+        def composicao_uf():
+            if usar_duckdb:
+                return montar_composicao_uf(consulta_duckdb.medias_por_uf(uf_sel, COLUNAS_NOTAS_UF))
+            return montar_composicao_uf(medias_notas_uf(gdf, uf_sel))
+        
+        # Componentes independentes entre si: construídos em paralelo assim que a
+        # seleção é conhecida e exibidos abaixo na ordem da página. As funções
+        # agendadas recebem só valores já calculados na thread do script e não
+        # chamam o Streamlit (nem funções em st.cache_*)
+        memoria.marcar("mapa")
+        construcoes = ConstrucoesPagina()
+        construcoes.agendar("mapa", chave_mapa, lambda: construir_mapa(chave_mapa, camada_mapa, criterio_sel))
+        construcoes.agendar("metricas", chave_selecao, metricas)
+        construcoes.agendar("grafico_trimestral", chave_selecao, lambda: montar_grafico_trimestral(gdf_filtrado))
+        construcoes.agendar("gauge", chave_selecao, lambda: montar_gauge(gdf_filtrado))
+        construcoes.agendar("totais_trimestrais", chave_selecao, totais_trimestrais)
+        construcoes.agendar("composicao_uf", chave_selecao, composicao_uf)
+        construcoes.agendar("tabela", chave_selecao, lambda: montar_tabela(gdf_filtrado))
+        
+        # Criar mapa (cópia do último mapa construído para a mesma seleção, pois
+        # st_folium altera os identificadores internos do objeto ao renderizar)
+        m = copy.deepcopy(construcoes.obter("mapa"))
+        
+        from streamlit_folium import st_folium
+        
+        # Renderizar mapa retornando apenas o tooltip do polígono clicado: o
+        # componente só envia dados quando esse valor muda, então mover ou dar
+        # zoom no mapa não dispara rerun. A chave muda com a seleção e os
+        # polígonos detalhados: o componente recomeça sem clique e o mesmo
+        # polígono pode ser clicado de novo (após removê-lo do filtro ou voltar
+        # à visão agregada)
+        chave_componente = hashlib.sha256(repr(chave_mapa).encode()).hexdigest()[:16]
         map_data = st_folium(
             m, 
             width=None, 
             height=500,
-            key="mapa_principal"
+            key=f"mapa_principal_{chave_componente}",
+            returned_objects=["last_object_clicked_tooltip"]
         )
         
-        # Tentar diferentes formas de capturar clique
-        clicked_coords = None
-        
-        if map_data:
-            # Tentar last_clicked
-            if map_data.get("last_clicked"):
-                clicked_coords = (
-                    map_data["last_clicked"].get("lat"),
-                    map_data["last_clicked"].get("lng")
-                )
-            # Tentar last_object_clicked
-            elif map_data.get("last_object_clicked"):
-                clicked_coords = (
-                    map_data["last_object_clicked"].get("lat"),
-                    map_data["last_object_clicked"].get("lng")
-                )
-        
-        # Processar clique se houver coordenadas válidas
-        if clicked_coords and clicked_coords[0] and clicked_coords[1]:
-            lat, lng = clicked_coords
+        # Cliques já processados valem só para a seleção e os polígonos atuais
+        if (st.session_state.get("ultimo_clique") or (None,))[0] != chave_mapa:
+            st.session_state.ultimo_clique = (chave_mapa, None)
+        
+        # O tooltip chega como texto renderizado (com espaços ao redor do rótulo)
+        rotulo_clicado = ((map_data or {}).get("last_object_clicked_tooltip") or "").strip()
+        poligonos = identificar_poligonos(camada_mapa)
+        clicado = poligonos[poligonos["rotulo"] == rotulo_clicado].head(1)
+        
+        # Processar apenas cliques novos, pelo identificador único do polígono
+        if len(clicado) and st.session_state.ultimo_clique != (chave_mapa, clicado["id"].iat[0]):
+            st.session_state.ultimo_clique = (chave_mapa, clicado["id"].iat[0])
+            nivel, nome = clicado["nivel"].iat[0], clicado["nome"].iat[0]
+            
+            # Região ou UF clicada: detalhar no nível seguinte
+            if nivel != "municipio":
+                st.session_state.mapa_expandidos = (chave_selecao, tuple(sorted(set(expandidos) | {nome})))
+                st.rerun()
             
-            # Verificar se é um novo clique
-            if st.session_state.ultimo_clique != clicked_coords:
-                st.session_state.ultimo_clique = clicked_coords
-                
-                # Encontrar município clicado
-                ponto_clicado = Point(lng, lat)
-                coluna_nome = 'mun_nome' if 'mun_nome' in gdf_filtrado.columns else 'NM_MUN'
-                
-                for idx, row in gdf_filtrado.iterrows():
-                    if row['geometry'].contains(ponto_clicado):
-                        municipio_clicado = row[coluna_nome]
-                        
-                        # Adicionar ao filtro se não estiver
-                        if municipio_clicado not in st.session_state.municipios_selecionados:
-                            st.session_state.municipios_selecionados.append(municipio_clicado)
-                            st.rerun()
-                        break
+            # Adicionar ao filtro se ainda não estiver
+            if nome not in st.session_state.municipios_selecionados:
+                st.session_state.municipios_selecionados.append(nome)
+                st.rerun()
+        
+        if expandidos:
+            if st.button("↩️ Voltar à visão agregada", key="mapa_recolher"):
+                st.session_state.mapa_expandidos = (chave_selecao, ())
+                st.rerun()
         
         st.markdown("---")
         
+        memoria.marcar("metricas_e_graficos")
+        
         # Estatísticas - mostrar dados agregados ou de município específico se houver apenas 1 no filtro
         if len(gdf_filtrado) == 1:
             # Um único município selecionado - mostrar dados específicos
@@ -318,60 +744,10 @@ predominante no município (aberta, intermediária e fechada) e nota específica
             # Múltiplos municípios - mostrar dados agregados
             st.markdown("<h3 style='text-align: center;'>Informações Adicionais</h3>", unsafe_allow_html=True)
         
-        if len(gdf_filtrado) == 1:
-            # Um município: mostra 4 cards
-            col1, col2, col3, col4 = st.columns(4)
-            municipio_especifico = gdf_filtrado.iloc[0]
-            
-            if 'area_municip' in gdf_filtrado.columns:
-                area_fmt = f"{municipio_especifico['area_municip']:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-                col1.metric("Área total do Município (ha)", area_fmt)
-            
-            if 'area_car_total' in gdf_filtrado.columns:
-                area_car_fmt = f"{municipio_especifico['area_car_total']:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-                col2.metric("Área CAR Total (ha)", area_car_fmt)
-            
-            if 'area_car_media' in gdf_filtrado.columns:
-                tamanho_fmt = f"{municipio_especifico['area_car_media']:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-                col3.metric("Tamanho Médio Imóvel CAR (ha)", tamanho_fmt)
-            
-            # Valor médio por hectare
-            if 'valor_mun_area' in gdf_filtrado.columns and 'area_georef' in gdf_filtrado.columns:
-                if municipio_especifico['area_georef'] > 0:
-                    valor_ha = municipio_especifico['valor_mun_area'] / municipio_especifico['area_georef']
-                    valor_fmt = f"R$ {valor_ha:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-                    col4.metric("Valor Médio/ha", valor_fmt)
-        else:
-            # Múltiplos municípios: 5 colunas
-            col1, col2, col3, col4, col5 = st.columns(5)
-            
-            if 'area_municip' in gdf_filtrado.columns:
-                area_total = gdf_filtrado['area_municip'].sum()
-                area_fmt = f"{area_total:,.0f}".replace(",", "X").replace(".", ",").replace("X", ".")
-                col1.metric("Área Total (ha)", area_fmt)
-            
-            if 'area_car_media' in gdf_filtrado.columns:
-                tamanho_medio = gdf_filtrado['area_car_media'].mean()
-                tamanho_fmt = f"{tamanho_medio:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-                col2.metric("Tamanho Médio Imóvel CAR (ha)", tamanho_fmt)
-            
-            # Valor médio por hectare
-            if 'valor_mun_area' in gdf_filtrado.columns and 'area_georef' in gdf_filtrado.columns:
-                gdf_temp = gdf_filtrado[gdf_filtrado['area_georef'] > 0].copy()
-                if len(gdf_temp) > 0:
-                    gdf_temp['valor_por_ha'] = gdf_temp['valor_mun_area'] / gdf_temp['area_georef']
-                    
-                    valor_medio_ha = gdf_temp['valor_por_ha'].mean()
-                    valor_medio_fmt = f"R$ {valor_medio_ha:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-                    col3.metric("Valor Médio/ha", valor_medio_fmt)
-                    
-                    valor_min = gdf_temp['valor_por_ha'].min()
-                    valor_min_fmt = f"R$ {valor_min:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-                    col4.metric("Valor Mínimo/ha", valor_min_fmt)
-                    
-                    valor_max = gdf_temp['valor_por_ha'].max()
-                    valor_max_fmt = f"R$ {valor_max:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-                    col5.metric("Valor Máximo/ha", valor_max_fmt)
+        # Um município: 4 cards; vários municípios: 5 colunas
+        colunas_metricas = st.columns(4 if len(gdf_filtrado) == 1 else 5)
+        for posicao, rotulo, valor in construcoes.obter("metricas"):
+            colunas_metricas[posicao].metric(rotulo, valor)
         
         st.markdown("---")
         
@@ -380,182 +756,11 @@ predominante no município (aberta, intermediária e fechada) e nota específica
         
         with col_grafico1:
             st.markdown("<h4 style='text-align: center;'>Grau de Dificuldade por Trimestre</h4>", unsafe_allow_html=True)
-            # Se houver município único, mostrar dados dele; senão, médias gerais
-            if len(gdf_filtrado) == 1:
-                import plotly.graph_objects as go
-                municipio_especifico = gdf_filtrado.iloc[0]
-                
-                trimestres = ['Trimestre 1', 'Trimestre 2', 'Trimestre 3', 'Trimestre 4']
-                valores = [
-                    municipio_especifico.get('nota_total_q1', 0),
-                    municipio_especifico.get('nota_total_q2', 0),
-                    municipio_especifico.get('nota_total_q3', 0),
-                    municipio_especifico.get('nota_total_q4', 0)
-                ]
-                
-                fig_barras = go.Figure(data=[
-                    go.Bar(
-                        x=trimestres, 
-                        y=valores,
-                        marker_color=['#6C9BCF', '#8BB8E8', '#A9CCE3', '#C5DEDD'],
-                        text=[f'{v:.2f}' for v in valores],
-                        textposition='outside',
-                    )
-                ])
-                
-                fig_barras.update_layout(
-                    yaxis=dict(
-                        title='',
-                        showticklabels=False,
-                        showgrid=False,
-                        zeroline=False,
-                        range=[0, max(valores) * 1.15]
-                    ),
-                    xaxis=dict(
-                        title='',
-                        showgrid=False
-                    ),
-                    height=350,
-                    showlegend=False,
-                    margin=dict(l=40, r=40, t=50, b=40)
-                )
-                
-                st.plotly_chart(fig_barras, use_container_width=True)
-            else:
-                # Mostrar médias gerais
-                import plotly.graph_objects as go
-                
-                trimestres = ['Trimestre 1', 'Trimestre 2', 'Trimestre 3', 'Trimestre 4']
-                valores = [
-                    gdf_filtrado['nota_total_q1'].mean() if 'nota_total_q1' in gdf_filtrado.columns else 0,
-                    gdf_filtrado['nota_total_q2'].mean() if 'nota_total_q2' in gdf_filtrado.columns else 0,
-                    gdf_filtrado['nota_total_q3'].mean() if 'nota_total_q3' in gdf_filtrado.columns else 0,
-                    gdf_filtrado['nota_total_q4'].mean() if 'nota_total_q4' in gdf_filtrado.columns else 0
-                ]
-                
-                fig_barras = go.Figure(data=[
-                    go.Bar(
-                        x=trimestres, 
-                        y=valores,
-                        marker_color=['#6C9BCF', '#8BB8E8', '#A9CCE3', '#C5DEDD'],
-                        text=[f'{v:.2f}' for v in valores],
-                        textposition='outside',
-                    )
-                ])
-                
-                fig_barras.update_layout(
-                    yaxis=dict(
-                        title='',
-                        showticklabels=False,
-                        showgrid=False,
-                        zeroline=False,
-                        range=[0, max(valores) * 1.15]
-                    ),
-                    xaxis=dict(
-                        title='',
-                        showgrid=False
-                    ),
-                    height=350,
-                    showlegend=False,
-                    margin=dict(l=40, r=40, t=50, b=40)
-                )
-                
-                st.plotly_chart(fig_barras, use_container_width=True)
+            st.plotly_chart(construcoes.obter("grafico_trimestral"), use_container_width=True)
         
         with col_grafico2:
             st.markdown("<h4 style='text-align: center;'>Percentual de Área Georreferenciável</h4>", unsafe_allow_html=True)
-            
-            # Calcular percentagem de área georreferenciável da coluna percent_area_georef
-            if len(gdf_filtrado) == 1:
-                # Para município individual - usar a coluna percent_area_georef
-                municipio_especifico = gdf_filtrado.iloc[0]
-                if 'percent_area_georef' in municipio_especifico:
-                    percentual = float(municipio_especifico['percent_area_georef'])
-                else:
-                    percentual = 0.0
-            else:
-                # Para agregado - média dos percentuais
-                if 'percent_area_georef' in gdf_filtrado.columns:
-                    percentual = float(gdf_filtrado['percent_area_georef'].mean())
-                else:
-                    percentual = 0.0
-            
-            import plotly.graph_objects as go
-            
-            fig_gauge = go.Figure(go.Indicator(
-                mode="gauge+number",
-                value=percentual,
-                domain={'x': [0, 1], 'y': [0, 1]},
-                number={'suffix': "%", 'font': {'size': 40}},
-                gauge={
-                    'axis': {
-                        'range': [0, 100], 
-                        'tickwidth': 1, 
-                        'tickcolor': "darkblue",
-                        'tickmode': 'array',
-                        'tickvals': [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100],
-                        'ticktext': ['0%', '10%', '20%', '30%', '40%', '50%', '60%', '70%', '80%', '90%', '100%']
-                    },
-                    'bar': {'color': "rgba(0,0,0,0)"},  # Barra invisível
-                    'bgcolor': "white",
-                    'borderwidth': 2,
-                    'bordercolor': "gray",
-                    'steps': [
-                        {'range': [0, 2.5], 'color': '#27ae60'},
-                        {'range': [2.5, 5], 'color': '#29b15e'},
-                        {'range': [5, 7.5], 'color': '#2cb55d'},
-                        {'range': [7.5, 10], 'color': '#2eb85b'},
-                        {'range': [10, 12.5], 'color': '#31bc5a'},
-                        {'range': [12.5, 15], 'color': '#36bf5c'},
-                        {'range': [15, 17.5], 'color': '#3dc261'},
-                        {'range': [17.5, 20], 'color': '#44c565'},
-                        {'range': [20, 22.5], 'color': '#4ec96a'},
-                        {'range': [22.5, 25], 'color': '#56cc6e'},
-                        {'range': [25, 27.5], 'color': '#5fcf73'},
-                        {'range': [27.5, 30], 'color': '#67d277'},
-                        {'range': [30, 32.5], 'color': '#70d57c'},
-                        {'range': [32.5, 35], 'color': '#78d880'},
-                        {'range': [35, 37.5], 'color': '#81db85'},
-                        {'range': [37.5, 40], 'color': '#89de89'},
-                        {'range': [40, 42.5], 'color': '#92e08e'},
-                        {'range': [42.5, 45], 'color': '#9ae292'},
-                        {'range': [45, 47.5], 'color': '#a3e597'},
-                        {'range': [47.5, 50], 'color': '#abe79b'},
-                        {'range': [50, 52.5], 'color': '#b4e9a0'},
-                        {'range': [52.5, 55], 'color': '#bceba4'},
-                        {'range': [55, 57.5], 'color': '#c5eda9'},
-                        {'range': [57.5, 60], 'color': '#cdefad'},
-                        {'range': [60, 62.5], 'color': '#d6f0b2'},
-                        {'range': [62.5, 65], 'color': '#def2b6'},
-                        {'range': [65, 67.5], 'color': '#e7f3bb'},
-                        {'range': [67.5, 70], 'color': '#eff4bf'},
-                        {'range': [70, 72.5], 'color': '#f8f5c4'},
-                        {'range': [72.5, 75], 'color': '#f9f2b8'},
-                        {'range': [75, 77.5], 'color': '#fae9a0'},
-                        {'range': [77.5, 80], 'color': '#f9e18e'},
-                        {'range': [80, 82.5], 'color': '#f7d87c'},
-                        {'range': [82.5, 85], 'color': '#f6d06a'},
-                        {'range': [85, 87.5], 'color': '#f4c258'},
-                        {'range': [87.5, 90], 'color': '#f2b446'},
-                        {'range': [90, 92.5], 'color': '#f0a634'},
-                        {'range': [92.5, 95], 'color': '#ec8e2c'},
-                        {'range': [95, 97.5], 'color': '#e96a30'},
-                        {'range': [97.5, 100], 'color': '#e74c3c'}
-                    ],
-                    'threshold': {
-                        'line': {'color': "darkblue", 'width': 4},
-                        'thickness': 0.75,
-                        'value': percentual
-                    }
-                }
-            ))
-            
-            fig_gauge.update_layout(
-                height=300,
-                margin=dict(l=20, r=20, t=40, b=20)
-            )
-            
-            st.plotly_chart(fig_gauge, use_container_width=True)
+            st.plotly_chart(construcoes.obter("gauge"), use_container_width=True)
         
         st.markdown("---")
 
@@ -603,14 +808,7 @@ predominante no município (aberta, intermediária e fechada) e nota específica
                     """, unsafe_allow_html=True)
         
         # Calcular valores totais por trimestre
-        total_q1 = sum(calcular_valor_por_nota(row['nota_total_q1'], row['area_georef']) 
-                       for _, row in gdf_filtrado.iterrows())
-        total_q2 = sum(calcular_valor_por_nota(row['nota_total_q2'], row['area_georef'])
-                       for _, row in gdf_filtrado.iterrows())
-        total_q3 = sum(calcular_valor_por_nota(row['nota_total_q3'], row['area_georef'])
-                       for _, row in gdf_filtrado.iterrows())
-        total_q4 = sum(calcular_valor_por_nota(row['nota_total_q4'], row['area_georef'])
-                       for _, row in gdf_filtrado.iterrows())
+        total_q1, total_q2, total_q3, total_q4 = construcoes.obter("totais_trimestrais")
         
         # Exibir cards
         col1, col2, col3, col4 = st.columns(4)
@@ -640,116 +838,9 @@ predominante no município (aberta, intermediária e fechada) e nota específica
         # --- Gráfico: Composição média das notas por UF (versão final) ---
         st.markdown("<h3 style='text-align: center;'>Composição Média dos Graus de Dificuldade por UF</h3>", unsafe_allow_html=True)
 
-        # Selecionar colunas principais de notas
-        colunas_notas = ["nota_veg", "nota_area", "nota_relevo", "nota_insalub_media",
-                        "nota_p_q1", "nota_p_q2", "nota_p_q3", "nota_p_q4"]
-        colunas_presentes = [c for c in colunas_notas if c in gdf_filtrado.columns]
-
-        if len(colunas_presentes) >= 3:
-            # Filtrar apenas por UF (ignorando filtro de município para este gráfico)
-            gdf_por_uf = gdf[gdf["SIGLA_UF"].isin(uf_sel)]
-            
-            # Calcular média das notas por UF
-            df_uf = (
-                gdf_por_uf.groupby("SIGLA_UF")[colunas_presentes]
-                .mean()
-                .reset_index()
-            )
-            
-            # Calcular total para ordenar por complexidade/custo
-            df_uf['total_notas'] = df_uf[colunas_presentes].sum(axis=1)
-            df_uf = df_uf.sort_values("total_notas", ascending=False)
-
-            # Dicionário de legendas amigáveis (ordem invertida para legenda)
-            legendas = {
-                "nota_p_q1": "Clima T1",
-                "nota_p_q2": "Clima T2",
-                "nota_p_q3": "Clima T3",
-                "nota_p_q4": "Clima T4",
-                "nota_insalub_media": "Insalubridade",
-                "nota_relevo": "Relevo",
-                "nota_area": "Área",
-                "nota_veg": "Vegetação",
-            }
-
-            # Paleta suave consistente com o restante do app
-            cores = {
-                "nota_p_q1": "#6C9BCF",
-                "nota_p_q2": "#8BB8E8", 
-                "nota_p_q3": "#A9CCE3",
-                "nota_p_q4": "#C5DEDD",
-                "nota_insalub_media": "#9AD0EC",
-                "nota_relevo": "#C9E4F3",
-                "nota_area": "#A3C4BC",
-                "nota_veg": "#F2E8CF"
-            }
-
-            # Criar figura de barras empilhadas
-            fig_empilhado = go.Figure()
-
-            # Adicionar traços na ordem da legenda (invertida)
-            ordem_legenda = ["nota_p_q1", "nota_p_q2", "nota_p_q3", "nota_p_q4",
-                            "nota_insalub_media", "nota_relevo", "nota_area", "nota_veg"]
-            
-            # Filtrar apenas colunas presentes
-            ordem_legenda = [col for col in ordem_legenda if col in colunas_presentes]
-            
-            for coluna in ordem_legenda:
-                valores = df_uf[coluna].values
-                
-                fig_empilhado.add_trace(go.Bar(
-                    x=df_uf["SIGLA_UF"],
-                    y=valores,
-                    name=legendas.get(coluna, coluna),
-                    marker_color=cores.get(coluna, "#CCCCCC"),
-                    text="",  # Sem texto nas barras
-                    hovertemplate=legendas.get(coluna, coluna) + ": %{y:.2f}<extra></extra>"
-                ))
-
-            fig_empilhado.update_layout(
-                barmode="stack",
-                xaxis=dict(
-                    title="", 
-                    showgrid=False,
-                    tickfont=dict(size=12)
-                ),
-                yaxis=dict(
-                    title="", 
-                    showticklabels=False,  # Remove valores do eixo Y
-                    showgrid=False,
-                    zeroline=False
-                ),
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.02,
-                    xanchor="center",
-                    x=0.5,
-                    font=dict(size=11),
-                    traceorder="normal"
-                ),
-                margin=dict(l=20, r=20, t=60, b=40),
-                height=600,
-                showlegend=True,
-                plot_bgcolor="white",
-                paper_bgcolor="white",
-                hovermode="x unified"
-            )
-            
-            # Customizar o hover
-            fig_empilhado.update_layout(
-                hoverlabel=dict(
-                    bgcolor="white",
-                    font_size=12,
-                    font_family="Arial"
-                )
-            )
-            
-            # Remover linha tracejada vertical do hover
-            fig_empilhado.update_xaxes(showspikes=False)
-            fig_empilhado.update_yaxes(showspikes=False)
-
-            st.plotly_chart(fig_empilhado, use_container_width=True)
+        composicao_uf = construcoes.obter("composicao_uf")
+        if composicao_uf is not None:
+            st.plotly_chart(composicao_uf, use_container_width=True)
             
             # Texto explicativo abaixo do gráfico
             st.caption("* Estados ordenados por pontuação total. Passe o mouse sobre as barras para ver valores detalhados.")
@@ -759,11 +850,44 @@ predominante no município (aberta, intermediária e fechada) e nota específica
         st.markdown("---")
         
         # Tabela de Municípios
+        memoria.marcar("tabela")
         st.markdown("<h3 style='text-align: center;'>Tabela de Municípios</h3>", unsafe_allow_html=True)
-        colunas_excluir = ["geometry"]
-        if "fid" in gdf_filtrado.columns:
-            colunas_excluir.append("fid")
-        st.dataframe(gdf_filtrado.drop(columns=colunas_excluir), use_container_width=True)
+        st.dataframe(construcoes.obter("tabela"), use_container_width=True)
+        
+        # Exportação da seleção filtrada (arquivo gerado em lotes, só ao clicar)
+        memoria.marcar("exportacao_e_versoes")
+        col_formato, col_exportar = st.columns([1, 4])
+        with col_formato:
+            formato = st.selectbox(
+                "Formato",
+                options=list(FORMATOS),
+                format_func=str.upper,
+                key="formato_exportacao",
+                label_visibility="collapsed"
+            )
+        
+        with col_exportar:
+            nome_arquivo = f"precificacao_municipios{FORMATOS[formato][0]}"
+            if st.button("📦 Gerar arquivo da seleção"):
+                with st.spinner("Gerando arquivo..."):
+                    caminho = exportar_selecao(gdf_filtrado, formato, versao, chave_selecao)
+                st.session_state.exportacao = ((chave_selecao, formato), caminho)
+            exportacao = st.session_state.get("exportacao")
+            if exportacao and exportacao[0] == (chave_selecao, formato) and os.path.exists(exportacao[1]):
+                link_download(exportacao[1], nome_arquivo, "⬇️ Baixar seleção")
+        
+        # Deltas entre snapshots registrados do dataset (se houver ao menos dois)
+        mostrar_variacao_versoes(gdf_filtrado)
+        
+        # Etapas em log (JSON) e relatório periódico de objetos retidos
+        relatorio_memoria = memoria.finalizar(st.session_state)
+        colunas = None
+        if geometrias is not None:
+            colunas = reutilizar_entre_sessoes(
+                ("colunas", versao, ufs_carregar), lambda: relatorio_colunas(gdf, geometrias)
+            )
+        if relatorio_memoria is not None or memoria.etapas or colunas is not None:
+            mostrar_diagnostico_memoria(memoria, relatorio_memoria, colunas)
 
 
 if __name__ == "__main__":
@@ -1,10 +1,31 @@
 """Componentes de visualização - mapas e gráficos."""
 
 import folium
+import geopandas as gpd
+import numpy as np
 from folium.plugins import Fullscreen
 from streamlit_folium import st_folium
 import plotly.express as px
+import plotly.graph_objects as go
 from branca.element import Template, MacroElement
+from mda_app.core.dissolucoes import identificar_poligonos
+from mda_app.core.trimestres import CRITERIOS_TRIMESTRAIS, TRIMESTRES, tensor_trimestral
+from mda_app.utils.cache import cache_figura
+
+# Estilo do tooltip com o nome do município
+ESTILO_TOOLTIP = """
+    background-color: rgba(255, 255, 255, 0.95);
+    border: 2px solid #0066cc;
+    border-radius: 6px;
+    padding: 8px 12px;
+    font-size: 13px;
+    font-weight: 500;
+    color: #333;
+    box-shadow: 0 3px 6px rgba(0,0,0,0.3);
+"""
+
+# Cor de municípios sem valor
+COR_SEM_DADOS = "#cccccc"
 
 
 def get_color(value, min_val, max_val, global_min=6, global_max=60):
@@ -42,6 +63,99 @@ def get_color(value, min_val, max_val, global_min=6, global_max=60):
     return f'#{r:02x}{g:02x}{b:02x}'
 
 
+def gerar_cores(valores, global_min=6, global_max=60):
+    """Versão vetorizada de `get_color` para um array de valores (NaN fica cinza)."""
+    valores = np.asarray(valores, dtype=float)
+    norm = np.clip((valores - global_min) / (global_max - global_min), 0, 1)
+    sem_dados = np.isnan(norm)
+    norm = np.where(sem_dados, 0.0, norm)
+    
+    # Mesmo gradiente de `get_color`: verde escuro → amarelo (até 40%) → vermelho
+    ate_amarelo = norm <= 0.40
+    factor = np.where(ate_amarelo, norm / 0.40, (norm - 0.40) / 0.60)
+    r = np.where(ate_amarelo, 42 + (255 - 42) * factor, 255).astype(int)
+    g = np.where(ate_amarelo, 145 + (225 - 145) * factor, 225 * (1 - factor)).astype(int)
+    b = np.where(ate_amarelo, 4 * (1 - factor), 0).astype(int)
+    return [
+        COR_SEM_DADOS if vazio else f'#{vr:02x}{vg:02x}{vb:02x}'
+        for vr, vg, vb, vazio in zip(r, g, b, sem_dados)
+    ]
+
+
+class SeletorTemaMapa(MacroElement):
+    """Seletor no próprio mapa que recolore uma camada GeoJson no navegador.
+
+    Cada feição traz a cor de cada tema na propriedade `cor_<tema>`; trocar o
+    tema só altera o preenchimento dos polígonos e a legenda, sem rerun no
+    servidor.
+    """
+
+    _template = Template("""
+        {% macro script(this, kwargs) %}
+        (function() {
+            var camada = {{ this.camada.get_name() }};
+            var temas = {{ this.temas|tojson }};
+            
+            function definirTexto(id, texto) {
+                var elemento = document.getElementById(id);
+                if (elemento) {
+                    elemento.textContent = texto;
+                }
+            }
+            
+            function aplicar(indice) {
+                var tema = temas[indice];
+                camada.options.style = function(feature) {
+                    return {
+                        fillColor: feature.properties["cor_" + tema.tema],
+                        color: "black",
+                        weight: 1,
+                        fillOpacity: 0.7
+                    };
+                };
+                camada.setStyle(camada.options.style);
+                definirTexto({{ (this.id_legenda ~ "-titulo")|tojson }}, tema.rotulo);
+                definirTexto({{ (this.id_legenda ~ "-minimo")|tojson }}, tema.minimo);
+                definirTexto({{ (this.id_legenda ~ "-maximo")|tojson }}, tema.maximo);
+            }
+            
+            var controle = L.control({position: "topright"});
+            controle.onAdd = function() {
+                var div = L.DomUtil.create("div", "leaflet-bar");
+                div.style.background = "white";
+                div.style.padding = "4px 6px";
+                var seletor = L.DomUtil.create("select", "", div);
+                temas.forEach(function(tema, indice) {
+                    var opcao = document.createElement("option");
+                    opcao.value = indice;
+                    opcao.textContent = tema.rotulo;
+                    seletor.appendChild(opcao);
+                });
+                L.DomEvent.disableClickPropagation(div);
+                L.DomEvent.on(seletor, "change", function() { aplicar(Number(seletor.value)); });
+                return div;
+            };
+            controle.addTo({{ this._parent.get_name() }});
+            aplicar(0);
+        })();
+        {% endmacro %}
+    """)
+
+    def __init__(self, camada, temas, id_legenda):
+        """
+        Args:
+            camada: folium.GeoJson recolorido
+            temas: Lista de dicionários com `tema`, `rotulo`, `minimo` e
+                `maximo` (textos da legenda); o primeiro é o tema inicial
+            id_legenda: Prefixo dos ids do título e dos limites da legenda
+        """
+        super().__init__()
+        self._name = "SeletorTemaMapa"
+        self.camada = camada
+        self.temas = temas
+        self.id_legenda = id_legenda
+
+
 def criar_mapa(gdf_filtrado, criterio_sel, mostrar_controle_camadas=True, padding_zoom=30):
     """Criar mapa folium com dados filtrados.
     
@@ -79,142 +193,58 @@ def criar_mapa(gdf_filtrado, criterio_sel, mostrar_controle_camadas=True, paddin
         show=False
     ).add_to(m)
     
-    # Criar duas camadas overlay (mas com comportamento mutuamente exclusivo): uma para cada tipo de visualização
-    # Camada 1: Grau de Dificuldade
-    layer_grau_dificuldade = folium.FeatureGroup(name='Grau de Dificuldade', show=True, control=True, overlay=True)
+    # Polígonos em um único GeoJson: cada feição leva o nome e a cor de cada
+    # tema (grau de dificuldade médio, por trimestre e % de área
+    # georreferenciável); o seletor do mapa troca o tema no navegador
+    camada_municipios = folium.FeatureGroup(name='Municípios', show=True, control=True, overlay=True)
     
-    # Adicionar polígonos para Grau de Dificuldade
-    coluna_dados = criterio_sel
     global_min = 0
     global_max = 60
-    min_val = gdf_filtrado[coluna_dados].min()
-    max_val = gdf_filtrado[coluna_dados].max()
+    # O tooltip (único por polígono) é o que o clique no mapa devolve ao app
+    propriedades = {
+        "nome": identificar_poligonos(gdf_filtrado)["rotulo"].to_numpy(),
+        "cor_media": gerar_cores(gdf_filtrado[criterio_sel], global_min, global_max),
+    }
+    temas = [{"tema": "media", "rotulo": "Grau de Dificuldade", "minimo": "6.00", "maximo": "60.00"}]
     
-    for idx, row in gdf_filtrado.iterrows():
-        color = get_color(row[coluna_dados], min_val, max_val, global_min, global_max)
-        
-        # Usar mun_nome se disponível, senão NM_MUN
-        nome_municipio = row.get('mun_nome', row['NM_MUN'])
-        
-        # Criar tooltip simples com o nome do município
-        tooltip = folium.Tooltip(
-            nome_municipio,
-            sticky=False,
-            style="""
-                background-color: rgba(255, 255, 255, 0.95);
-                border: 2px solid #0066cc;
-                border-radius: 6px;
-                padding: 8px 12px;
-                font-size: 13px;
-                font-weight: 500;
-                color: #333;
-                box-shadow: 0 3px 6px rgba(0,0,0,0.3);
-            """
-        )
-        
-        # Adicionar GeoJson apenas com tooltip, sem popup
-        folium.GeoJson(
-            row['geometry'],
-            style_function=lambda feature, color=color: {
-                'fillColor': color,
-                'color': 'black',
-                'weight': 1,
-                'fillOpacity': 0.7,
-            },
-            highlight_function=lambda x: {
-                'weight': 3,
-                'color': '#0066cc',
-                'fillOpacity': 0.9
-            },
-            tooltip=tooltip
-        ).add_to(layer_grau_dificuldade)
-    
-    # Adicionar a camada de Grau de Dificuldade ao mapa
-    layer_grau_dificuldade.add_to(m)
-    
-    # Camada 2: % Área Georreferenciável
-    layer_area_georef = folium.FeatureGroup(name='% Área Georreferenciável', show=False, control=True, overlay=True)
+    indice_total = list(CRITERIOS_TRIMESTRAIS).index("nota_total")
+    notas_trimestrais = tensor_trimestral(gdf_filtrado)[:, :, indice_total]
+    for j, q in enumerate(TRIMESTRES):
+        if not np.isnan(notas_trimestrais[:, j]).all():
+            propriedades[f"cor_q{q}"] = gerar_cores(notas_trimestrais[:, j], global_min, global_max)
+            temas.append({"tema": f"q{q}", "rotulo": f"Grau de Dificuldade - {q}º Trimestre",
+                          "minimo": "6.00", "maximo": "60.00"})
     
-    # Adicionar polígonos para % Área Georreferenciável
-    coluna_dados_georef = "percent_area_georef"
-    global_min_georef = 0
-    global_max_georef = 100
-    min_val_georef = gdf_filtrado[coluna_dados_georef].min()
-    max_val_georef = gdf_filtrado[coluna_dados_georef].max()
-    
-    for idx, row in gdf_filtrado.iterrows():
-        color_georef = get_color(row[coluna_dados_georef], min_val_georef, max_val_georef, global_min_georef, global_max_georef)
-        
-        # Usar mun_nome se disponível, senão NM_MUN
-        nome_municipio_georef = row.get('mun_nome', row['NM_MUN'])
-        
-        # Criar tooltip simples com o nome do município
-        tooltip_georef = folium.Tooltip(
-            nome_municipio_georef,
-            sticky=False,
-            style="""
-                background-color: rgba(255, 255, 255, 0.95);
-                border: 2px solid #0066cc;
-                border-radius: 6px;
-                padding: 8px 12px;
-                font-size: 13px;
-                font-weight: 500;
-                color: #333;
-                box-shadow: 0 3px 6px rgba(0,0,0,0.3);
-            """
-        )
-        
-        # Adicionar GeoJson apenas com tooltip, sem popup
-        folium.GeoJson(
-            row['geometry'],
-            style_function=lambda feature, color=color_georef: {
-                'fillColor': color,
-                'color': 'black',
-                'weight': 1,
-                'fillOpacity': 0.7,
-            },
-            highlight_function=lambda x: {
-                'weight': 3,
-                'color': '#0066cc',
-                'fillOpacity': 0.9
-            },
-            tooltip=tooltip_georef
-        ).add_to(layer_area_georef)
+    if "percent_area_georef" in gdf_filtrado.columns:
+        propriedades["cor_georef"] = gerar_cores(gdf_filtrado["percent_area_georef"], 0, 100)
+        temas.append({"tema": "georef", "rotulo": "% Área Georreferenciável", "minimo": "0.00", "maximo": "100.00"})
     
-    # Adicionar a camada de % Área Georreferenciável ao mapa
-    layer_area_georef.add_to(m)
+    camada_geojson = folium.GeoJson(
+        gpd.GeoDataFrame(propriedades, geometry=gdf_filtrado.geometry.to_numpy(), crs=gdf_filtrado.crs),
+        style_function=lambda feature: {
+            'color': 'black',
+            'weight': 1,
+            'fillOpacity': 0.7,
+        },
+        highlight_function=lambda x: {
+            'weight': 3,
+            'color': '#0066cc',
+            'fillOpacity': 0.9
+        },
+        tooltip=folium.GeoJsonTooltip(fields=["nome"], labels=False, sticky=False, style=ESTILO_TOOLTIP)
+    ).add_to(camada_municipios)
+    camada_municipios.add_to(m)
     
     # Ajustar zoom automaticamente para os limites dos dados filtrados
     bounds = gdf_filtrado.total_bounds  # [minx, miny, maxx, maxy]
     m.fit_bounds([[bounds[1], bounds[0]], [bounds[3], bounds[2]]], padding=[padding_zoom, padding_zoom])
     
-    # Gerar cores de exemplo para verificar o gradiente correto
-    num_steps = 100
-    gradient_colors = []
-    for i in range(num_steps):
-        norm = i / (num_steps - 1)
-        
-        # Novo gradiente: Verde escuro (#2a9104) → Amarelo (#ffe100) → Vermelho (#ff0000)
-        if norm <= 0.40:
-            # Verde escuro para Amarelo (0-40%)
-            factor = norm / 0.40
-            r = int(42 + (255 - 42) * factor)
-            g = int(145 + (225 - 145) * factor)
-            b = int(4 * (1 - factor))
-        else:
-            # Amarelo para Vermelho (40-100%)
-            factor = (norm - 0.40) / 0.60
-            r = 255
-            g = int(225 * (1 - factor))
-            b = 0
-        
-        gradient_colors.append(f'#{r:02x}{g:02x}{b:02x}')
+    # Gradiente da legenda, com as mesmas cores dos polígonos
+    gradient_str = ', '.join(gerar_cores(np.linspace(0, 1, 100), 0, 1))
     
-    gradient_str = ', '.join(gradient_colors)
-    
-    # Criar duas legendas: uma para cada camada
-    legend_grau_html = f'''
-    <div id="legend-grau" style="position: fixed; 
+    # Uma legenda; título e limites acompanham o tema escolhido
+    legend_html = f'''
+    <div id="legend-tema" style="position: fixed; 
                 bottom: 50px; 
                 left: 50px; 
                 width: 200px; 
@@ -224,122 +254,23 @@ def criar_mapa(gdf_filtrado, criterio_sel, mostrar_controle_camadas=True, paddin
                 z-index: 9999; 
                 font-size: 14px;
                 padding: 10px;
-                box-shadow: 0 2px 6px rgba(0,0,0,0.3);
-                display: block;">
-        <p style="margin: 0 0 10px 0; font-weight: bold; text-align: center; font-size: 12px;">Grau de Dificuldade</p>
+                box-shadow: 0 2px 6px rgba(0,0,0,0.3);">
+        <p id="legend-tema-titulo" style="margin: 0 0 10px 0; font-weight: bold; text-align: center; font-size: 12px;">{temas[0]["rotulo"]}</p>
         <div style="background: linear-gradient(to right, {gradient_str}); 
                     height: 20px; 
                     border: 1px solid #333;
                     border-radius: 3px;"></div>
         <div style="display: flex; justify-content: space-between; margin-top: 5px; font-size: 11px;">
-            <span>6.00</span>
-            <span>60.00</span>
+            <span id="legend-tema-minimo">{temas[0]["minimo"]}</span>
+            <span id="legend-tema-maximo">{temas[0]["maximo"]}</span>
         </div>
     </div>
     '''
+    m.get_root().html.add_child(folium.Element(legend_html))
     
-    legend_georef_html = f'''
-    <div id="legend-georef" style="position: fixed; 
-                bottom: 50px; 
-                left: 50px; 
-                width: 200px; 
-                background-color: white; 
-                border: 2px solid grey; 
-                border-radius: 5px;
-                z-index: 9999; 
-                font-size: 14px;
-                padding: 10px;
-                box-shadow: 0 2px 6px rgba(0,0,0,0.3);
-                display: none;">
-        <p style="margin: 0 0 10px 0; font-weight: bold; text-align: center; font-size: 12px;">% Área Georreferenciável</p>
-        <div style="background: linear-gradient(to right, {gradient_str}); 
-                    height: 20px; 
-                    border: 1px solid #333;
-                    border-radius: 3px;"></div>
-        <div style="display: flex; justify-content: space-between; margin-top: 5px; font-size: 11px;">
-            <span>0.00</span>
-            <span>100.00</span>
-        </div>
-    </div>
-    '''
-    
-    # Script JavaScript para alternar legendas conforme camadas ativas
-    legend_toggle_script = '''
-    <script>
-    (function() {
-        var grauInput = null;
-        var georefInput = null;
-        var isSetup = false;
-        
-        function updateLegends() {
-            var legendGrau = document.getElementById('legend-grau');
-            var legendGeoref = document.getElementById('legend-georef');
-            
-            if (legendGrau && grauInput) {
-                legendGrau.style.display = grauInput.checked ? 'block' : 'none';
-            }
-            if (legendGeoref && georefInput) {
-                legendGeoref.style.display = georefInput.checked ? 'block' : 'none';
-            }
-        }
-        
-        function setupLegends() {
-            if (isSetup) return;
-            
-            // Buscar todos os inputs no controle de layers
-            var allInputs = document.querySelectorAll('.leaflet-control-layers-overlays label');
-            
-            allInputs.forEach(function(label) {
-                var span = label.querySelector('span');
-                if (span) {
-                    var text = span.textContent.trim();
-                    var input = label.querySelector('input');
-                    
-                    if (text === 'Grau de Dificuldade') {
-                        grauInput = input;
-                    } else if (text === '% Área Georreferenciável') {
-                        georefInput = input;
-                    }
-                }
-            });
-            
-            if (!grauInput || !georefInput) return;
-            
-            // Adicionar listeners para atualizar legendas
-            grauInput.addEventListener('change', function() {
-                updateLegends();
-            });
-            
-            georefInput.addEventListener('change', function() {
-                updateLegends();
-            });
-            
-            isSetup = true;
-            updateLegends();
-        }
-        
-        // Usar MutationObserver para detectar quando o controle é adicionado
-        var observer = new MutationObserver(function(mutations) {
-            setupLegends();
-        });
-        
-        // Observar mudanças no body
-        observer.observe(document.body, {
-            childList: true,
-            subtree: true
-        });
-        
-        // Tentar setup imediatamente também
-        setTimeout(setupLegends, 500);
-        setTimeout(setupLegends, 1000);
-        setTimeout(setupLegends, 2000);
-    })();
-    </script>
-    '''
-    
-    m.get_root().html.add_child(folium.Element(legend_grau_html))
-    m.get_root().html.add_child(folium.Element(legend_georef_html))
-    m.get_root().html.add_child(folium.Element(legend_toggle_script))
+    # Seletor de tema (trimestres e % de área georreferenciável)
+    if len(temas) > 1:
+        SeletorTemaMapa(camada_geojson, temas, id_legenda="legend-tema").add_to(m)
     
     # Adicionar controle de camadas (opcional)
     if mostrar_controle_camadas:
@@ -367,4 +298,223 @@ def criar_scatter_plot(gdf_filtrado, x_col, y_col, titulo):
 def criar_bar_chart(gdf_filtrado, x_col, y_col, titulo):
     """Criar gráfico de barras."""
     fig = px.bar(gdf_filtrado, x=x_col, y=y_col, title=titulo)
-    return fig
\ No newline at end of file
+    return fig
+
+
+# Faixas de cor do medidor de % de área georreferenciável
+GAUGE_STEPS = [
+    {'range': [0, 2.5], 'color': '#27ae60'},
+    {'range': [2.5, 5], 'color': '#29b15e'},
+    {'range': [5, 7.5], 'color': '#2cb55d'},
+    {'range': [7.5, 10], 'color': '#2eb85b'},
+    {'range': [10, 12.5], 'color': '#31bc5a'},
+    {'range': [12.5, 15], 'color': '#36bf5c'},
+    {'range': [15, 17.5], 'color': '#3dc261'},
+    {'range': [17.5, 20], 'color': '#44c565'},
+    {'range': [20, 22.5], 'color': '#4ec96a'},
+    {'range': [22.5, 25], 'color': '#56cc6e'},
+    {'range': [25, 27.5], 'color': '#5fcf73'},
+    {'range': [27.5, 30], 'color': '#67d277'},
+    {'range': [30, 32.5], 'color': '#70d57c'},
+    {'range': [32.5, 35], 'color': '#78d880'},
+    {'range': [35, 37.5], 'color': '#81db85'},
+    {'range': [37.5, 40], 'color': '#89de89'},
+    {'range': [40, 42.5], 'color': '#92e08e'},
+    {'range': [42.5, 45], 'color': '#9ae292'},
+    {'range': [45, 47.5], 'color': '#a3e597'},
+    {'range': [47.5, 50], 'color': '#abe79b'},
+    {'range': [50, 52.5], 'color': '#b4e9a0'},
+    {'range': [52.5, 55], 'color': '#bceba4'},
+    {'range': [55, 57.5], 'color': '#c5eda9'},
+    {'range': [57.5, 60], 'color': '#cdefad'},
+    {'range': [60, 62.5], 'color': '#d6f0b2'},
+    {'range': [62.5, 65], 'color': '#def2b6'},
+    {'range': [65, 67.5], 'color': '#e7f3bb'},
+    {'range': [67.5, 70], 'color': '#eff4bf'},
+    {'range': [70, 72.5], 'color': '#f8f5c4'},
+    {'range': [72.5, 75], 'color': '#f9f2b8'},
+    {'range': [75, 77.5], 'color': '#fae9a0'},
+    {'range': [77.5, 80], 'color': '#f9e18e'},
+    {'range': [80, 82.5], 'color': '#f7d87c'},
+    {'range': [82.5, 85], 'color': '#f6d06a'},
+    {'range': [85, 87.5], 'color': '#f4c258'},
+    {'range': [87.5, 90], 'color': '#f2b446'},
+    {'range': [90, 92.5], 'color': '#f0a634'},
+    {'range': [92.5, 95], 'color': '#ec8e2c'},
+    {'range': [95, 97.5], 'color': '#e96a30'},
+    {'range': [97.5, 100], 'color': '#e74c3c'}
+]
+
+# Legendas e cores das notas no gráfico de composição por UF
+LEGENDAS_NOTAS = {
+    "nota_p_q1": "Clima T1",
+    "nota_p_q2": "Clima T2",
+    "nota_p_q3": "Clima T3",
+    "nota_p_q4": "Clima T4",
+    "nota_insalub_media": "Insalubridade",
+    "nota_relevo": "Relevo",
+    "nota_area": "Área",
+    "nota_veg": "Vegetação",
+}
+
+CORES_NOTAS = {
+    "nota_p_q1": "#6C9BCF",
+    "nota_p_q2": "#8BB8E8",
+    "nota_p_q3": "#A9CCE3",
+    "nota_p_q4": "#C5DEDD",
+    "nota_insalub_media": "#9AD0EC",
+    "nota_relevo": "#C9E4F3",
+    "nota_area": "#A3C4BC",
+    "nota_veg": "#F2E8CF"
+}
+
+_modelo_gauge = None
+
+
+def _obter_modelo_gauge():
+    """Construir (uma única vez) a especificação base do medidor."""
+    global _modelo_gauge
+    if _modelo_gauge is None:
+        fig = go.Figure(go.Indicator(
+            mode="gauge+number",
+            value=0,
+            domain={'x': [0, 1], 'y': [0, 1]},
+            number={'suffix': "%", 'font': {'size': 40}},
+            gauge={
+                'axis': {
+                    'range': [0, 100],
+                    'tickwidth': 1,
+                    'tickcolor': "darkblue",
+                    'tickmode': 'array',
+                    'tickvals': [0, 10, 20, 30, 40, 50, 60, 70, 80, 90, 100],
+                    'ticktext': ['0%', '10%', '20%', '30%', '40%', '50%', '60%', '70%', '80%', '90%', '100%']
+                },
+                'bar': {'color': "rgba(0,0,0,0)"},  # Barra invisível
+                'bgcolor': "white",
+                'borderwidth': 2,
+                'bordercolor': "gray",
+                'steps': GAUGE_STEPS,
+                'threshold': {
+                    'line': {'color': "darkblue", 'width': 4},
+                    'thickness': 0.75,
+                    'value': 0
+                }
+            }
+        ))
+        fig.update_layout(
+            height=300,
+            margin=dict(l=20, r=20, t=40, b=20)
+        )
+        _modelo_gauge = fig.to_dict()
+    return _modelo_gauge
+
+
+@cache_figura
+def criar_gauge(percentual):
+    """Criar medidor de % de área georreferenciável.
+
+    Parte do modelo pré-computado, alterando apenas o valor e o limiar.
+    """
+    modelo = _obter_modelo_gauge()
+    indicador = dict(modelo["data"][0])
+    gauge = dict(indicador["gauge"])
+    gauge["threshold"] = dict(gauge["threshold"], value=percentual)
+    indicador["gauge"] = gauge
+    indicador["value"] = percentual
+    return go.Figure(dict(modelo, data=[indicador]), _validate=False)
+
+
+@cache_figura
+def criar_grafico_trimestral(valores):
+    """Criar gráfico de barras do grau de dificuldade por trimestre."""
+    trimestres = ['Trimestre 1', 'Trimestre 2', 'Trimestre 3', 'Trimestre 4']
+    
+    fig = go.Figure(data=[
+        go.Bar(
+            x=trimestres, 
+            y=valores,
+            marker_color=['#6C9BCF', '#8BB8E8', '#A9CCE3', '#C5DEDD'],
+            text=[f'{v:.2f}' for v in valores],
+            textposition='outside',
+        )
+    ])
+    
+    fig.update_layout(
+        yaxis=dict(
+            title='',
+            showticklabels=False,
+            showgrid=False,
+            zeroline=False,
+            range=[0, max(valores) * 1.15]
+        ),
+        xaxis=dict(
+            title='',
+            showgrid=False
+        ),
+        height=350,
+        showlegend=False,
+        margin=dict(l=40, r=40, t=50, b=40)
+    )
+    return fig
+
+
+@cache_figura
+def criar_grafico_composicao_uf(df_uf, ordem_legenda):
+    """Criar gráfico de barras empilhadas da composição média das notas por UF.
+    
+    Args:
+        df_uf: DataFrame com a coluna SIGLA_UF e a média de cada nota
+        ordem_legenda: Colunas de notas na ordem em que entram na legenda
+    """
+    fig = go.Figure()
+    
+    for coluna in ordem_legenda:
+        fig.add_trace(go.Bar(
+            x=df_uf["SIGLA_UF"],
+            y=df_uf[coluna].values,
+            name=LEGENDAS_NOTAS.get(coluna, coluna),
+            marker_color=CORES_NOTAS.get(coluna, "#CCCCCC"),
+            text="",  # Sem texto nas barras
+            hovertemplate=LEGENDAS_NOTAS.get(coluna, coluna) + ": %{y:.2f}<extra></extra>"
+        ))
+
+    fig.update_layout(
+        barmode="stack",
+        xaxis=dict(
+            title="", 
+            showgrid=False,
+            tickfont=dict(size=12)
+        ),
+        yaxis=dict(
+            title="", 
+            showticklabels=False,  # Remove valores do eixo Y
+            showgrid=False,
+            zeroline=False
+        ),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="center",
+            x=0.5,
+            font=dict(size=11),
+            traceorder="normal"
+        ),
+        margin=dict(l=20, r=20, t=60, b=40),
+        height=600,
+        showlegend=True,
+        plot_bgcolor="white",
+        paper_bgcolor="white",
+        hovermode="x unified",
+        # Customizar o hover
+        hoverlabel=dict(
+            bgcolor="white",
+            font_size=12,
+            font_family="Arial"
+        )
+    )
+    
+    # Remover linha tracejada vertical do hover
+    fig.update_xaxes(showspikes=False)
+    fig.update_yaxes(showspikes=False)
+    return fig
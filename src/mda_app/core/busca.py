@@ -0,0 +1,154 @@
+"""Índice de busca de municípios por nome, código IBGE (CD_MUN) e ckey.
+
+A busca ignora acentos e maiúsculas. Procura primeiro por prefixo (do nome
+inteiro, de qualquer palavra do nome e dos códigos) e, se faltarem resultados,
+por trigramas, o que tolera erros de digitação. Só os primeiros resultados
+são devolvidos, então o custo não depende do número de municípios.
+"""
+
+import heapq
+import unicodedata
+from bisect import bisect_left
+
+import numpy as np
+
+# Quantidade máxima de sugestões devolvidas por busca
+LIMITE_SUGESTOES = 50
+
+# Fração mínima dos trigramas da consulta presentes no nome
+SIMILARIDADE_MINIMA = 0.5
+
+
+def normalizar(texto):
+    """Remover acentos, caixa e pontuação para comparação."""
+    texto = unicodedata.normalize("NFKD", str(texto))
+    texto = "".join(c for c in texto if not unicodedata.combining(c)).casefold()
+    return " ".join("".join(c if c.isalnum() else " " for c in texto).split())
+
+
+def _trigramas(texto):
+    texto = f"  {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class _ListaPrefixos:
+    """Chaves ordenadas com o índice do município, para busca por prefixo."""
+
+    def __init__(self, pares):
+        pares = sorted(pares)
+        self.chaves = [chave for chave, _ in pares]
+        self.ids = np.array([posicao for _, posicao in pares], dtype=np.int64)
+
+    def buscar(self, prefixo):
+        """Índices dos municípios cujas chaves começam com `prefixo`, em ordem alfabética."""
+        inicio = bisect_left(self.chaves, prefixo)
+        fim = bisect_left(self.chaves, prefixo + "\uffff")
+        return self.ids[inicio:fim]
+
+
+class IndiceMunicipios:
+    """Índice pré-calculado para busca de municípios e opções dos filtros.
+
+    Também guarda as UFs existentes e a faixa de `nota_media`, para que a barra
+    de filtros não precise percorrer os dados a cada interação.
+    """
+
+    def __init__(self, df):
+        coluna_nome = "mun_nome" if "mun_nome" in df.columns else "NM_MUN"
+        self.nomes = df[coluna_nome].astype(str).to_numpy()
+        self.ufs_municipios = df["SIGLA_UF"].astype(str).to_numpy()
+        self.ufs = sorted(set(self.ufs_municipios))
+        self.faixa_nota = None
+        if "nota_media" in df.columns:
+            self.faixa_nota = (float(df["nota_media"].min()), float(df["nota_media"].max()))
+
+        self._ufs_por_nome = {}
+        for nome, uf in zip(self.nomes, self.ufs_municipios):
+            self._ufs_por_nome.setdefault(nome, set()).add(uf)
+
+        normalizados = [normalizar(nome) for nome in self.nomes]
+        self._normalizados = normalizados
+
+        # Prioridade: início do nome, início de outra palavra do nome, códigos
+        palavras, codigos = [], []
+        for posicao, nome in enumerate(normalizados):
+            partes = nome.split()
+            palavras.extend((" ".join(partes[i:]), posicao) for i in range(1, len(partes)))
+        for coluna in ("CD_MUN", "ckey"):
+            if coluna in df.columns:
+                codigos.extend((normalizar(valor), posicao) for posicao, valor in enumerate(df[coluna]))
+        self._prefixos = [
+            _ListaPrefixos((nome, posicao) for posicao, nome in enumerate(normalizados)),
+            _ListaPrefixos(palavras),
+            _ListaPrefixos(codigos),
+        ]
+
+        postagens = {}
+        for posicao, nome in enumerate(normalizados):
+            for trigrama in _trigramas(nome):
+                postagens.setdefault(trigrama, []).append(posicao)
+        self._trigramas = {trigrama: np.array(ids, dtype=np.int64) for trigrama, ids in postagens.items()}
+
+        # Ordem alfabética por UF, usada quando a consulta está vazia
+        ordem = np.argsort(np.array(normalizados, dtype=object), kind="stable")
+        self._ordem_por_uf = {uf: ordem[self.ufs_municipios[ordem] == uf] for uf in self.ufs}
+
+    def __len__(self):
+        return len(self.nomes)
+
+    def nas_ufs(self, nomes, ufs):
+        """Manter apenas os nomes de municípios existentes nas UFs indicadas."""
+        ufs = set(ufs)
+        return [nome for nome in nomes if self._ufs_por_nome.get(nome, set()) & ufs]
+
+    def _aceitar(self, posicoes, ufs, vistos, resultado, limite):
+        """Acrescentar nomes ainda não vistos das UFs pedidas até o limite."""
+        for posicao in posicoes:
+            if ufs is not None and self.ufs_municipios[posicao] not in ufs:
+                continue
+            nome = self.nomes[posicao]
+            if nome not in vistos:
+                vistos.add(nome)
+                resultado.append(nome)
+                if len(resultado) >= limite:
+                    return True
+        return False
+
+    def buscar(self, consulta, ufs=None, limite=LIMITE_SUGESTOES):
+        """Buscar municípios pelo nome, CD_MUN ou ckey.
+
+        Args:
+            consulta: Texto digitado (vazio lista os primeiros em ordem alfabética)
+            ufs: UFs permitidas (None = todas)
+            limite: Quantidade máxima de nomes devolvidos
+
+        Returns:
+            Lista de nomes de municípios, sem repetição, do mais ao menos relevante
+        """
+        ufs = set(ufs) if ufs is not None else None
+        consulta = normalizar(consulta)
+        resultado, vistos = [], set()
+
+        if not consulta:
+            # Intercalar as ordens alfabéticas das UFs e parar no limite
+            ordens = [self._ordem_por_uf.get(uf, ()) for uf in sorted(ufs if ufs is not None else self.ufs)]
+            posicoes = heapq.merge(*ordens, key=lambda posicao: self._normalizados[posicao])
+            self._aceitar(posicoes, None, vistos, resultado, limite)
+            return resultado
+
+        for lista in self._prefixos:
+            if self._aceitar(lista.buscar(consulta), ufs, vistos, resultado, limite):
+                return resultado
+
+        # Trigramas: tolera erros de digitação e trechos no meio do nome
+        trigramas = _trigramas(consulta)
+        postagens = [self._trigramas[t] for t in trigramas if t in self._trigramas]
+        if postagens:
+            ids, contagens = np.unique(np.concatenate(postagens), return_counts=True)
+            minimo = max(1, int(np.ceil(len(trigramas) * SIMILARIDADE_MINIMA)))
+            candidatos = ids[contagens >= minimo]
+            pontuacao = contagens[contagens >= minimo]
+            ordem = sorted(range(len(candidatos)),
+                           key=lambda i: (-pontuacao[i], self._normalizados[candidatos[i]]))
+            self._aceitar(candidatos[ordem], ufs, vistos, resultado, limite)
+        return resultado
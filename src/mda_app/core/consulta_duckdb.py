@@ -0,0 +1,228 @@
+"""Consultas SQL sobre o dataset processado em uma conexão DuckDB embutida.
+
+Alternativa ao caminho pandas (`MDA_BACKEND=duckdb`): filtros e agregações
+rodam como SQL direto sobre o GeoParquet e só as linhas do resultado são
+materializadas. O filtro por extensão usa a coluna de bbox ("covering")
+gravada pelo pipeline, sem ler as geometrias. Requer duckdb.
+"""
+
+import json
+import threading
+
+import geopandas as gpd
+import pandas as pd
+import pyarrow.parquet as pq
+import shapely
+from mda_app.config.settings import DATA_CONFIG
+from mda_app.core.precificacao import FAIXAS_PRECO
+from mda_app.core.trimestres import TRIMESTRES
+
+# Colunas calculadas em `processar_dados_geograficos`, expressas em SQL
+COLUNAS_DERIVADAS = {
+    "nota_insalub_media": '("nota_insalub" + GREATEST("nota_insalub_2", 1)) / 2',
+}
+
+_conexao = None
+_trava_conexao = threading.Lock()
+
+
+def conectar():
+    """Conexão DuckDB em memória compartilhada pelo processo, criada no primeiro uso.
+
+    Cada consulta usa o próprio cursor (`conectar().cursor()`), o que permite
+    consultas simultâneas a partir das threads de construção da página.
+    """
+    global _conexao
+    with _trava_conexao:
+        if _conexao is None:
+            try:
+                import duckdb
+            except ImportError as erro:
+                raise ImportError("O backend DuckDB requer duckdb: pip install duckdb") from erro
+            _conexao = duckdb.connect()
+        return _conexao
+
+
+def _identificador(nome):
+    return '"' + str(nome).replace('"', '""') + '"'
+
+
+def _marcadores(valores):
+    return ", ".join("?" for _ in valores)
+
+
+def montar_filtros(ufs=None, municipios=None, coluna_nome="NM_MUN", criterio=None, faixa=None,
+                   bbox=None, colunas_bbox=None):
+    """Montar a cláusula WHERE da seleção, com os mesmos filtros de `aplicar_filtros`.
+
+    Args:
+        ufs: UFs selecionadas (vazio = todas)
+        municipios: Nomes de municípios selecionados (vazio = todos)
+        coluna_nome: Coluna com o nome do município
+        criterio: Coluna do critério filtrado pela faixa
+        faixa: (mínimo, máximo) do critério, inclusivos
+        bbox: (xmin, ymin, xmax, ymax) no CRS do arquivo
+        colunas_bbox: Caminhos da coluna de bbox ("covering" do GeoParquet)
+
+    Returns:
+        Tupla (sql, parâmetros posicionais); sql vazio quando não há filtro
+    """
+    condicoes, parametros = [], []
+    if ufs:
+        condicoes.append(f'"SIGLA_UF" IN ({_marcadores(ufs)})')
+        parametros.extend(str(uf) for uf in ufs)
+    if municipios:
+        condicoes.append(f"{_identificador(coluna_nome)} IN ({_marcadores(municipios)})")
+        parametros.extend(str(nome) for nome in municipios)
+    if criterio and faixa is not None:
+        condicoes.append(f"{_identificador(criterio)} BETWEEN ? AND ?")
+        parametros.extend(float(valor) for valor in faixa)
+    if bbox is not None and colunas_bbox:
+        campo = {
+            limite: f"struct_extract({_identificador(caminho[0])}, '{caminho[1]}')"
+            for limite, caminho in colunas_bbox.items()
+        }
+        condicoes.append(f"{campo['xmax']} >= ? AND {campo['xmin']} <= ? AND {campo['ymax']} >= ? AND {campo['ymin']} <= ?")
+        parametros.extend(float(valor) for valor in (bbox[0], bbox[2], bbox[1], bbox[3]))
+    return ("WHERE " + " AND ".join(condicoes)) if condicoes else "", parametros
+
+
+def expressao_preco(coluna_nota):
+    """Expressão SQL do preço por hectare da faixa de `coluna_nota` (FAIXAS_PRECO)."""
+    nota = _identificador(coluna_nota)
+    casos = " ".join(f"WHEN {nota} <= {limite} THEN {preco}" for limite, preco in FAIXAS_PRECO[:-1])
+    return f"CASE {casos} ELSE {FAIXAS_PRECO[-1][1]} END"
+
+
+def _metadados(caminho):
+    """Colunas de atributos, geometria, CRS e colunas de bbox do GeoParquet."""
+    esquema = pq.read_schema(caminho)
+    geo = json.loads(esquema.metadata[b"geo"])
+    coluna_geometria = geo["primary_column"]
+    info = geo["columns"][coluna_geometria]
+    colunas_bbox = info.get("covering", {}).get("bbox")
+    ignoradas = {coluna_geometria}
+    if colunas_bbox:
+        ignoradas.update(caminho_campo[0] for caminho_campo in colunas_bbox.values())
+    return {
+        "colunas": [nome for nome in esquema.names if nome not in ignoradas],
+        "geometria": coluna_geometria,
+        "crs": info.get("crs", "OGC:CRS84"),
+        "bbox": colunas_bbox,
+    }
+
+
+def _selecao(caminho, ufs=None, municipios=None, criterio=None, faixa=None, bbox=None):
+    """Metadados do arquivo e cláusula WHERE da seleção."""
+    caminho = caminho or DATA_CONFIG["dataset_processado"]
+    metadados = _metadados(caminho)
+    coluna_nome = "mun_nome" if "mun_nome" in metadados["colunas"] else "NM_MUN"
+    where, parametros = montar_filtros(ufs, municipios, coluna_nome, criterio, faixa, bbox, metadados["bbox"])
+    return caminho, metadados, where, parametros
+
+
+def _consultar(sql, parametros):
+    with conectar().cursor() as cursor:
+        return cursor.execute(sql, parametros).df()
+
+
+def filtrar(ufs=None, municipios=None, criterio=None, faixa=None, bbox=None, colunas=None, caminho=None):
+    """Ler só os municípios da seleção, com geometria.
+
+    Args:
+        ufs, municipios, criterio, faixa, bbox: Filtros (ver `montar_filtros`)
+        colunas: Colunas de atributos a ler; ausentes no arquivo são ignoradas (None = todas)
+        caminho: GeoParquet consultado (padrão: dataset processado)
+
+    Returns:
+        GeoDataFrame no CRS do arquivo, na ordem das linhas do arquivo
+    """
+    caminho, metadados, where, parametros = _selecao(caminho, ufs, municipios, criterio, faixa, bbox)
+    if colunas is None:
+        colunas = metadados["colunas"]
+    else:
+        colunas = [coluna for coluna in colunas if coluna in metadados["colunas"]]
+    selecionadas = ", ".join(_identificador(c) for c in [*colunas, metadados["geometria"]])
+    df = _consultar(f"SELECT {selecionadas} FROM read_parquet(?) {where}", [caminho, *parametros])
+
+    geometria = metadados["geometria"]
+    crs = metadados["crs"]
+    geometrias = shapely.from_wkb([bytes(valor) if valor is not None else None for valor in df[geometria]])
+    gdf = gpd.GeoDataFrame(df.drop(columns=geometria), geometry=gpd.GeoSeries(geometrias, crs=crs), crs=crs)
+    gdf = gdf.rename_geometry(geometria) if geometria != "geometry" else gdf
+    if bbox is not None and not metadados["bbox"]:
+        # Sem coluna de bbox no arquivo: filtrar pela extensão após a leitura
+        gdf = gdf[gdf.intersects(shapely.box(*bbox))]
+    return gdf
+
+
+def totais_trimestrais(ufs=None, municipios=None, criterio=None, faixa=None, caminho=None):
+    """Valor total de cada trimestre da seleção (como `calcular_totais_trimestrais`).
+
+    Returns:
+        Lista com os totais (R$) dos trimestres 1 a 4
+    """
+    caminho, _, where, parametros = _selecao(caminho, ufs, municipios, criterio, faixa)
+    somas = ", ".join(
+        f'COALESCE(SUM("area_georef" * {expressao_preco(f"nota_total_q{q}")}), 0)' for q in TRIMESTRES
+    )
+    linha = _consultar(f"SELECT {somas} FROM read_parquet(?) {where}", [caminho, *parametros]).iloc[0]
+    return [float(valor) for valor in linha]
+
+
+def resumo_selecao(ufs=None, municipios=None, criterio=None, faixa=None, caminho=None):
+    """Agregados dos cards de métricas da seleção (ver `resumir_selecao` no app).
+
+    Returns:
+        Dicionário com `area_total`, `area_car_media` e `valor_ha_medio`/`_minimo`/
+        `_maximo`; chaves sem colunas de origem ou sem valores são omitidas
+    """
+    caminho, metadados, where, parametros = _selecao(caminho, ufs, municipios, criterio, faixa)
+    colunas = set(metadados["colunas"])
+    expressoes = {}
+    if "area_municip" in colunas:
+        expressoes["area_total"] = 'SUM("area_municip")'
+    if "area_car_media" in colunas:
+        expressoes["area_car_media"] = 'AVG("area_car_media")'
+    if {"valor_mun_area", "area_georef"} <= colunas:
+        valor_ha = '"valor_mun_area" / "area_georef"'
+        filtro = 'FILTER (WHERE "area_georef" > 0)'
+        expressoes["valor_ha_medio"] = f"AVG({valor_ha}) {filtro}"
+        expressoes["valor_ha_minimo"] = f"MIN({valor_ha}) {filtro}"
+        expressoes["valor_ha_maximo"] = f"MAX({valor_ha}) {filtro}"
+    if not expressoes:
+        return {}
+
+    selecionadas = ", ".join(f"{expressao} AS {nome}" for nome, expressao in expressoes.items())
+    linha = _consultar(f"SELECT {selecionadas} FROM read_parquet(?) {where}", [caminho, *parametros]).iloc[0]
+    return {nome: float(valor) for nome, valor in linha.items() if pd.notna(valor)}
+
+
+def medias_por_uf(ufs, colunas, caminho=None):
+    """Média de cada coluna por UF (colunas derivadas calculadas em SQL).
+
+    Returns:
+        DataFrame com `SIGLA_UF` e as colunas existentes no arquivo
+    """
+    caminho, metadados, where, parametros = _selecao(caminho, ufs)
+    existentes = set(metadados["colunas"])
+    expressoes = {}
+    for coluna in colunas:
+        if coluna in existentes:
+            expressoes[coluna] = _identificador(coluna)
+        elif coluna in COLUNAS_DERIVADAS and {"nota_insalub", "nota_insalub_2"} <= existentes:
+            expressoes[coluna] = COLUNAS_DERIVADAS[coluna]
+    medias = ", ".join(f"AVG({expressao}) AS {_identificador(coluna)}" for coluna, expressao in expressoes.items())
+    sql = f'SELECT "SIGLA_UF"{", " + medias if medias else ""} FROM read_parquet(?) {where} GROUP BY "SIGLA_UF" ORDER BY "SIGLA_UF"'
+    return _consultar(sql, [caminho, *parametros])
+
+
+def municipio_no_ponto(x, y, caminho=None):
+    """Código (CD_MUN) do município que contém o ponto, ou None.
+
+    A coluna de bbox seleciona os candidatos em SQL; só as geometrias deles são
+    lidas para o teste exato de pertinência. Coordenadas no CRS do arquivo.
+    """
+    candidatos = filtrar(bbox=(x, y, x, y), colunas=["CD_MUN"], caminho=caminho)
+    contem = candidatos[candidatos.intersects(shapely.Point(x, y))]
+    return str(contem["CD_MUN"].iloc[0]) if len(contem) else None
@@ -1,19 +1,206 @@
 """Carregamento e processamento de dados geoespaciais."""
 
-import geopandas as gpd
 import numpy as np
+import pandas as pd
 import streamlit as st
+from mda_app.config.settings import DATA_CONFIG
+from mda_app.core import consulta_duckdb, postgis
+from mda_app.core.busca import IndiceMunicipios
+from mda_app.core.dissolucoes import COLUNAS_PONDERADAS, calcular_dissolucoes
+from mda_app.core.esquema_compacto import compactar_dados, concatenar_compactos
+from mda_app.core.geolocalizacao import LocalizadorMunicipios, ler_municipios
+from mda_app.core.leitor import COLUNAS_FILTROS, filtro_ufs_no_leitor, ler_dataset, versao_dataset
+from mda_app.core.versoes import diferencas_versoes, listar_versoes
 
 
-@st.cache_data
-def carregar_dados():
-    """Carregar e processar dados geoespaciais."""
-    asd = gpd.read_file("data/raw/precificacao_al_ii.geojson")
-    # Criar indicadores adicionais
+def ler_dados(caminho=None, ufs=None):
+    """Ler o conjunto de dados de origem (opcionalmente só algumas UFs) e criar indicadores adicionais."""
+    return criar_indicadores(ler_dataset(caminho, ufs=ufs))
+
+
+def criar_indicadores(asd):
+    """Criar indicadores adicionais."""
     asd["valor_medio"] = (asd["valor_mun_perim"] + asd["valor_mun_area"]) / 2
     return asd
 
 
+def ler_fonte(ufs=None):
+    """Ler os dados da origem configurada (arquivo ou PostGIS) com os indicadores adicionais."""
+    if DATA_CONFIG["backend"] == "postgis":
+        # UFs filtradas e geometrias simplificadas no próprio banco
+        return criar_indicadores(postgis.ler_postgis(ufs=ufs))
+    return ler_dados(ufs=ufs)
+
+
+def versao_fonte():
+    """Versão atual dos dados de origem (arquivo ou tabela PostGIS).
+
+    Entra na chave dos caches abaixo; a versão exibida é trocada por
+    `RecarregadorDataset` só depois que os caches da versão nova estão prontos.
+    """
+    if DATA_CONFIG["backend"] == "postgis":
+        return postgis.versao_tabela()
+    if DATA_CONFIG["backend"] == "duckdb":
+        return f'{versao_dataset()}:{versao_dataset(DATA_CONFIG["dataset_processado"])}'
+    return versao_dataset()
+
+
+def ler_selecao_duckdb(ufs, municipios, criterio, faixa):
+    """Ler só os municípios filtrados pelo backend DuckDB, já processados como no caminho pandas."""
+    selecao = consulta_duckdb.filtrar(ufs=ufs, municipios=municipios, criterio=criterio, faixa=faixa)
+    return processar_dados_geograficos(criar_indicadores(selecao))
+
+
+def montar_indice_municipios():
+    """Montar o índice de busca e as opções dos filtros (lê só UF, nomes, códigos e nota média)."""
+    if DATA_CONFIG["backend"] == "postgis":
+        return IndiceMunicipios(postgis.ler_postgis(colunas=COLUNAS_FILTROS, geometria=False))
+    return IndiceMunicipios(ler_dataset(colunas=COLUNAS_FILTROS, geometria=False))
+
+
+@st.cache_resource(max_entries=2)
+def carregar_indice_municipios(versao=None):
+    """Índice de `montar_indice_municipios`, compartilhado entre as sessões.
+
+    O índice não é copiado a cada interação. `versao` (de `versao_fonte`) só
+    distingue as entradas do cache.
+    """
+    return montar_indice_municipios()
+
+
+@st.cache_resource(max_entries=2)
+def carregar_localizador(versao=None):
+    """Índice espacial dos municípios para a precificação em lote, criado no primeiro uso."""
+    return LocalizadorMunicipios(ler_municipios())
+
+
+# Entradas por UF mantidas em cache: todas as UFs de duas versões dos dados
+LIMITE_CACHE_UFS = 2 * 27
+
+# Seleções de UFs com dissoluções mantidas em cache
+LIMITE_CACHE_DISSOLUCOES = 16
+
+
+def _ufs_fonte(ufs, versao):
+    """UFs a carregar, em ordem (None = todas as UFs do dataset)."""
+    return sorted(ufs) if ufs else carregar_indice_municipios(versao).ufs
+
+
+class _LeituraConjunta:
+    """Leitura única, compartilhada pelas entradas por UF que faltam no cache.
+
+    No primeiro acesso lê de uma vez as UFs ainda pendentes (a que faltou no
+    cache e as seguintes) e as separa por `SIGLA_UF`: em GeoJSON/GeoPackage o
+    filtro por UF percorre o arquivo inteiro a cada leitura.
+    """
+
+    def __init__(self):
+        self.pendentes = []
+        self._por_uf = None
+        self._vazio = None
+
+    def da_uf(self, uf):
+        if self._por_uf is None:
+            dados = processar_dados_geograficos(ler_fonte(self.pendentes))
+            self._por_uf = {sigla: grupo.reset_index(drop=True) for sigla, grupo in dados.groupby("SIGLA_UF", sort=False)}
+            self._vazio = dados.iloc[:0]
+        return self._por_uf.get(uf, self._vazio)
+
+
+def _ler_uf(uf, leitura):
+    """Dados processados de uma UF: pela leitura conjunta ou, se a origem filtra por UF, lidos só para ela."""
+    if leitura is None:
+        return processar_dados_geograficos(ler_fonte([uf]))
+    return leitura.da_uf(uf)
+
+
+def _carregar_por_uf(carregar_uf, ufs, versao):
+    """Entradas por UF da seleção; as que faltam no cache vêm de uma única leitura."""
+    ufs = _ufs_fonte(ufs, versao)
+    filtra_no_leitor = DATA_CONFIG["backend"] == "postgis" or filtro_ufs_no_leitor()
+    leitura = None if filtra_no_leitor else _LeituraConjunta()
+    partes = []
+    for posicao, uf in enumerate(ufs):
+        if leitura is not None:
+            leitura.pendentes = ufs[posicao:]
+        partes.append(carregar_uf(uf, versao, _leitura=leitura))
+    return partes
+
+
+@st.cache_data(max_entries=LIMITE_CACHE_UFS)
+def carregar_dados_uf(uf, versao=None, _leitura=None):
+    """Carregar e processar os dados de uma UF (`_leitura` fica fora da chave do cache)."""
+    return _ler_uf(uf, _leitura)
+
+
+@st.cache_data(max_entries=LIMITE_CACHE_UFS)
+def carregar_dados_compactos_uf(uf, versao=None, _leitura=None):
+    """Carregar os dados processados de uma UF no esquema compacto."""
+    return compactar_dados(_ler_uf(uf, _leitura))
+
+
+def carregar_dados(ufs=None, versao=None):
+    """Carregar e processar dados geoespaciais (None = todas as UFs).
+
+    Cada UF fica em uma entrada própria do cache: seleções diferentes
+    compartilham as UFs em comum e o cache guarda no máximo uma cópia de cada
+    UF por versão. Em GeoParquet e PostGIS cada UF que falta é lida à parte (o
+    filtro é aplicado na leitura); nos demais formatos as que faltam são lidas
+    de uma vez.
+    """
+    return pd.concat(_carregar_por_uf(carregar_dados_uf, ufs, versao), ignore_index=True)
+
+
+def carregar_dados_compactos(ufs=None, versao=None):
+    """Carregar dados processados no esquema compacto (None = todas as UFs), em cache por UF.
+
+    Returns:
+        Tupla (DataFrame sem geometria, GeometriasCompactadas)
+    """
+    return concatenar_compactos(_carregar_por_uf(carregar_dados_compactos_uf, ufs, versao))
+
+
+@st.cache_data(max_entries=LIMITE_CACHE_DISSOLUCOES)
+def carregar_dissolucoes(ufs=None, versao=None):
+    """Carregar as geometrias dissolvidas por UF e por região (None = todas as UFs)."""
+    if DATA_CONFIG["backend"] == "duckdb":
+        # Só as colunas usadas na dissolução
+        colunas = ["SIGLA_UF", "area_cidade", *COLUNAS_PONDERADAS]
+        return calcular_dissolucoes(consulta_duckdb.filtrar(ufs=ufs, colunas=colunas).to_crs(epsg=4326))
+    return calcular_dissolucoes(processar_dados_geograficos(ler_fonte(ufs)))
+
+
+def descartar_versao(versao, ufs):
+    """Remover dos caches as entradas de uma versão que deixou de ser a ativa.
+
+    Remove os dados de cada UF, o índice, o localizador e as dissoluções da
+    seleção de todas as UFs (a aquecida por `RecarregadorDataset`); dissoluções
+    de outras seleções saem pelo limite do cache.
+
+    Args:
+        versao: Versão descartada (de `versao_fonte`)
+        ufs: UFs do dataset nessa versão
+    """
+    for uf in ufs:
+        carregar_dados_uf.clear(uf, versao)
+        carregar_dados_compactos_uf.clear(uf, versao)
+    carregar_dissolucoes.clear(tuple(sorted(ufs)) or None, versao)
+    carregar_indice_municipios.clear(versao)
+    carregar_localizador.clear(versao)
+
+
+@st.cache_data(ttl=60)
+def carregar_versoes():
+    """Nomes das versões registradas do dataset, da mais antiga para a mais recente."""
+    return [manifesto["versao"] for manifesto in listar_versoes()]
+
+
+@st.cache_data
+def carregar_diferencas(anterior, atual):
+    """Diferenças entre duas versões (imutáveis, então o resultado não expira)."""
+    return diferencas_versoes(anterior, atual)
+
+
 def processar_dados_geograficos(gdf):
     """Processar dados geográficos."""
     gdf = gdf.to_crs(epsg=4326)
@@ -27,4 +214,4 @@ def processar_dados_geograficos(gdf):
         ((gdf['area_car_total'] / gdf['area_georef']) * gdf['valor_mun_area'])/gdf['num_imoveis'],
         0
     )
-    return gdf
\ No newline at end of file
+    return gdf
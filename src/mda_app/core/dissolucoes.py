@@ -0,0 +1,160 @@
+"""Geometrias dissolvidas por UF e por região e níveis de detalhe do mapa.
+
+As UFs e regiões são dissolvidas a partir dos municípios uma única vez, com
+notas agregadas pela média ponderada pela área do município. O mapa desenha o
+nível mais agregado que cabe na seleção (região completa, UF ou município) e
+detalha um polígono quando ele é clicado.
+"""
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from mda_app.config.settings import REGIOES_ESTADOS
+from mda_app.core.trimestres import colunas_trimestrais
+
+# Sistema projetado usado para a área dos municípios quando não há `area_cidade`
+CRS_METRICO = "EPSG:5880"
+
+# Colunas agregadas pela média ponderada pela área (inclui as notas totais
+# trimestrais, usadas pelo seletor de trimestre do mapa)
+COLUNAS_PONDERADAS = ["nota_media", "percent_area_georef", *colunas_trimestrais("nota_total")]
+
+REGIAO_DA_UF = {uf: regiao for regiao, ufs in REGIOES_ESTADOS.items() for uf in ufs}
+
+
+def _pesos_area(gdf):
+    """Área de cada município, usada como peso das médias."""
+    if "area_cidade" in gdf.columns:
+        return gdf["area_cidade"].astype(float)
+    return gdf.geometry.to_crs(CRS_METRICO).area
+
+
+def _dissolver(gdf, chave, pesos):
+    """Dissolver as geometrias por `chave` e agregar as notas ponderadas pela área."""
+    colunas = [c for c in COLUNAS_PONDERADAS if c in gdf.columns]
+    ponderado = gdf[colunas].astype(float).mul(pesos, axis=0)
+    grupos = gdf[chave].astype(str)
+    soma_pesos = pesos.groupby(grupos).sum()
+    agregado = ponderado.groupby(grupos).sum().div(soma_pesos.replace(0, np.nan), axis=0)
+    agregado["num_municipios"] = grupos.value_counts()
+    geometrias = gdf.geometry.groupby(grupos).agg(lambda serie: serie.union_all())
+    return gpd.GeoDataFrame(agregado, geometry=geometrias, crs=gdf.crs)
+
+
+def calcular_dissolucoes(gdf):
+    """Dissolver os municípios por UF e por região.
+
+    Returns:
+        Dicionário {"uf": GeoDataFrame, "regiao": GeoDataFrame}, indexados pela
+        sigla da UF e pelo nome da região, com as notas ponderadas, o número de
+        municípios e (em "regiao") as UFs presentes
+    """
+    pesos = _pesos_area(gdf)
+    ufs = _dissolver(gdf, "SIGLA_UF", pesos)
+    ufs["regiao"] = ufs.index.map(REGIAO_DA_UF)
+
+    com_regiao = gdf.assign(regiao=gdf["SIGLA_UF"].astype(str).map(REGIAO_DA_UF))
+    com_regiao = com_regiao[com_regiao["regiao"].notna()]
+    regioes = _dissolver(com_regiao, "regiao", pesos[com_regiao.index])
+    regioes["ufs"] = ufs.index.to_series().groupby(ufs["regiao"]).agg(lambda siglas: tuple(sorted(siglas)))
+    return {"uf": ufs, "regiao": regioes}
+
+
+def _como_camada(gdf, nivel, nomes):
+    """Padronizar polígonos de um nível para o formato usado por `criar_mapa`."""
+    return gpd.GeoDataFrame(
+        {
+            "nivel": nivel,
+            "NM_MUN": list(nomes),
+            # Código e UF dos municípios, usados na identificação dos polígonos
+            **{c: gdf[c].astype(str).to_numpy() for c in ["CD_MUN", "SIGLA_UF"] if c in gdf.columns},
+            **{c: gdf[c].to_numpy() for c in COLUNAS_PONDERADAS if c in gdf.columns},
+        },
+        geometry=gdf.geometry.to_numpy(),
+        crs=gdf.crs,
+    )
+
+
+def montar_niveis_mapa(gdf_filtrado, dissolucoes, ufs_sel, ufs_dataset, municipios_explicitos=False,
+                       expandidos=()):
+    """Escolher os polígonos do mapa: o nível mais agregado que cabe na seleção.
+
+    Uma região é desenhada inteira quando todas as suas UFs do dataset estão
+    selecionadas; as demais UFs selecionadas aparecem como UF. Polígonos em
+    `expandidos` (clicados) são detalhados no nível seguinte. Se restar um
+    único polígono agregado, ele é detalhado automaticamente.
+
+    Args:
+        gdf_filtrado: Municípios filtrados
+        dissolucoes: Resultado de `calcular_dissolucoes`
+        ufs_sel: UFs selecionadas
+        ufs_dataset: Todas as UFs existentes no dataset
+        municipios_explicitos: Se o usuário escolheu municípios específicos
+        expandidos: Nomes de regiões e siglas de UFs detalhadas
+
+    Returns:
+        GeoDataFrame com `nivel` ("regiao", "uf" ou "municipio"), `NM_MUN`
+        (nome exibido e usado no clique) e as notas; None quando o mapa deve
+        mostrar os próprios municípios filtrados
+    """
+    ufs_sel = set(ufs_sel)
+    if municipios_explicitos or len(ufs_sel) <= 1:
+        return None
+    expandidos = set(expandidos)
+
+    while True:
+        regioes, ufs, ufs_municipios = [], [], []
+        for regiao, ufs_regiao in REGIOES_ESTADOS.items():
+            presentes = [uf for uf in ufs_regiao if uf in ufs_dataset]
+            selecionadas = [uf for uf in presentes if uf in ufs_sel]
+            if not selecionadas:
+                continue
+            if len(selecionadas) == len(presentes) and regiao not in expandidos:
+                regioes.append(regiao)
+                continue
+            for uf in selecionadas:
+                (ufs_municipios if uf in expandidos else ufs).append(uf)
+
+        if len(regioes) + len(ufs) != 1 or ufs_municipios:
+            break
+        # Um único polígono agregado não informa nada: detalhar
+        expandidos.update(regioes or ufs)
+
+    if not regioes and not ufs:
+        return None
+
+    camadas = []
+    if regioes:
+        camadas.append(_como_camada(dissolucoes["regiao"].loc[regioes], "regiao", regioes))
+    if ufs:
+        camadas.append(_como_camada(dissolucoes["uf"].loc[ufs], "uf", ufs))
+    if ufs_municipios:
+        municipios = gdf_filtrado[gdf_filtrado["SIGLA_UF"].isin(ufs_municipios)]
+        nomes = municipios["mun_nome"] if "mun_nome" in municipios.columns else municipios["NM_MUN"]
+        camadas.append(_como_camada(municipios, "municipio", nomes.astype(str)))
+    return gpd.GeoDataFrame(pd.concat(camadas, ignore_index=True), crs=camadas[0].crs)
+
+
+def identificar_poligonos(camada):
+    """Identificador e rótulo (tooltip) únicos de cada polígono do mapa.
+
+    Nomes de municípios se repetem entre UFs: municípios são identificados pelo
+    código (CD_MUN) e rotulados com a sigla da UF; UFs e regiões, pela sigla e
+    pelo nome.
+
+    Args:
+        camada: Resultado de `montar_niveis_mapa` ou os próprios municípios
+
+    Returns:
+        DataFrame com `id`, `rotulo`, `nivel` e `nome`, na ordem de `camada`
+    """
+    nomes = (camada["mun_nome"] if "mun_nome" in camada.columns else camada["NM_MUN"]).astype(str).to_numpy()
+    niveis = camada["nivel"].to_numpy() if "nivel" in camada.columns else np.full(len(camada), "municipio")
+    municipio = niveis == "municipio"
+
+    codigos = camada["CD_MUN"].astype(str).to_numpy() if "CD_MUN" in camada.columns else nomes
+    ids = np.where(municipio, "municipio:" + codigos.astype(object), niveis.astype(object) + ":" + nomes)
+    rotulos = nomes.astype(object)
+    if "SIGLA_UF" in camada.columns:
+        rotulos = np.where(municipio, nomes + " (" + camada["SIGLA_UF"].astype(str).to_numpy() + ")", rotulos)
+    return pd.DataFrame({"id": ids, "rotulo": rotulos, "nivel": niveis, "nome": nomes})
@@ -0,0 +1,128 @@
+"""Representação compacta em memória do conjunto de dados municipal."""
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from pandas.api.types import union_categoricals
+
+# Colunas de texto convertidas para categorias
+COLUNAS_CATEGORICAS = ["SIGLA_UF", "NM_MUN", "mun_nome", "ckey"]
+
+# Prefixo das colunas de notas convertidas para float32
+PREFIXO_NOTAS = "nota_"
+
+
+class GeometriasCompactadas:
+    """Geometrias guardadas como WKB em um único buffer contíguo.
+
+    As geometrias só são materializadas (objetos shapely) no momento do desenho,
+    para as linhas efetivamente selecionadas.
+    """
+
+    def __init__(self, geometrias, crs=None):
+        wkb = shapely.to_wkb(np.asarray(geometrias))
+        tamanhos = np.fromiter((len(w) for w in wkb), dtype=np.int64, count=len(wkb))
+        self.offsets = np.concatenate([[0], np.cumsum(tamanhos)]).astype(np.int64)
+        self.buffer = np.frombuffer(b"".join(wkb), dtype=np.uint8)
+        self.indice = pd.Index(geometrias.index)
+        self.crs = crs
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @classmethod
+    def concatenar(cls, partes, indice):
+        """Juntar geometrias já compactadas sem recodificar o WKB, com o índice informado."""
+        juntas = cls.__new__(cls)
+        deslocamentos = np.cumsum([0] + [len(parte.buffer) for parte in partes[:-1]])
+        juntas.offsets = np.concatenate(
+            [[0]] + [parte.offsets[1:] + d for parte, d in zip(partes, deslocamentos)]
+        ).astype(np.int64)
+        juntas.buffer = np.concatenate([parte.buffer for parte in partes])
+        juntas.indice = pd.Index(indice)
+        juntas.crs = partes[0].crs
+        return juntas
+
+    @property
+    def nbytes(self):
+        """Total de bytes ocupados pelo buffer e pelos offsets."""
+        return int(self.buffer.nbytes + self.offsets.nbytes)
+
+    def materializar(self, rotulos=None):
+        """Converter para GeoSeries as geometrias dos rótulos de índice informados."""
+        if rotulos is None:
+            rotulos = self.indice
+        posicoes = self.indice.get_indexer(rotulos)
+        if (posicoes < 0).any():
+            raise KeyError("Rótulos sem geometria correspondente no esquema compacto.")
+        wkb = [self.buffer[self.offsets[p]:self.offsets[p + 1]].tobytes() for p in posicoes]
+        geometrias = shapely.from_wkb(np.array(wkb, dtype=object))
+        return gpd.GeoSeries(geometrias, index=pd.Index(rotulos), crs=self.crs)
+
+
+def compactar_dados(gdf):
+    """Converter o GeoDataFrame para o esquema compacto.
+
+    Returns:
+        Tupla (DataFrame sem geometria, GeometriasCompactadas)
+    """
+    geometrias = GeometriasCompactadas(gdf.geometry, crs=gdf.crs)
+    df = pd.DataFrame(gdf.drop(columns=gdf.geometry.name))
+
+    for coluna in df.columns:
+        if coluna.startswith(PREFIXO_NOTAS) and pd.api.types.is_float_dtype(df[coluna]):
+            df[coluna] = df[coluna].astype(np.float32)
+        elif coluna in COLUNAS_CATEGORICAS:
+            df[coluna] = df[coluna].astype("category")
+
+    return df, geometrias
+
+
+def concatenar_compactos(partes):
+    """Juntar dados compactos de várias partes (ex.: UFs), renumerando o índice.
+
+    Args:
+        partes: Lista de tuplas (DataFrame, GeometriasCompactadas) de `compactar_dados`
+
+    Returns:
+        Tupla (DataFrame sem geometria, GeometriasCompactadas)
+    """
+    dfs = [df for df, _ in partes]
+    df = pd.concat(dfs, ignore_index=True)
+    # Categorias diferentes entre as partes: unir para não voltar a texto
+    for coluna in COLUNAS_CATEGORICAS:
+        if coluna in df.columns and not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            df[coluna] = union_categoricals([parte[coluna] for parte in dfs])
+    return df, GeometriasCompactadas.concatenar([geometrias for _, geometrias in partes], df.index)
+
+
+def descompactar_dados(df, geometrias):
+    """Materializar um GeoDataFrame com a geometria apenas das linhas de `df`."""
+    return gpd.GeoDataFrame(df, geometry=geometrias.materializar(df.index), crs=geometrias.crs)
+
+
+def relatorio_colunas(df, geometrias=None):
+    """Gerar relatório de ocupação de memória por coluna.
+
+    Args:
+        df: DataFrame ou GeoDataFrame a ser medido
+        geometrias: GeometriasCompactadas associadas (opcional)
+
+    Returns:
+        DataFrame com colunas `coluna`, `dtype` e `bytes`, em ordem decrescente
+    """
+    uso = df.memory_usage(deep=True, index=False)
+    linhas = []
+    for coluna, nbytes in uso.items():
+        serie = df[coluna]
+        if isinstance(serie, gpd.GeoSeries):
+            # memory_usage não conta os objetos shapely; usar o tamanho em WKB
+            nbytes = int(nbytes + serie.to_wkb().map(len).sum())
+        linhas.append({"coluna": coluna, "dtype": str(serie.dtype), "bytes": int(nbytes)})
+
+    if geometrias is not None:
+        linhas.append({"coluna": "geometry", "dtype": "wkb compactado", "bytes": geometrias.nbytes})
+
+    relatorio = pd.DataFrame(linhas, columns=["coluna", "dtype", "bytes"])
+    return relatorio.sort_values("bytes", ascending=False).reset_index(drop=True)
@@ -0,0 +1,307 @@
+"""Exportação estática do dashboard, pré-renderizada por UF.
+
+Boa parte do acesso público só consulta o mapa e os números de uma UF, sem
+alterar filtros. Este comando gera, para a visão nacional e para cada UF, o
+mapa, os cards de métricas, os totais trimestrais, as especificações dos
+gráficos e a tabela de municípios em páginas, com as mesmas funções do app. O
+resultado é um diretório que qualquer servidor web entrega sem Python por
+requisição:
+
+    PYTHONPATH=src python -m mda_app.core.estatico --saida dist/estatico
+    python -m http.server --directory dist/estatico
+
+Os dados vêm da origem configurada (`MDA_DATASET`, ou `MDA_BACKEND=postgis`).
+"""
+
+import argparse
+import html
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from string import Template
+
+import plotly.io as pio
+import plotly.offline
+from mda_app.app import (
+    calcular_metricas, medias_notas_uf, montar_composicao_uf, montar_gauge, montar_grafico_trimestral,
+    montar_tabela
+)
+from mda_app.components.visualizations import criar_mapa
+from mda_app.config.settings import APP_CONFIG, COLORS
+from mda_app.core.data_loader import ler_fonte, montar_indice_municipios, processar_dados_geograficos, versao_fonte
+from mda_app.core.dissolucoes import calcular_dissolucoes, montar_niveis_mapa
+from mda_app.core.filtros import aplicar_filtros
+from mda_app.core.precificacao import calcular_totais_trimestrais
+
+logger = logging.getLogger(__name__)
+
+# Nome do diretório da visão com todas as UFs
+VISAO_NACIONAL = "nacional"
+
+# Linhas da tabela de municípios por arquivo de página
+LINHAS_POR_PAGINA = 500
+
+CRITERIO = "nota_media"
+
+PAGINA = Template("""<!DOCTYPE html>
+<html lang="pt-BR">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>$titulo_pagina</title>
+<script src="../plotly.min.js"></script>
+<style>
+body { font-family: sans-serif; margin: 0 auto; max-width: 1200px; padding: 0 16px; }
+h1 { color: $cor; text-align: center; margin-bottom: 0; }
+h2, h3 { text-align: center; }
+nav { text-align: center; margin: 12px 0; }
+.cards { display: flex; gap: 12px; justify-content: center; flex-wrap: wrap; }
+.card { border: 1px solid #ddd; border-radius: 6px; padding: 10px 16px; min-width: 160px; }
+.card span { display: block; font-size: 13px; color: #555; }
+.card strong { font-size: 22px; }
+.graficos { display: flex; gap: 12px; }
+.graficos > div { flex: 1; min-width: 0; }
+table { border-collapse: collapse; font-size: 13px; width: 100%; display: block; overflow-x: auto; }
+th, td { border: 1px solid #ddd; padding: 4px 6px; white-space: nowrap; }
+</style>
+</head>
+<body>
+<h1>Dashboard - Precificação de Áreas Georreferenciáveis</h1>
+<nav>$navegacao</nav>
+<h2>$titulo</h2>
+<iframe src="mapa.html" title="Mapa" style="width: 100%; height: 500px; border: 0;"></iframe>
+<h3>Informações Adicionais</h3>
+<div class="cards">$metricas</div>
+<div class="graficos">
+<div><h4>Grau de Dificuldade por Trimestre</h4><div id="grafico_trimestral"></div></div>
+<div><h4>Percentual de Área Georreferenciável</h4><div id="gauge"></div></div>
+</div>
+<h3>Valores Totais Trimestrais por Nota</h3>
+<div class="cards">$totais</div>
+<h3>Composição Média dos Graus de Dificuldade por UF</h3>
+<div id="composicao_uf"></div>
+<h3>Tabela de Municípios</h3>
+<div id="tabela"></div>
+<p style="text-align: center;">
+<button id="anterior">&larr;</button> Página <span id="pagina"></span> de $paginas
+<button id="proxima">&rarr;</button>
+</p>
+<p style="text-align: center; font-size: 12px; color: #777;">Dados: $versao. Gerado em $gerado_em.</p>
+<script>
+const graficos = $graficos;
+graficos.forEach(async (nome) => {
+  const spec = await (await fetch("graficos/" + nome + ".json")).json();
+  Plotly.newPlot(nome, spec.data, spec.layout, {responsive: true});
+});
+const totalPaginas = $paginas;
+let pagina = 1;
+async function mostrarPagina(numero) {
+  pagina = Math.min(Math.max(numero, 1), totalPaginas);
+  const linhas = await (await fetch("tabela/" + String(pagina).padStart(4, "0") + ".json")).json();
+  const colunas = linhas.length ? Object.keys(linhas[0]) : [];
+  const celula = (tag, texto) => { const el = document.createElement(tag); el.textContent = texto ?? ""; return el; };
+  const tabela = document.createElement("table");
+  const cabecalho = tabela.createTHead().insertRow();
+  colunas.forEach((c) => cabecalho.appendChild(celula("th", c)));
+  const corpo = tabela.createTBody();
+  linhas.forEach((linha) => { const tr = corpo.insertRow(); colunas.forEach((c) => tr.appendChild(celula("td", linha[c]))); });
+  document.getElementById("tabela").replaceChildren(tabela);
+  document.getElementById("pagina").textContent = pagina;
+}
+document.getElementById("anterior").onclick = () => mostrarPagina(pagina - 1);
+document.getElementById("proxima").onclick = () => mostrarPagina(pagina + 1);
+mostrarPagina(1);
+</script>
+</body>
+</html>
+""")
+
+
+def _milhoes(valor):
+    """Valor em milhões de reais, como nos cards trimestrais do app."""
+    return f"R$ {valor / 1_000_000:,.3f} Mi".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _gravar_json(caminho, dados):
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False)
+
+
+def renderizar_visao(tarefa):
+    """Gravar mapa, gráficos, tabela paginada e valores de uma visão.
+
+    Args:
+        tarefa: Tupla (visao, ufs, ufs_dataset, faixa, diretorio, linhas_pagina);
+            `ufs` None lê todas as UFs da origem
+
+    Returns:
+        Dicionário com os valores exibidos na página da visão, ou None se a
+        visão não tiver municípios
+    """
+    visao, ufs, ufs_dataset, faixa, diretorio, linhas_pagina = tarefa
+    inicio = time.perf_counter()
+    gdf = processar_dados_geograficos(ler_fonte(ufs))
+    uf_sel = list(ufs) if ufs else list(ufs_dataset)
+    gdf_filtrado = aplicar_filtros(gdf, uf_sel, [], CRITERIO, faixa)
+    if len(gdf_filtrado) == 0:
+        logger.warning("%s: nenhum município na faixa de %s", visao, CRITERIO)
+        return None
+
+    destino = os.path.join(diretorio, visao)
+    os.makedirs(os.path.join(destino, "graficos"))
+    os.makedirs(os.path.join(destino, "tabela"))
+
+    # Mesmo nível de detalhe da página inicial do app (regiões e UFs dissolvidas)
+    camada = None
+    if len(uf_sel) > 1:
+        camada = montar_niveis_mapa(gdf_filtrado, calcular_dissolucoes(gdf), uf_sel, set(ufs_dataset))
+    criar_mapa(gdf_filtrado if camada is None else camada, CRITERIO, mostrar_controle_camadas=True).save(
+        os.path.join(destino, "mapa.html")
+    )
+
+    graficos = {
+        "grafico_trimestral": montar_grafico_trimestral(gdf_filtrado),
+        "gauge": montar_gauge(gdf_filtrado),
+        "composicao_uf": montar_composicao_uf(medias_notas_uf(gdf, uf_sel)),
+    }
+    graficos = {nome: figura for nome, figura in graficos.items() if figura is not None}
+    for nome, figura in graficos.items():
+        with open(os.path.join(destino, "graficos", f"{nome}.json"), "w", encoding="utf-8") as arquivo:
+            arquivo.write(pio.to_json(figura, validate=False))
+
+    tabela = montar_tabela(gdf_filtrado)
+    paginas = max(1, -(-len(tabela) // linhas_pagina))
+    for numero in range(paginas):
+        pagina = tabela.iloc[numero * linhas_pagina:(numero + 1) * linhas_pagina]
+        pagina.to_json(os.path.join(destino, "tabela", f"{numero + 1:04d}.json"), orient="records",
+                       force_ascii=False)
+
+    dados = {
+        "visao": visao,
+        "ufs": uf_sel,
+        "municipios": len(gdf_filtrado),
+        "metricas": [{"rotulo": rotulo, "valor": valor} for _, rotulo, valor in calcular_metricas(gdf_filtrado)],
+        "totais_trimestrais": [float(total) for total in calcular_totais_trimestrais(gdf_filtrado)],
+        "graficos": list(graficos),
+        "paginas_tabela": paginas,
+    }
+    _gravar_json(os.path.join(destino, "dados.json"), dados)
+    logger.info("%s: %s municípios em %.1f s", visao, len(gdf_filtrado), time.perf_counter() - inicio)
+    return dados
+
+
+def _cards(itens):
+    return "".join(
+        f'<div class="card"><span>{html.escape(rotulo)}</span><strong>{html.escape(valor)}</strong></div>'
+        for rotulo, valor in itens
+    )
+
+
+def montar_pagina(dados, visoes, versao, gerado_em):
+    """HTML da página de uma visão, com os valores já calculados em `renderizar_visao`."""
+    navegacao = " | ".join(
+        f"<strong>{html.escape(visao)}</strong>" if visao == dados["visao"]
+        else f'<a href="../{visao}/index.html">{html.escape(visao)}</a>'
+        for visao in visoes
+    )
+    titulo = "Todas as UFs" if dados["visao"] == VISAO_NACIONAL else dados["visao"]
+    totais = [(f"{trimestre}º Trimestre", _milhoes(total))
+              for trimestre, total in enumerate(dados["totais_trimestrais"], start=1)]
+    return PAGINA.substitute(
+        titulo_pagina=html.escape(f'{APP_CONFIG["page_title"]} - {titulo}'),
+        cor=COLORS["primary"],
+        navegacao=navegacao,
+        titulo=html.escape(f'{titulo} ({dados["municipios"]} municípios)'),
+        metricas=_cards((metrica["rotulo"], metrica["valor"]) for metrica in dados["metricas"]),
+        totais=_cards(totais),
+        graficos=json.dumps(dados["graficos"]),
+        paginas=dados["paginas_tabela"],
+        versao=html.escape(str(versao)),
+        gerado_em=html.escape(gerado_em),
+    )
+
+
+def exportar(saida, ufs=None, processos=None, linhas_pagina=LINHAS_POR_PAGINA):
+    """Gerar o pacote estático da visão nacional e de cada UF.
+
+    O pacote é montado em um diretório temporário ao lado de `saida` e só
+    então colocado no lugar do anterior, que segue servido até a troca.
+
+    Args:
+        saida: Diretório do pacote
+        ufs: UFs exportadas (None = todas as do dataset)
+        processos: Número de processos (1 executa no processo atual)
+        linhas_pagina: Linhas da tabela de municípios por arquivo
+
+    Returns:
+        Conteúdo do `manifesto.json` gravado na raiz do pacote
+    """
+    saida = os.path.abspath(saida)
+    indice = montar_indice_municipios()
+    versao = versao_fonte()
+    ufs = [uf for uf in indice.ufs if ufs is None or uf in ufs]
+
+    pai = os.path.dirname(saida)
+    os.makedirs(pai, exist_ok=True)
+    temporario = tempfile.mkdtemp(prefix=".estatico-", dir=pai)
+    try:
+        # Visão nacional primeiro: é a mais demorada
+        tarefas = [(VISAO_NACIONAL, None, indice.ufs, indice.faixa_nota, temporario, linhas_pagina)]
+        tarefas += [(uf, (uf,), indice.ufs, indice.faixa_nota, temporario, linhas_pagina) for uf in ufs]
+        if processos == 1:
+            resultados = list(map(renderizar_visao, tarefas))
+        else:
+            with ProcessPoolExecutor(max_workers=processos) as executor:
+                resultados = list(executor.map(renderizar_visao, tarefas))
+
+        # Páginas montadas depois das visões: a navegação lista só as geradas
+        resultados = [dados for dados in resultados if dados is not None]
+        if not resultados:
+            raise ValueError(f"Nenhuma visão exportada: nenhum município na faixa de {CRITERIO}.")
+        visoes = [dados["visao"] for dados in resultados]
+        gerado_em = time.strftime("%Y-%m-%d %H:%M:%S")
+        for dados in resultados:
+            with open(os.path.join(temporario, dados["visao"], "index.html"), "w", encoding="utf-8") as arquivo:
+                arquivo.write(montar_pagina(dados, visoes, versao, gerado_em))
+        with open(os.path.join(temporario, "plotly.min.js"), "w", encoding="utf-8") as arquivo:
+            arquivo.write(plotly.offline.get_plotlyjs())
+        with open(os.path.join(temporario, "index.html"), "w", encoding="utf-8") as arquivo:
+            arquivo.write(f'<!DOCTYPE html><meta charset="utf-8">'
+                          f'<meta http-equiv="refresh" content="0; url={visoes[0]}/index.html">'
+                          f'<a href="{visoes[0]}/index.html">{APP_CONFIG["page_title"]}</a>')
+        manifesto = {"versao": versao, "gerado_em": gerado_em, "visoes": visoes}
+        _gravar_json(os.path.join(temporario, "manifesto.json"), manifesto)
+
+        antigo = None
+        if os.path.exists(saida):
+            antigo = tempfile.mkdtemp(prefix=".estatico-antigo-", dir=pai)
+            os.replace(saida, os.path.join(antigo, "pacote"))
+        os.replace(temporario, saida)
+        if antigo is not None:
+            shutil.rmtree(antigo)
+    except BaseException:
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+    return manifesto
+
+
+def main(argv=None):
+    """Gerar o pacote estático pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Exportação estática do dashboard por UF")
+    parser.add_argument("--saida", required=True, help="Diretório do pacote estático")
+    parser.add_argument("--ufs", nargs="*", default=None, help="UFs exportadas (padrão: todas)")
+    parser.add_argument("--processos", type=int, default=None)
+    parser.add_argument("--linhas-pagina", type=int, default=LINHAS_POR_PAGINA)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    manifesto = exportar(args.saida, ufs=args.ufs, processos=args.processos, linhas_pagina=args.linhas_pagina)
+    logger.info("Pacote com %s visões gravado em %s", len(manifesto["visoes"]), args.saida)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Exportação da seleção filtrada para GeoPackage, GeoParquet e CSV.
+
+Os arquivos são gravados em disco em lotes de linhas (o arquivo final nunca é
+montado em memória) e ficam em cache pela combinação de versão do dataset,
+seleção e formato: exportar de novo a mesma seleção reaproveita o arquivo. No
+diretório padrão (`static/exportacoes`) o próprio Streamlit serve os arquivos
+(`server.enableStaticServing`), lidos do disco a cada download.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyogrio
+import shapely
+from mda_app.config.settings import DATA_CONFIG
+
+# Extensão e tipo MIME de cada formato de exportação
+FORMATOS = {
+    "gpkg": (".gpkg", "application/geopackage+sqlite3"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "csv": (".csv", "text/csv"),
+}
+
+# Linhas gravadas por lote
+TAMANHO_LOTE = 2_000
+
+# Quantidade de arquivos exportados mantidos no diretório de cache
+LIMITE_EXPORTACOES = 32
+
+CAMADA_GPKG = "precificacao"
+
+# Diretório servido pelo Streamlit em app/static/ (ao lado de main.py)
+DIRETORIO_ESTATICO = "static"
+
+# Tamanho máximo de um arquivo servido pelo Streamlit (200 MB)
+LIMITE_ARQUIVO_ESTATICO = 200 * 1024 * 1024
+
+
+def _lotes(gdf, tamanho_lote):
+    for inicio in range(0, len(gdf), tamanho_lote):
+        yield gdf.iloc[inicio:inicio + tamanho_lote]
+
+
+def _atributos(df):
+    """Colunas de atributos exportadas (sem geometria e sem o fid interno)."""
+    return df.drop(columns=[c for c in (df.geometry.name, "fid") if c in df.columns])
+
+
+def _gravar_csv(gdf, caminho, tamanho_lote):
+    with open(caminho, "w", encoding="utf-8", newline="") as arquivo:
+        for numero, lote in enumerate(_lotes(gdf, tamanho_lote)):
+            _atributos(lote).to_csv(arquivo, header=numero == 0, index=False)
+
+
+def _gravar_gpkg(gdf, caminho, tamanho_lote):
+    for numero, lote in enumerate(_lotes(gdf, tamanho_lote)):
+        lote = lote.drop(columns=[c for c in ("fid",) if c in lote.columns])
+        pyogrio.write_dataframe(lote, caminho, layer=CAMADA_GPKG, driver="GPKG", append=numero > 0)
+
+
+def _metadados_geoparquet(gdf):
+    """Metadados `geo` (GeoParquet 1.0) da coluna de geometria em WKB."""
+    coluna = {"encoding": "WKB", "geometry_types": sorted(set(gdf.geom_type.dropna()))}
+    if gdf.crs is not None:
+        coluna["crs"] = gdf.crs.to_json_dict()
+    return {"version": "1.0.0", "primary_column": "geometry", "columns": {"geometry": coluna}}
+
+
+def _gravar_parquet(gdf, caminho, tamanho_lote):
+    esquema = None
+    escritor = None
+    try:
+        for lote in _lotes(gdf, tamanho_lote):
+            tabela = pa.Table.from_pandas(_atributos(lote), preserve_index=False)
+            tabela = tabela.append_column("geometry", pa.array(shapely.to_wkb(lote.geometry.values), pa.binary()))
+            if escritor is None:
+                metadados = dict(tabela.schema.metadata or {})
+                metadados[b"geo"] = json.dumps(_metadados_geoparquet(gdf)).encode()
+                esquema = tabela.schema.with_metadata(metadados)
+                escritor = pq.ParquetWriter(caminho, esquema)
+            escritor.write_table(tabela.cast(esquema))
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+_GRAVADORES = {"gpkg": _gravar_gpkg, "parquet": _gravar_parquet, "csv": _gravar_csv}
+
+
+def gravar_exportacao(gdf, formato, caminho, tamanho_lote=TAMANHO_LOTE):
+    """Gravar `gdf` em `caminho` no formato pedido, lote a lote."""
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação inválido: {formato}")
+    _GRAVADORES[formato](gdf, caminho, tamanho_lote)
+
+
+def diretorio_exportacoes():
+    """Diretório onde os arquivos exportados ficam em cache."""
+    diretorio = DATA_CONFIG["exportacoes"] or os.path.join(tempfile.gettempdir(), "mda_exportacoes")
+    os.makedirs(diretorio, exist_ok=True)
+    return diretorio
+
+
+def url_download(caminho):
+    """URL relativa (app/static/...) de um arquivo exportado, ou None se o Streamlit não o serve.
+
+    Só arquivos dentro de `DIRETORIO_ESTATICO` e até `LIMITE_ARQUIVO_ESTATICO`
+    são servidos.
+    """
+    estatico = os.path.abspath(DIRETORIO_ESTATICO)
+    absoluto = os.path.abspath(caminho)
+    if os.path.commonpath([absoluto, estatico]) != estatico or os.path.getsize(absoluto) > LIMITE_ARQUIVO_ESTATICO:
+        return None
+    return "app/static/" + os.path.relpath(absoluto, estatico).replace(os.sep, "/")
+
+
+def _limpar_antigos(diretorio, limite):
+    """Remover os arquivos exportados mais antigos além do limite."""
+    arquivos = [os.path.join(diretorio, nome) for nome in os.listdir(diretorio) if not nome.endswith(".tmp")]
+    arquivos.sort(key=os.path.getmtime, reverse=True)
+    for antigo in arquivos[limite:]:
+        try:
+            os.remove(antigo)
+        except OSError:
+            pass
+
+
+def exportar_selecao(gdf, formato, versao, selecao, diretorio=None, tamanho_lote=TAMANHO_LOTE):
+    """Obter o arquivo exportado da seleção, gerando-o apenas se ainda não existir.
+
+    Args:
+        gdf: GeoDataFrame filtrado
+        formato: "gpkg", "parquet" ou "csv"
+        versao: Versão do dataset de origem
+        selecao: Valor que identifica a seleção (filtros aplicados)
+        diretorio: Diretório de cache (padrão: `diretorio_exportacoes()`)
+
+    Returns:
+        Caminho do arquivo exportado
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de exportação inválido: {formato}")
+    diretorio = diretorio or diretorio_exportacoes()
+    chave = hashlib.sha256(f"{versao}:{selecao!r}:{formato}".encode()).hexdigest()[:24]
+    caminho = os.path.join(diretorio, f"{chave}{FORMATOS[formato][0]}")
+    if os.path.exists(caminho):
+        os.utime(caminho)
+        return caminho
+
+    # Gravação em arquivo temporário exclusivo: sessões simultâneas não se misturam
+    descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix=".tmp")
+    os.close(descritor)
+    os.remove(temporario)
+    try:
+        gravar_exportacao(gdf, formato, temporario, tamanho_lote)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    _limpar_antigos(diretorio, LIMITE_EXPORTACOES)
+    return caminho
@@ -0,0 +1,23 @@
+"""Filtros aplicados ao conjunto de dados municipal."""
+
+
+def aplicar_filtros(gdf, uf_sel, municipios_sel, criterio_sel, crit_sel):
+    """Aplicar filtros aos dados."""
+    # Determinar qual coluna de nome usar
+    coluna_nome = 'mun_nome' if 'mun_nome' in gdf.columns else 'NM_MUN'
+    
+    # Começar com todos os dados
+    gdf_filtrado = gdf.copy()
+    
+    # Aplicar filtro de UF se houver seleção
+    if uf_sel:
+        gdf_filtrado = gdf_filtrado[gdf_filtrado["SIGLA_UF"].isin(uf_sel)]
+    
+    # Aplicar filtro de Município se houver seleção
+    if municipios_sel:
+        gdf_filtrado = gdf_filtrado[gdf_filtrado[coluna_nome].isin(municipios_sel)]
+    
+    # Aplicar filtro de critério (sempre aplicado)
+    gdf_filtrado = gdf_filtrado[gdf_filtrado[criterio_sel].between(*crit_sel)]
+    
+    return gdf_filtrado
@@ -0,0 +1,247 @@
+"""Localização e precificação em lote de coordenadas e parcelas.
+
+Todas as entradas de um lote são localizadas de uma vez, por uma consulta
+vetorizada ao índice espacial dos municípios: um ponto fica no município que o
+contém e uma parcela no município com a maior área de interseção. Cada
+entrada recebe as notas do município e o valor por hectare de cada trimestre
+pela faixa da nota total (Tabela de Rendimento e Preço); parcelas recebem
+também a área (EPSG:5880) e o valor de cada trimestre. Arquivos grandes são
+lidos e gravados em lotes. Uso:
+
+    python -m mda_app.core.geolocalizacao --entrada imoveis.csv --saida precos.csv
+"""
+
+import argparse
+import json
+import logging
+import os
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import pyogrio
+import shapely
+from pyproj import CRS
+from pyproj.exceptions import CRSError
+from mda_app.config.settings import DATA_CONFIG
+from mda_app.core import postgis
+from mda_app.core.leitor import ler_dataset
+from mda_app.core.precificacao import calcular_valores_por_nota
+from mda_app.core.trimestres import TRIMESTRES, colunas_trimestrais
+
+logger = logging.getLogger(__name__)
+
+# Sistema projetado usado no cálculo da área das parcelas
+CRS_METRICO = "EPSG:5880"
+
+# Entradas lidas, localizadas e gravadas por lote
+TAMANHO_LOTE = 50_000
+
+# Colunas dos municípios usadas na localização
+COLUNAS_MUNICIPIOS = ["CD_MUN", "NM_MUN", "mun_nome", "SIGLA_UF", "nota_media", *colunas_trimestrais("nota_total")]
+
+# Pares de colunas de coordenadas aceitos em CSV (sem distinção de maiúsculas)
+COLUNAS_COORDENADAS = [("longitude", "latitude"), ("lon", "lat"), ("x", "y")]
+
+# Colunas com geometria em WKT aceitas em CSV
+COLUNAS_WKT = ["wkt", "geometria", "geometry"]
+
+
+def ler_municipios():
+    """Ler as geometrias originais dos municípios da origem configurada, em EPSG:4326.
+
+    No PostGIS as geometrias não são simplificadas: a localização usa os limites
+    exatos.
+    """
+    if DATA_CONFIG["backend"] == "postgis":
+        return postgis.ler_postgis(colunas=COLUNAS_MUNICIPIOS, tolerancia=0)
+    return ler_dataset(colunas=COLUNAS_MUNICIPIOS).to_crs(epsg=4326)
+
+
+class LocalizadorMunicipios:
+    """Índice espacial dos municípios com as notas e o preço por hectare de cada trimestre.
+
+    Args:
+        municipios: GeoDataFrame dos municípios (SIGLA_UF e `nota_total_q1`..`q4`)
+    """
+
+    def __init__(self, municipios):
+        if municipios.crs is not None:
+            municipios = municipios.to_crs(epsg=4326)
+        self.geometrias = municipios.geometry.to_numpy()
+        self.arvore = municipios.sindex
+
+        coluna_nome = "mun_nome" if "mun_nome" in municipios.columns else "NM_MUN"
+        atributos = {"CD_MUN": None, "municipio": coluna_nome, "SIGLA_UF": None, "nota_media": None}
+        self.atributos = pd.DataFrame({
+            nome: municipios[coluna or nome].to_numpy()
+            for nome, coluna in atributos.items() if (coluna or nome) in municipios.columns
+        })
+        for q, coluna in zip(TRIMESTRES, colunas_trimestrais("nota_total")):
+            notas = municipios[coluna].to_numpy(dtype=float)
+            self.atributos[coluna] = notas
+            self.atributos[f"valor_ha_q{q}"] = calcular_valores_por_nota(notas, np.ones(len(notas)))
+
+    def localizar(self, geometrias):
+        """Posição do município de cada geometria (EPSG:4326), ou -1 fora dos municípios.
+
+        Pontos na divisa ficam no município de menor posição; parcelas que
+        cruzam a divisa, no de maior área de interseção.
+        """
+        geometrias = np.asarray(geometrias, dtype=object)
+        posicoes = np.full(len(geometrias), -1, dtype=np.int64)
+        # Pares (entrada, município) que se intersectam
+        pos_entrada, pos_municipio = self.arvore.query(geometrias, predicate="intersects")
+        if len(pos_entrada) == 0:
+            return posicoes
+
+        # Interseção calculada só para parcelas com mais de um município candidato
+        candidatos = np.bincount(pos_entrada, minlength=len(geometrias))
+        disputa = (candidatos[pos_entrada] > 1) & (shapely.get_dimensions(geometrias[pos_entrada]) == 2)
+        peso = np.zeros(len(pos_entrada))
+        peso[disputa] = shapely.area(shapely.intersection(
+            geometrias[pos_entrada[disputa]], self.geometrias[pos_municipio[disputa]]
+        ))
+
+        ordem = np.lexsort((pos_municipio, -peso, pos_entrada))
+        pos_entrada, pos_municipio = pos_entrada[ordem], pos_municipio[ordem]
+        primeiro = np.r_[True, pos_entrada[1:] != pos_entrada[:-1]]
+        posicoes[pos_entrada[primeiro]] = pos_municipio[primeiro]
+        return posicoes
+
+    def precificar(self, entradas):
+        """Localizar e precificar as entradas.
+
+        Args:
+            entradas: GeoDataFrame de pontos e/ou parcelas (sem CRS = EPSG:4326)
+
+        Returns:
+            DataFrame com os atributos das entradas seguidos do município, das
+            notas, de `valor_ha_q1`..`q4` e, para parcelas, de `area_ha` e
+            `valor_q1`..`q4`; entradas fora dos municípios ficam com valores
+            nulos. Colunas de entrada com o mesmo nome ganham o sufixo `_entrada`.
+        """
+        geometrias = entradas.geometry
+        if geometrias.crs is None:
+            geometrias = geometrias.set_crs(epsg=4326)
+        posicoes = self.localizar(geometrias.to_crs(epsg=4326).to_numpy())
+
+        resultado = self.atributos.reindex(posicoes).reset_index(drop=True)
+        parcela = (shapely.get_dimensions(geometrias.to_numpy()) == 2) & (posicoes >= 0)
+        area_ha = np.full(len(entradas), np.nan)
+        if parcela.any():
+            area_ha[parcela] = geometrias[parcela].to_crs(CRS_METRICO).area.to_numpy() / 10_000
+        resultado["area_ha"] = area_ha
+        for q in TRIMESTRES:
+            resultado[f"valor_q{q}"] = area_ha * resultado[f"valor_ha_q{q}"].to_numpy()
+
+        originais = pd.DataFrame(entradas.drop(columns=entradas.geometry.name)).reset_index(drop=True)
+        originais = originais.rename(columns={c: f"{c}_entrada" for c in originais.columns if c in resultado.columns})
+        return pd.concat([originais, resultado], axis=1)
+
+
+def _geometrias_csv(df, crs):
+    """Montar as geometrias de um lote de CSV por colunas de coordenadas ou WKT."""
+    nomes = {str(coluna).lower(): coluna for coluna in df.columns}
+    for x, y in COLUNAS_COORDENADAS:
+        if x in nomes and y in nomes:
+            geometria = gpd.points_from_xy(pd.to_numeric(df[nomes[x]], errors="coerce"),
+                                           pd.to_numeric(df[nomes[y]], errors="coerce"))
+            return gpd.GeoDataFrame(df, geometry=geometria, crs=crs)
+    for coluna in COLUNAS_WKT:
+        if coluna in nomes:
+            wkt = df[nomes[coluna]]
+            # Células vazias viram None (NaN não é aceito por from_wkt); WKT inválido vira geometria nula
+            geometria = shapely.from_wkt(wkt.astype(object).where(wkt.notna(), None).to_numpy(), on_invalid="ignore")
+            return gpd.GeoDataFrame(df.drop(columns=nomes[coluna]), geometry=geometria, crs=crs)
+    raise ValueError("CSV sem colunas de coordenadas (longitude/latitude, lon/lat ou x/y) nem de geometria WKT")
+
+
+def ler_entradas(caminho, tamanho_lote=TAMANHO_LOTE, crs=None):
+    """Ler pontos ou parcelas em lotes, sem carregar o arquivo inteiro.
+
+    Aceita CSV e Parquet sem metadados GeoParquet (coordenadas ou WKT, no CRS
+    `crs`, padrão EPSG:4326), GeoParquet e os formatos vetoriais do GDAL
+    (GeoPackage, GeoJSON, Shapefile em .zip...). CRS inválido levanta ValueError.
+
+    Yields:
+        GeoDataFrame de cada lote
+    """
+    try:
+        crs = CRS.from_user_input(crs or "EPSG:4326")
+    except CRSError as erro:
+        raise ValueError(f"CRS inválido: {crs}") from erro
+
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao in (".csv", ".txt"):
+        for lote in pd.read_csv(caminho, chunksize=tamanho_lote):
+            yield _geometrias_csv(lote, crs)
+        return
+
+    if extensao in (".parquet", ".geoparquet"):
+        arquivo = pq.ParquetFile(caminho)
+        if b"geo" not in (arquivo.schema_arrow.metadata or {}):
+            # Parquet comum: coordenadas ou WKT como no CSV
+            for lote in arquivo.iter_batches(batch_size=tamanho_lote):
+                yield _geometrias_csv(lote.to_pandas(), crs)
+            return
+        geo = json.loads(arquivo.schema_arrow.metadata[b"geo"])
+        coluna = geo["primary_column"]
+        metadados = geo["columns"][coluna]
+        crs_arquivo = CRS.from_json_dict(metadados["crs"]) if metadados.get("crs") else "OGC:CRS84"
+        # Coluna de bbox ("covering") não é atributo
+        ignoradas = {coluna, *(campo[0] for campo in metadados.get("covering", {}).get("bbox", {}).values())}
+        for lote in arquivo.iter_batches(batch_size=tamanho_lote):
+            df = lote.to_pandas()
+            geometria = shapely.from_wkb(df[coluna].to_numpy())
+            yield gpd.GeoDataFrame(df.drop(columns=[c for c in ignoradas if c in df.columns]), geometry=geometria,
+                                   crs=crs_arquivo)
+        return
+
+    with pyogrio.open_arrow(caminho, batch_size=tamanho_lote, use_pyarrow=True) as (meta, leitor):
+        coluna = meta["geometry_name"] or "wkb_geometry"
+        for lote in leitor:
+            df = lote.to_pandas()
+            geometria = shapely.from_wkb(df[coluna].to_numpy())
+            yield gpd.GeoDataFrame(df.drop(columns=coluna), geometry=geometria, crs=meta["crs"] or crs)
+
+
+def precificar_arquivo(entrada, saida, localizador, crs=None, tamanho_lote=TAMANHO_LOTE):
+    """Localizar e precificar um arquivo de pontos ou parcelas, gravando um CSV lote a lote.
+
+    Returns:
+        Resumo: entradas, entradas localizadas, área das parcelas (ha) e valor
+        total de cada trimestre (R$)
+    """
+    resumo = {"entradas": 0, "localizadas": 0, "area_ha": 0.0, "valores": [0.0] * len(TRIMESTRES)}
+    with open(saida, "w", encoding="utf-8", newline="") as arquivo:
+        for numero, lote in enumerate(ler_entradas(entrada, tamanho_lote, crs)):
+            precos = localizador.precificar(lote)
+            precos.to_csv(arquivo, header=numero == 0, index=False)
+            resumo["entradas"] += len(precos)
+            resumo["localizadas"] += int(precos["SIGLA_UF"].notna().sum())
+            resumo["area_ha"] += float(np.nansum(precos["area_ha"]))
+            for j, q in enumerate(TRIMESTRES):
+                resumo["valores"][j] += float(np.nansum(precos[f"valor_q{q}"]))
+            logger.info("%s entradas processadas", resumo["entradas"])
+    return resumo
+
+
+def main(argv=None):
+    """Precificar um arquivo pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Localização e precificação em lote de pontos e parcelas")
+    parser.add_argument("--entrada", required=True, help="CSV, GeoParquet, GeoPackage, GeoJSON...")
+    parser.add_argument("--saida", required=True, help="CSV de saída")
+    parser.add_argument("--crs", default=None, help="CRS das coordenadas do CSV ou Parquet (padrão: EPSG:4326)")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    resumo = precificar_arquivo(args.entrada, args.saida, LocalizadorMunicipios(ler_municipios()), args.crs,
+                                args.lote)
+    logger.info("%s de %s entradas localizadas", resumo["localizadas"], resumo["entradas"])
+
+
+if __name__ == "__main__":
+    main()
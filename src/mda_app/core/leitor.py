@@ -0,0 +1,155 @@
+"""Leitura projetada do conjunto de dados de origem.
+
+Lê apenas as colunas, UFs e a extensão (bbox) pedidas, sem carregar o arquivo
+inteiro: GeoJSON/GeoPackage via pyogrio com Arrow e GeoParquet via pyarrow,
+com filtros empurrados para o leitor. `ler_em_lotes` devolve RecordBatches
+Arrow para quem processa os dados em fluxo.
+"""
+
+import hashlib
+import json
+import os
+
+import geopandas as gpd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import pyogrio
+import shapely
+from mda_app.config.settings import DATA_CONFIG
+
+# Colunas usadas para montar as opções dos filtros
+COLUNAS_FILTROS = ["SIGLA_UF", "CD_MUN", "NM_MUN", "mun_nome", "ckey", "nota_media"]
+
+
+def _eh_parquet(caminho):
+    return os.path.splitext(caminho)[1].lower() in (".parquet", ".geoparquet")
+
+
+def _coluna_geometria_parquet(esquema):
+    """Coluna de geometria principal declarada nos metadados GeoParquet."""
+    metadados = (esquema.metadata or {}).get(b"geo")
+    return json.loads(metadados)["primary_column"] if metadados else None
+
+
+def filtro_ufs_no_leitor(caminho=None):
+    """Se o filtro por UF é aplicado na leitura sem percorrer o arquivo inteiro (GeoParquet)."""
+    return _eh_parquet(caminho or DATA_CONFIG["dataset"])
+
+
+def _dataset_parquet(caminho, ufs):
+    """Dataset Arrow e expressão de filtro por UF (aplicada durante a leitura)."""
+    filtro = ds.field("SIGLA_UF").isin(list(ufs)) if ufs else None
+    return ds.dataset(caminho, format="parquet"), filtro
+
+
+def colunas_disponiveis(caminho=None):
+    """Listar as colunas de atributos do arquivo (sem a geometria), lendo só os metadados."""
+    caminho = caminho or DATA_CONFIG["dataset"]
+    if _eh_parquet(caminho):
+        esquema = pq.read_schema(caminho)
+        geometria = _coluna_geometria_parquet(esquema)
+        ignoradas = {geometria}
+        if geometria:
+            # Coluna de bbox ("covering") do GeoParquet não é atributo
+            cobertura = json.loads(esquema.metadata[b"geo"])["columns"][geometria].get("covering", {})
+            ignoradas.update(caminho_campo[0] for caminho_campo in cobertura.get("bbox", {}).values())
+        return [nome for nome in esquema.names if nome not in ignoradas]
+    return list(pyogrio.read_info(caminho)["fields"])
+
+
+def versao_dataset(caminho=None):
+    """Identificar a versão do arquivo de dados pelo caminho, tamanho e data de modificação."""
+    caminho = caminho or DATA_CONFIG["dataset"]
+    info = os.stat(caminho)
+    assinatura = f"{os.path.abspath(caminho)}:{info.st_size}:{info.st_mtime_ns}"
+    return hashlib.sha256(assinatura.encode()).hexdigest()[:16]
+
+
+def _filtro_ufs(ufs):
+    """Cláusula SQL (OGR) de filtro por UF."""
+    valores = ", ".join("'" + str(uf).replace("'", "''") + "'" for uf in ufs)
+    return f'"SIGLA_UF" IN ({valores})'
+
+
+def _projetar(caminho, colunas):
+    """Manter só as colunas pedidas que existem no arquivo (None = todas)."""
+    if colunas is None:
+        return None
+    existentes = set(colunas_disponiveis(caminho))
+    return [coluna for coluna in colunas if coluna in existentes]
+
+
+def ler_dataset(caminho=None, colunas=None, ufs=None, bbox=None, geometria=True):
+    """Ler o dataset com projeção de colunas e filtros por UF e extensão.
+
+    Args:
+        caminho: GeoJSON, GeoPackage ou GeoParquet (padrão: configuração)
+        colunas: Colunas de atributos a ler; ausentes no arquivo são ignoradas (None = todas)
+        ufs: Lista de UFs a manter (None = todas)
+        bbox: (xmin, ymin, xmax, ymax) no CRS do arquivo
+        geometria: Se False, não lê as geometrias e devolve um DataFrame
+
+    Returns:
+        GeoDataFrame (ou DataFrame quando `geometria` é False)
+    """
+    caminho = caminho or DATA_CONFIG["dataset"]
+    colunas = _projetar(caminho, colunas)
+
+    if _eh_parquet(caminho):
+        if not geometria:
+            dataset, filtro = _dataset_parquet(caminho, ufs)
+            return dataset.to_table(columns=colunas, filter=filtro).to_pandas()
+        esquema = pq.read_schema(caminho)
+        coluna_geometria = _coluna_geometria_parquet(esquema)
+        if colunas is not None:
+            colunas = colunas + [coluna_geometria]
+        filtros = [("SIGLA_UF", "in", list(ufs))] if ufs else None
+        # Filtro por extensão no leitor só quando o arquivo tem a coluna de bbox ("covering")
+        cobertura = "covering" in json.loads(esquema.metadata[b"geo"])["columns"][coluna_geometria]
+        gdf = gpd.read_parquet(caminho, columns=colunas, filters=filtros, bbox=bbox if cobertura else None)
+        if bbox is not None and not cobertura:
+            gdf = gdf[gdf.intersects(shapely.box(*bbox))]
+        return gdf
+
+    return pyogrio.read_dataframe(
+        caminho,
+        columns=colunas,
+        where=_filtro_ufs(ufs) if ufs else None,
+        bbox=bbox,
+        read_geometry=geometria,
+        use_arrow=True,
+    )
+
+
+def ler_em_lotes(caminho=None, colunas=None, ufs=None, bbox=None, tamanho_lote=10_000):
+    """Ler o dataset em RecordBatches Arrow (geometria em WKB), sem materializar o arquivo.
+
+    Yields:
+        pyarrow.RecordBatch com as colunas pedidas e a geometria
+    """
+    caminho = caminho or DATA_CONFIG["dataset"]
+    colunas = _projetar(caminho, colunas)
+
+    if _eh_parquet(caminho):
+        dataset, filtro = _dataset_parquet(caminho, ufs)
+        coluna_geometria = _coluna_geometria_parquet(dataset.schema)
+        if colunas is not None:
+            colunas = colunas + [coluna_geometria]
+        extensao = shapely.box(*bbox) if bbox is not None else None
+        for lote in dataset.to_batches(columns=colunas, filter=filtro, batch_size=tamanho_lote):
+            if extensao is not None:
+                geometrias = shapely.from_wkb(lote.column(coluna_geometria).to_numpy(zero_copy_only=False))
+                lote = lote.filter(shapely.intersects(geometrias, extensao))
+            if lote.num_rows:
+                yield lote
+        return
+
+    with pyogrio.open_arrow(
+        caminho,
+        columns=colunas,
+        where=_filtro_ufs(ufs) if ufs else None,
+        bbox=bbox,
+        batch_size=tamanho_lote,
+        use_pyarrow=True,
+    ) as (_, leitor):
+        yield from leitor
@@ -0,0 +1,169 @@
+"""Leitura dos dados municipais direto do PostGIS onde eles são produzidos.
+
+Alternativa ao arquivo exportado (`MDA_BACKEND=postgis`): as consultas usam
+conexões de um pool compartilhado pelo processo, os filtros de UF e município
+rodam no banco e as geometrias chegam já simplificadas
+(`ST_SimplifyPreserveTopology`), em WKB e em EPSG:4326. Requer psycopg2.
+"""
+
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+
+import geopandas as gpd
+import pandas as pd
+import shapely
+from mda_app.config.settings import DATA_CONFIG
+from mda_app.utils.paralelo import TRABALHADORES
+
+_pools = {}
+_trava_pools = threading.Lock()
+
+
+def _importar_psycopg2():
+    try:
+        import psycopg2
+        import psycopg2.pool
+    except ImportError as erro:
+        raise ImportError("O backend PostGIS requer psycopg2: pip install psycopg2-binary") from erro
+    return psycopg2
+
+
+def obter_pool(dsn=None):
+    """Pool de conexões do DSN, criado no primeiro uso e compartilhado pelas sessões.
+
+    Returns:
+        Tupla (pool, semáforo com uma vaga por conexão do pool)
+    """
+    dsn = dsn or DATA_CONFIG["postgis_dsn"]
+    if not dsn:
+        raise ValueError("Defina MDA_POSTGIS_DSN para usar o backend PostGIS.")
+    with _trava_pools:
+        if dsn not in _pools:
+            psycopg2 = _importar_psycopg2()
+            _pools[dsn] = (psycopg2.pool.ThreadedConnectionPool(1, TRABALHADORES, dsn),
+                           threading.BoundedSemaphore(TRABALHADORES))
+        return _pools[dsn]
+
+
+@contextmanager
+def conexao(dsn=None):
+    """Emprestar uma conexão somente leitura do pool; conexões quebradas são descartadas.
+
+    Com todas as conexões emprestadas, espera uma ser devolvida (o pool do
+    psycopg2 levantaria PoolError).
+    """
+    pool, vagas = obter_pool(dsn)
+    with vagas:
+        con = pool.getconn()
+        try:
+            if not con.autocommit:
+                con.set_session(readonly=True, autocommit=True)
+            yield con
+        finally:
+            pool.putconn(con, close=bool(con.closed))
+
+
+def _identificador(nome):
+    """Identificador SQL entre aspas; aceita nomes qualificados (`esquema.tabela`)."""
+    return ".".join('"' + parte.replace('"', '""') + '"' for parte in str(nome).split("."))
+
+
+def montar_consulta(tabela, colunas, geometria="geom", ufs=None, municipios=None, coluna_nome="NM_MUN",
+                    tolerancia=0.0):
+    """Montar o SELECT da seleção com filtros e simplificação no servidor.
+
+    Args:
+        tabela: Tabela (ou `esquema.tabela`) com os municípios
+        colunas: Colunas de atributos a ler
+        geometria: Coluna de geometria (None = sem geometria)
+        ufs: UFs a manter (vazio = todas)
+        municipios: Municípios a manter, por nome, CD_MUN ou ckey (vazio = todos)
+        coluna_nome: Coluna com o nome do município
+        tolerancia: Tolerância da simplificação em graus (0 = geometria original)
+
+    Returns:
+        Tupla (sql, parâmetros) no formato do psycopg2
+    """
+    selecionadas = [_identificador(coluna) for coluna in colunas]
+    parametros = []
+    if geometria:
+        expressao = f"ST_Transform({_identificador(geometria)}, 4326)"
+        if tolerancia:
+            expressao = f"ST_SimplifyPreserveTopology({expressao}, %s)"
+            parametros.append(float(tolerancia))
+        selecionadas.append(f'ST_AsBinary({expressao}) AS "geometry"')
+
+    condicoes = []
+    if ufs:
+        condicoes.append('"SIGLA_UF" = ANY(%s)')
+        parametros.append([str(uf) for uf in ufs])
+    if municipios:
+        chaves = [_identificador(c) for c in (coluna_nome, "CD_MUN", "ckey") if c in colunas]
+        condicoes.append("(" + " OR ".join(f"{chave}::text = ANY(%s)" for chave in chaves) + ")")
+        parametros.extend([str(m) for m in municipios] for _ in chaves)
+
+    sql = f"SELECT {', '.join(selecionadas)} FROM {_identificador(tabela)}"
+    if condicoes:
+        sql += " WHERE " + " AND ".join(condicoes)
+    return sql, parametros
+
+
+def _colunas_tabela(cursor, tabela):
+    """Nomes das colunas da tabela, sem ler linhas."""
+    cursor.execute(f"SELECT * FROM {_identificador(tabela)} LIMIT 0")
+    return [descricao[0] for descricao in cursor.description]
+
+
+def ler_postgis(ufs=None, municipios=None, colunas=None, geometria=True, tolerancia=None, dsn=None,
+                tabela=None):
+    """Ler os municípios do PostGIS com filtros e simplificação no servidor.
+
+    Args:
+        ufs: UFs a manter (None = todas)
+        municipios: Municípios a manter, por nome, CD_MUN ou ckey (None = todos)
+        colunas: Colunas de atributos a ler; ausentes na tabela são ignoradas (None = todas)
+        geometria: Se False, não lê as geometrias e devolve um DataFrame
+        tolerancia: Tolerância da simplificação em graus (padrão: configuração)
+        dsn, tabela: Conexão e tabela (padrão: configuração)
+
+    Returns:
+        GeoDataFrame em EPSG:4326 (ou DataFrame quando `geometria` é False)
+    """
+    tabela = tabela or DATA_CONFIG["postgis_tabela"]
+    coluna_geometria = DATA_CONFIG["postgis_geometria"]
+    tolerancia = DATA_CONFIG["postgis_simplificacao"] if tolerancia is None else tolerancia
+
+    with conexao(dsn) as con, con.cursor() as cursor:
+        existentes = [c for c in _colunas_tabela(cursor, tabela) if c != coluna_geometria]
+        colunas = existentes if colunas is None else [c for c in colunas if c in existentes]
+        coluna_nome = "mun_nome" if "mun_nome" in existentes else "NM_MUN"
+        sql, parametros = montar_consulta(
+            tabela, colunas, coluna_geometria if geometria else None, ufs, municipios, coluna_nome, tolerancia
+        )
+        cursor.execute(sql, parametros)
+        nomes = [descricao[0] for descricao in cursor.description]
+        df = pd.DataFrame(cursor.fetchall(), columns=nomes)
+
+    # Colunas NUMERIC chegam como Decimal
+    for coluna in df.columns:
+        amostra = df[coluna].dropna()
+        if len(amostra) and isinstance(amostra.iloc[0], Decimal):
+            df[coluna] = df[coluna].astype(float)
+
+    if not geometria:
+        return df
+    geometrias = shapely.from_wkb([bytes(valor) if valor is not None else None for valor in df["geometry"]])
+    return gpd.GeoDataFrame(df.drop(columns="geometry"), geometry=geometrias, crs="EPSG:4326")
+
+
+def versao_tabela(dsn=None, tabela=None):
+    """Versão dos dados da tabela: muda a cada linha inserida, alterada ou removida.
+
+    Combina o número de linhas com o maior `xmin` (transação que gravou a linha).
+    """
+    tabela = tabela or DATA_CONFIG["postgis_tabela"]
+    with conexao(dsn) as con, con.cursor() as cursor:
+        cursor.execute(f"SELECT count(*), coalesce(max(xmin::text::bigint), 0) FROM {_identificador(tabela)}")
+        linhas, transacao = cursor.fetchone()
+    return f"postgis:{linhas}:{transacao}"
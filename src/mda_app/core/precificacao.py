@@ -0,0 +1,124 @@
+"""Regras de precificação e agregações dos dados municipais."""
+
+import numpy as np
+
+# Faixas da Tabela de Rendimento e Preço (limite superior da pontuação, R$/ha)
+FAIXAS_PRECO = [
+    (15, 49.83),
+    (25, 59.80),
+    (35, 104.78),
+    (45, 134.88),
+    (55, 164.95),
+    (np.inf, 202.87),
+]
+
+_LIMITES_FAIXAS = np.array([limite for limite, _ in FAIXAS_PRECO[:-1]], dtype=float)
+_PRECOS_FAIXAS = np.array([preco for _, preco in FAIXAS_PRECO], dtype=float)
+
+
+def calcular_valor_por_nota(pontuacao, area):
+    """Calcula valor baseado na pontuação e área."""
+    if pontuacao <= 15:
+        return area * 49.83
+    elif pontuacao <= 25:
+        return area * 59.80
+    elif pontuacao <= 35:
+        return area * 104.78
+    elif pontuacao <= 45:
+        return area * 134.88
+    elif pontuacao <= 55:
+        return area * 164.95
+    else:
+        return area * 202.87
+
+
+def calcular_valores_por_nota(pontuacoes, areas):
+    """Versão vetorizada de `calcular_valor_por_nota` para arrays/Series."""
+    pontuacoes = np.asarray(pontuacoes, dtype=float)
+    faixas = np.searchsorted(_LIMITES_FAIXAS, pontuacoes, side="left")
+    return np.asarray(areas, dtype=float) * _PRECOS_FAIXAS[faixas]
+
+
+def calcular_totais_trimestrais(gdf):
+    """Calcular o valor total de cada trimestre pela nota total do período.
+
+    Returns:
+        Lista com os totais (R$) dos trimestres 1 a 4
+    """
+    return [
+        float(calcular_valores_por_nota(gdf[f"nota_total_q{q}"], gdf["area_georef"]).sum())
+        for q in range(1, 5)
+    ]
+
+
+def calcular_indicadores(gdf):
+    """Calcular os indicadores agregados exibidos nas métricas principais.
+
+    Indicadores cujas colunas de origem não existem (ou sem área/perímetro
+    positivo) são omitidos do resultado.
+    """
+    colunas = gdf.columns
+    indicadores = {
+        "num_municipios": int(len(gdf)),
+        "nota_media": float(gdf["nota_media"].mean()),
+    }
+
+    if "area_georef" in colunas:
+        indicadores["area_georef_total"] = float(gdf["area_georef"].sum())
+    if "perimetro_total_car" in colunas:
+        indicadores["perimetro_total"] = float(gdf["perimetro_total_car"].sum())
+    if "area_car_media" in colunas:
+        indicadores["tamanho_medio_imovel"] = float(gdf["area_car_media"].mean())
+    if "perimetro_medio_car" in colunas:
+        indicadores["perimetro_medio_imovel"] = float(gdf["perimetro_medio_car"].mean())
+    if "valor_mun_area" in colunas:
+        indicadores["valor_area_total"] = float(gdf["valor_mun_area"].sum())
+    if "valor_mun_perim" in colunas:
+        indicadores["valor_perim_total"] = float(gdf["valor_mun_perim"].sum())
+
+    # Valores médios, mínimos e máximos por hectare
+    if "valor_mun_area" in colunas and "area_georef" in colunas:
+        area_total = gdf["area_georef"].sum()
+        if area_total > 0:
+            indicadores["valor_medio_ha"] = float(gdf["valor_mun_area"].sum() / area_total)
+        com_area = gdf[gdf["area_georef"] > 0]
+        if len(com_area) > 0:
+            valor_por_ha = com_area["valor_mun_area"] / com_area["area_georef"]
+            indicadores["valor_min_ha"] = float(valor_por_ha.min())
+            indicadores["valor_max_ha"] = float(valor_por_ha.max())
+
+    # Valores médios, mínimos e máximos por quilômetro
+    if "valor_mun_perim" in colunas and "perimetro_total_car" in colunas:
+        perimetro_total = gdf["perimetro_total_car"].sum()
+        if perimetro_total > 0:
+            indicadores["valor_medio_km"] = float(gdf["valor_mun_perim"].sum() / perimetro_total)
+        com_perimetro = gdf[gdf["perimetro_total_car"] > 0]
+        if len(com_perimetro) > 0:
+            valor_por_km = com_perimetro["valor_mun_perim"] / com_perimetro["perimetro_total_car"]
+            indicadores["valor_min_km"] = float(valor_por_km.min())
+            indicadores["valor_max_km"] = float(valor_por_km.max())
+
+    return indicadores
+
+
+def calcular_precos_municipios(gdf):
+    """Calcular a precificação por município, incluindo os valores trimestrais.
+
+    Returns:
+        DataFrame (sem geometria) com as notas, áreas, valores totais e os
+        valores de cada trimestre (`valor_q1`..`valor_q4`)
+    """
+    coluna_nome = "mun_nome" if "mun_nome" in gdf.columns else "NM_MUN"
+    colunas = [
+        c for c in ["CD_MUN", coluna_nome, "SIGLA_UF", "ckey", "nota_media", "area_georef",
+                    "perimetro_total_car", "valor_mun_area", "valor_mun_perim", "valor_medio"]
+        if c in gdf.columns
+    ]
+    precos = gdf[colunas].copy()
+    for q in range(1, 5):
+        precos[f"nota_total_q{q}"] = gdf[f"nota_total_q{q}"]
+        precos[f"valor_q{q}"] = calcular_valores_por_nota(gdf[f"nota_total_q{q}"], gdf["area_georef"])
+    if "valor_mun_area" in precos.columns and "area_georef" in precos.columns:
+        area = precos["area_georef"].where(precos["area_georef"] > 0)
+        precos["valor_por_ha"] = precos["valor_mun_area"] / area
+    return precos
@@ -0,0 +1,83 @@
+"""Recarga do dataset em segundo plano, sem carga a frio para os usuários.
+
+Uma thread verifica periodicamente a versão dos dados de origem (assinatura do
+arquivo ou da tabela PostGIS). Quando ela muda, os caches da versão nova
+(dados processados, índice, dissoluções e o mapa da seleção inicial) são
+aquecidos em segundo plano e só então a versão ativa é trocada, em uma única
+atribuição. Até a troca as sessões seguem com a versão anterior, já em cache;
+depois dela os caches da versão anterior são descartados.
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Intervalo padrão entre verificações da versão de origem (segundos)
+INTERVALO_VERIFICACAO = 30.0
+
+
+class RecarregadorDataset:
+    """Versão ativa do dataset, trocada só depois de aquecida.
+
+    Args:
+        obter_versao: Função sem argumentos que devolve a versão atual da origem
+        aquecer: Função que recebe uma versão e preenche os caches dela
+        intervalo: Segundos entre verificações
+        descartar: Função que recebe a versão substituída e libera os caches dela
+    """
+
+    def __init__(self, obter_versao, aquecer, intervalo=INTERVALO_VERIFICACAO, descartar=None):
+        self._obter_versao = obter_versao
+        self._aquecer = aquecer
+        self._descartar = descartar
+        self.intervalo = intervalo
+        self.versao = None
+        self._parar = threading.Event()
+        self._trava = threading.Lock()
+        self._thread = None
+
+    def iniciar(self):
+        """Aquecer a versão atual (erros são propagados) e iniciar a verificação periódica."""
+        versao = self._obter_versao()
+        self._aquecer(versao)
+        self.versao = versao
+        self._thread = threading.Thread(target=self._executar, name="mda-recarga", daemon=True)
+        self._thread.start()
+        return self
+
+    def verificar(self):
+        """Aquecer e ativar a versão da origem, se ela mudou.
+
+        Returns:
+            True se a versão ativa foi trocada
+        """
+        with self._trava:
+            versao = self._obter_versao()
+            if versao == self.versao:
+                return False
+            logger.info("Nova versão do dataset: %s; aquecendo caches", versao)
+            self._aquecer(versao)
+            anterior, self.versao = self.versao, versao
+            logger.info("Versão ativa do dataset trocada de %s para %s", anterior, versao)
+            if self._descartar is not None:
+                try:
+                    self._descartar(anterior)
+                except Exception:
+                    # A troca já foi feita: o que não foi liberado sai pelos limites dos caches
+                    logger.exception("Falha ao descartar os caches da versão %s", anterior)
+            return True
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verificar()
+            except Exception:
+                # Arquivo incompleto, banco fora do ar...: segue a versão ativa e tenta de novo
+                logger.exception("Falha ao recarregar o dataset; mantida a versão %s", self.versao)
+
+    def parar(self):
+        """Encerrar a verificação periódica."""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,43 @@
+"""Notas trimestrais organizadas em um array municípios × trimestres × critérios.
+
+As notas trimestrais ficam no dataset em colunas largas (`nota_p_q1`..`q4`,
+`nota_total_q1`..`q4`). Empilhadas em um único array, as séries de um
+critério ou de um trimestre saem por fatiamento, sem percorrer colunas.
+"""
+
+import numpy as np
+
+TRIMESTRES = (1, 2, 3, 4)
+
+# Critérios com uma coluna por trimestre (prefixo da coluna: descrição)
+CRITERIOS_TRIMESTRAIS = {
+    "nota_total": "Nota total",
+    "nota_p": "Clima",
+}
+
+
+def colunas_trimestrais(criterio):
+    """Nomes das colunas de um critério, na ordem dos trimestres."""
+    return [f"{criterio}_q{q}" for q in TRIMESTRES]
+
+
+def tensor_trimestral(df, criterios=tuple(CRITERIOS_TRIMESTRAIS)):
+    """Empilhar as notas trimestrais em um array (municípios, trimestres, critérios).
+
+    Colunas ausentes no DataFrame ficam como NaN.
+    """
+    tensor = np.full((len(df), len(TRIMESTRES), len(criterios)), np.nan)
+    for k, criterio in enumerate(criterios):
+        for j, coluna in enumerate(colunas_trimestrais(criterio)):
+            if coluna in df.columns:
+                tensor[:, j, k] = df[coluna].to_numpy(dtype=float)
+    return tensor
+
+
+def medias_trimestrais(tensor, indice_criterio=0):
+    """Média de cada trimestre de um critério, ignorando NaN (0 se não houver valores)."""
+    valores = tensor[:, :, indice_criterio]
+    validos = ~np.isnan(valores)
+    soma = np.where(validos, valores, 0.0).sum(axis=0)
+    quantidade = validos.sum(axis=0)
+    return np.divide(soma, quantidade, out=np.zeros_like(soma), where=quantidade > 0)
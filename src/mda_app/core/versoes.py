@@ -0,0 +1,296 @@
+"""Repositório de versões (snapshots) do dataset processado e diferenças entre elas.
+
+Cada versão registrada é imutável e descrita por um manifesto JSON que aponta,
+coluna a coluna, para arquivos Parquet endereçados pelo hash do conteúdo: uma
+coluna que não mudou entre versões é gravada uma única vez e compartilhada.
+Comparar duas versões lê apenas a chave e as colunas cujo hash mudou. Uso:
+
+    python -m mda_app.core.versoes registrar --dataset data/processed/precificacao.parquet --versao 2025-03
+    python -m mda_app.core.versoes listar
+    python -m mda_app.core.versoes comparar 2025-02 2025-03 --saida diferencas.csv
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import shapely
+from mda_app.config.settings import DATA_CONFIG
+
+CHAVE_PADRAO = "CD_MUN"
+
+# Colunas comparadas por padrão (valores e notas que definem o preço)
+COLUNAS_COMPARADAS = [
+    "nota_media", "nota_total_q1", "nota_total_q2", "nota_total_q3", "nota_total_q4",
+    "area_georef", "valor_mun_area", "valor_mun_perim",
+]
+
+_NOME_VERSAO = re.compile(r"^[\w.\-]+$")
+
+
+def diretorio_versoes(diretorio=None):
+    """Diretório raiz do repositório de versões."""
+    return diretorio or DATA_CONFIG["versoes"]
+
+
+def _caminho_manifesto(diretorio, versao):
+    return os.path.join(diretorio, "manifestos", f"{versao}.json")
+
+
+def _caminho_coluna(diretorio, hash_coluna):
+    return os.path.join(diretorio, "colunas", f"{hash_coluna}.parquet")
+
+
+def _gravar_atomico(caminho, gravar):
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    try:
+        gravar(temporario)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+
+def _array_coluna(gdf, coluna):
+    """Coluna como array Arrow (geometrias em WKB)."""
+    if isinstance(gdf, gpd.GeoDataFrame) and coluna == gdf.geometry.name:
+        return pa.array(shapely.to_wkb(gdf.geometry.values), pa.binary())
+    return pa.Array.from_pandas(gdf[coluna])
+
+
+def _hash_array(array):
+    """Hash do conteúdo (tipo e valores) de um array Arrow."""
+    tabela = pa.table({"valor": array})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return hashlib.sha256(sink.getvalue().to_pybytes()).hexdigest()[:32]
+
+
+def registrar_versao(gdf, versao=None, diretorio=None, chave=CHAVE_PADRAO, descricao=""):
+    """Registrar o dataset como uma nova versão imutável.
+
+    Args:
+        gdf: (Geo)DataFrame processado
+        versao: Nome da versão (padrão: data e hora UTC)
+        diretorio: Raiz do repositório (padrão: configuração)
+        chave: Coluna que identifica o município entre versões
+        descricao: Texto livre guardado no manifesto
+
+    Returns:
+        Manifesto da versão registrada
+    """
+    diretorio = diretorio_versoes(diretorio)
+    versao = versao or datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S")
+    if not _NOME_VERSAO.match(versao):
+        raise ValueError(f"Nome de versão inválido: {versao!r}")
+    if os.path.exists(_caminho_manifesto(diretorio, versao)):
+        raise ValueError(f"A versão '{versao}' já existe e não pode ser sobrescrita.")
+    if chave not in gdf.columns or not gdf[chave].is_unique:
+        raise ValueError(f"Chave '{chave}' ausente ou duplicada no dataset.")
+
+    colunas = {}
+    for coluna in gdf.columns:
+        array = _array_coluna(gdf, coluna)
+        hash_coluna = _hash_array(array)
+        caminho = _caminho_coluna(diretorio, hash_coluna)
+        # Coluna idêntica a de outra versão: reaproveitar o arquivo
+        if not os.path.exists(caminho):
+            tabela = pa.table({"valor": array})
+            _gravar_atomico(caminho, lambda destino: pq.write_table(tabela, destino))
+        colunas[str(coluna)] = hash_coluna
+
+    geometria = gdf.geometry.name if isinstance(gdf, gpd.GeoDataFrame) else None
+    manifesto = {
+        "versao": versao,
+        "criada_em": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "descricao": descricao,
+        "linhas": int(len(gdf)),
+        "chave": chave,
+        "geometria": geometria,
+        "crs": gdf.crs.to_json_dict() if geometria and gdf.crs is not None else None,
+        "colunas": colunas,
+    }
+
+    def gravar(destino):
+        with open(destino, "w", encoding="utf-8") as arquivo:
+            json.dump(manifesto, arquivo, ensure_ascii=False, indent=2)
+
+    _gravar_atomico(_caminho_manifesto(diretorio, versao), gravar)
+    return manifesto
+
+
+def ler_manifesto(versao, diretorio=None):
+    """Manifesto de uma versão registrada."""
+    caminho = _caminho_manifesto(diretorio_versoes(diretorio), versao)
+    if not os.path.exists(caminho):
+        raise KeyError(f"Versão não encontrada: {versao}")
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def listar_versoes(diretorio=None):
+    """Manifestos das versões registradas, da mais antiga para a mais recente."""
+    pasta = os.path.join(diretorio_versoes(diretorio), "manifestos")
+    if not os.path.isdir(pasta):
+        return []
+    manifestos = []
+    for nome in os.listdir(pasta):
+        if nome.endswith(".json"):
+            with open(os.path.join(pasta, nome), encoding="utf-8") as arquivo:
+                manifestos.append(json.load(arquivo))
+    return sorted(manifestos, key=lambda m: (m["criada_em"], m["versao"]))
+
+
+def _ler_coluna(diretorio, hash_coluna):
+    return pq.read_table(_caminho_coluna(diretorio, hash_coluna)).column("valor")
+
+
+def ler_versao(versao, colunas=None, diretorio=None):
+    """Ler uma versão (todas as colunas ou apenas `colunas`).
+
+    Returns:
+        GeoDataFrame se a geometria estiver entre as colunas lidas, senão DataFrame
+    """
+    diretorio = diretorio_versoes(diretorio)
+    manifesto = ler_manifesto(versao, diretorio)
+    nomes = list(manifesto["colunas"]) if colunas is None else [c for c in colunas if c in manifesto["colunas"]]
+    geometria = manifesto["geometria"]
+
+    dados = {}
+    for nome in nomes:
+        valores = _ler_coluna(diretorio, manifesto["colunas"][nome])
+        if nome == geometria:
+            dados[nome] = shapely.from_wkb(valores.to_numpy(zero_copy_only=False))
+        else:
+            dados[nome] = valores.to_pandas()
+    df = pd.DataFrame(dados, columns=nomes)
+    if geometria in nomes:
+        return gpd.GeoDataFrame(df, geometry=geometria, crs=manifesto["crs"])
+    return df
+
+
+def diferencas_versoes(anterior, atual, colunas=None, diretorio=None, tolerancia=1e-9):
+    """Comparar duas versões município a município.
+
+    Só são lidas a chave e as colunas cujo hash difere entre as versões; as
+    comparações são vetorizadas.
+
+    Args:
+        anterior: Versão de referência
+        atual: Versão comparada
+        colunas: Colunas comparadas (padrão: `COLUNAS_COMPARADAS` presentes)
+        tolerancia: Diferença relativa abaixo da qual valores numéricos são iguais
+
+    Returns:
+        DataFrame indexado pela chave, apenas com municípios novos, removidos ou
+        alterados: `situacao` ("novo", "removido" ou "alterado") e, para cada
+        coluna alterada, `<coluna>_anterior`, `<coluna>_atual` e, se numérica,
+        `<coluna>_delta`
+    """
+    diretorio = diretorio_versoes(diretorio)
+    manifesto_a = ler_manifesto(anterior, diretorio)
+    manifesto_b = ler_manifesto(atual, diretorio)
+    chave = manifesto_b["chave"]
+    if manifesto_a["chave"] != chave:
+        raise ValueError("As versões usam chaves diferentes.")
+
+    colunas = COLUNAS_COMPARADAS if colunas is None else colunas
+    colunas = [c for c in colunas if c in manifesto_a["colunas"] and c in manifesto_b["colunas"] and c != chave]
+    # Colunas com o mesmo hash (e mesma ordem de linhas) são idênticas
+    mesma_ordem = manifesto_a["colunas"][chave] == manifesto_b["colunas"][chave]
+    alteradas = [c for c in colunas if not mesma_ordem or manifesto_a["colunas"][c] != manifesto_b["colunas"][c]]
+
+    df_a = ler_versao(anterior, [chave] + alteradas, diretorio).set_index(chave)
+    df_b = ler_versao(atual, [chave] + alteradas, diretorio).set_index(chave)
+
+    comuns = df_b.index.intersection(df_a.index, sort=False)
+    novos = df_b.index.difference(df_a.index, sort=False)
+    removidos = df_a.index.difference(df_b.index, sort=False)
+    a = df_a.reindex(comuns)
+    b = df_b.reindex(comuns)
+
+    partes = {}
+    mudou = np.zeros(len(comuns), dtype=bool)
+    for coluna in alteradas:
+        va, vb = a[coluna], b[coluna]
+        if pd.api.types.is_numeric_dtype(va) and pd.api.types.is_numeric_dtype(vb):
+            xa, xb = va.to_numpy(dtype=float), vb.to_numpy(dtype=float)
+            diferente = ~np.isclose(xa, xb, rtol=tolerancia, atol=0.0, equal_nan=True)
+            partes[f"{coluna}_delta"] = xb - xa
+        else:
+            diferente = ~((va == vb) | (va.isna() & vb.isna())).to_numpy()
+        if diferente.any():
+            partes[f"{coluna}_anterior"] = va.to_numpy()
+            partes[f"{coluna}_atual"] = vb.to_numpy()
+        else:
+            partes.pop(f"{coluna}_delta", None)
+        mudou |= diferente
+
+    # Ordem das colunas: anterior, atual e delta de cada coluna alterada
+    ordem = [f"{c}_{sufixo}" for c in alteradas for sufixo in ("anterior", "atual", "delta")
+             if f"{c}_{sufixo}" in partes]
+    alterados = pd.DataFrame({nome: partes[nome] for nome in ordem}, index=comuns)
+    alterados.insert(0, "situacao", "alterado")
+    alterados = alterados[mudou]
+
+    extras = []
+    if len(novos):
+        extras.append(pd.DataFrame({"situacao": "novo"}, index=novos).join(
+            df_b.loc[novos].add_suffix("_atual")))
+    if len(removidos):
+        extras.append(pd.DataFrame({"situacao": "removido"}, index=removidos).join(
+            df_a.loc[removidos].add_suffix("_anterior")))
+    resultado = pd.concat([alterados, *extras]) if extras else alterados
+    resultado.index.name = chave
+    return resultado.reindex(columns=["situacao", *[c for c in ordem if c in resultado.columns],
+                                      *[c for c in resultado.columns if c != "situacao" and c not in ordem]])
+
+
+def main(argv=None):
+    """Registrar, listar e comparar versões pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Repositório de versões do dataset processado")
+    parser.add_argument("--diretorio", default=None, help="Raiz do repositório de versões")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    registrar = comandos.add_parser("registrar", help="Registrar o dataset como nova versão")
+    registrar.add_argument("--dataset", default=None, help="Dataset (padrão: dataset processado)")
+    registrar.add_argument("--versao", default=None)
+    registrar.add_argument("--descricao", default="")
+
+    comandos.add_parser("listar", help="Listar as versões registradas")
+
+    comparar = comandos.add_parser("comparar", help="Diferenças entre duas versões")
+    comparar.add_argument("anterior")
+    comparar.add_argument("atual")
+    comparar.add_argument("--colunas", nargs="+", default=None)
+    comparar.add_argument("--saida", default=None, help="CSV com as diferenças")
+    args = parser.parse_args(argv)
+
+    if args.comando == "registrar":
+        from mda_app.core.leitor import ler_dataset
+
+        caminho = args.dataset or DATA_CONFIG["dataset_processado"]
+        manifesto = registrar_versao(ler_dataset(caminho), args.versao, args.diretorio, descricao=args.descricao)
+        print(f"Versão {manifesto['versao']} registrada ({manifesto['linhas']} linhas)")
+    elif args.comando == "listar":
+        for manifesto in listar_versoes(args.diretorio):
+            print(f"{manifesto['versao']}\t{manifesto['criada_em']}\t{manifesto['linhas']}\t{manifesto['descricao']}")
+    else:
+        diferencas = diferencas_versoes(args.anterior, args.atual, args.colunas, args.diretorio)
+        print(diferencas["situacao"].value_counts().to_string() if len(diferencas) else "Nenhuma diferença")
+        if args.saida:
+            diferencas.to_csv(args.saida)
+
+
+if __name__ == "__main__":
+    main()
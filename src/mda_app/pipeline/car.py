@@ -0,0 +1,153 @@
+"""Etapa de área: agregação em streaming dos imóveis do CAR por município.
+
+Lê os polígonos do CAR de um GeoPackage local em lotes Arrow (nunca a camada
+inteira), atribui cada imóvel a todos os municípios cujo interior ele
+intersecta (total ou parcialmente dentro; só tocar a divisa não conta) usando
+o índice espacial dos municípios e acumula área, perímetro e contagem em
+EPSG:5880. As UFs são processadas em paralelo, cada uma lendo apenas os imóveis
+dentro dos limites dos seus municípios. Uso:
+
+    python -m mda_app.pipeline.car --car data/raw/car.gpkg
+"""
+
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import pyogrio
+import shapely
+from mda_app.pipeline.dataset_processado import atualizar_colunas, ler_dataset_processado
+
+logger = logging.getLogger(__name__)
+
+# Sistema projetado usado no cálculo de área e perímetro
+CRS_METRICO = "EPSG:5880"
+
+# Quantidade de imóveis lidos por lote
+TAMANHO_LOTE = 50_000
+
+COLUNAS_CAR = ["num_imoveis", "area_car_total", "area_car_media", "perimetro_total_car", "perimetro_medio_car"]
+
+
+def _lotes_car(caminho, camada=None, bbox=None, tamanho_lote=TAMANHO_LOTE):
+    """Ler os polígonos do CAR em lotes, devolvendo GeoSeries no CRS de origem."""
+    with pyogrio.open_arrow(caminho, layer=camada, bbox=bbox, batch_size=tamanho_lote,
+                            use_pyarrow=True) as (meta, leitor):
+        coluna_geometria = meta["geometry_name"] or "wkb_geometry"
+        for lote in leitor:
+            wkb = lote.column(coluna_geometria).to_numpy(zero_copy_only=False)
+            yield gpd.GeoSeries(shapely.from_wkb(wkb), crs=meta["crs"])
+
+
+def _agregar_uf(tarefa):
+    """Acumular área, perímetro e contagem dos imóveis por município de uma UF (processo filho)."""
+    caminho, camada, uf, wkb_municipios, crs_municipios, tamanho_lote = tarefa
+    municipios = gpd.GeoSeries(shapely.from_wkb(wkb_municipios), crs=crs_municipios).to_crs(CRS_METRICO)
+    n = len(municipios)
+    area = np.zeros(n)
+    perimetro = np.zeros(n)
+    contagem = np.zeros(n, dtype=np.int64)
+
+    crs_car = pyogrio.read_info(caminho, layer=camada)["crs"]
+    bbox = tuple(municipios.to_crs(crs_car).total_bounds) if crs_car else None
+    arvore = municipios.sindex
+
+    for imoveis in _lotes_car(caminho, camada, bbox, tamanho_lote):
+        imoveis = imoveis[imoveis.notna() & ~imoveis.is_empty].to_crs(CRS_METRICO)
+        if len(imoveis) == 0:
+            continue
+        # Pares (imóvel, município) que se intersectam, inclusive parcialmente;
+        # imóveis que só tocam a divisa (interiores disjuntos) não contam
+        pos_imovel, pos_municipio = arvore.query(imoveis.values, predicate="intersects")
+        interior = shapely.relate_pattern(
+            imoveis.values[pos_imovel], municipios.values[pos_municipio], "T********"
+        )
+        pos_imovel, pos_municipio = pos_imovel[interior], pos_municipio[interior]
+        area_ha = imoveis.area.to_numpy() / 10_000
+        perimetro_km = imoveis.length.to_numpy() / 1_000
+        area += np.bincount(pos_municipio, weights=area_ha[pos_imovel], minlength=n)
+        perimetro += np.bincount(pos_municipio, weights=perimetro_km[pos_imovel], minlength=n)
+        contagem += np.bincount(pos_municipio, minlength=n)
+
+    return uf, area, perimetro, contagem
+
+
+def agregar_car(caminho_car, municipios, camada=None, tamanho_lote=TAMANHO_LOTE,
+                processos=None, chave="CD_MUN"):
+    """Agregar os imóveis do CAR por município.
+
+    Args:
+        caminho_car: GeoPackage com os polígonos do CAR
+        municipios: GeoDataFrame dos municípios (com SIGLA_UF e `chave`)
+        camada: Camada do GeoPackage (padrão: a primeira)
+        tamanho_lote: Imóveis lidos por lote; limita a memória de cada processo
+        processos: Número de processos (1 executa no processo atual)
+
+    Returns:
+        DataFrame com `chave` e as colunas de COLUNAS_CAR
+    """
+    tarefas = []
+    posicoes = {}
+    for uf, grupo in municipios.groupby("SIGLA_UF", observed=True):
+        posicoes[uf] = municipios.index.get_indexer(grupo.index)
+        tarefas.append((caminho_car, camada, uf, shapely.to_wkb(np.asarray(grupo.geometry)),
+                        municipios.crs, tamanho_lote))
+
+    area = np.zeros(len(municipios))
+    perimetro = np.zeros(len(municipios))
+    contagem = np.zeros(len(municipios), dtype=np.int64)
+    if processos == 1:
+        resultados = map(_agregar_uf, tarefas)
+    else:
+        executor = ProcessPoolExecutor(max_workers=processos)
+        resultados = executor.map(_agregar_uf, tarefas)
+    try:
+        for uf, area_uf, perimetro_uf, contagem_uf in resultados:
+            area[posicoes[uf]] = area_uf
+            perimetro[posicoes[uf]] = perimetro_uf
+            contagem[posicoes[uf]] = contagem_uf
+            logger.info("%s: %s vínculos imóvel-município", uf, int(contagem_uf.sum()))
+    finally:
+        if processos != 1:
+            executor.shutdown()
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        area_media = np.where(contagem > 0, area / contagem, 0.0)
+        perimetro_medio = np.where(contagem > 0, perimetro / contagem, 0.0)
+
+    return pd.DataFrame({
+        chave: municipios[chave].to_numpy(),
+        "num_imoveis": contagem,
+        "area_car_total": area,
+        "area_car_media": area_media,
+        "perimetro_total_car": perimetro,
+        "perimetro_medio_car": perimetro_medio,
+    })
+
+
+def executar(caminho_car, caminho=None, **kwargs):
+    """Executar a etapa do CAR e gravar as colunas no dataset processado."""
+    municipios = ler_dataset_processado(caminho)
+    agregado = agregar_car(caminho_car, municipios, **kwargs)
+    return atualizar_colunas(agregado[["CD_MUN"] + COLUNAS_CAR], caminho, base=municipios)
+
+
+def main(argv=None):
+    """Executar a etapa do CAR pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Agregação dos imóveis do CAR por município")
+    parser.add_argument("--car", required=True, help="GeoPackage com os imóveis do CAR")
+    parser.add_argument("--camada", default=None)
+    parser.add_argument("--dataset", default=None, help="Dataset processado (GeoParquet)")
+    parser.add_argument("--lote", type=int, default=TAMANHO_LOTE)
+    parser.add_argument("--processos", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    executar(args.car, args.dataset, camada=args.camada, tamanho_lote=args.lote, processos=args.processos)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""Etapa de clima: krigagem ordinária das séries de estações em nota_p_q1..q4.
+
+Lê séries de precipitação de estações (CSV locais, uma ou mais estações por
+arquivo), calcula a precipitação média de cada trimestre por estação, ajusta um
+variograma esférico por trimestre e faz a krigagem ordinária sobre pontos de
+cada município. A krigagem usa vizinhança local (k estações mais próximas,
+buscadas em uma KD-tree quando o scipy está instalado) e é executada em
+paralelo por trimestre e por blocos espaciais de pontos. Uso:
+
+    python -m mda_app.pipeline.clima --estacoes data/raw/inmet/
+"""
+
+import argparse
+import glob
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from mda_app.pipeline.dataset_processado import atualizar_colunas, ler_dataset_processado
+
+logger = logging.getLogger(__name__)
+
+# Colunas esperadas nos CSVs de estações
+COLUNAS_ESTACOES = {
+    "estacao": "estacao",
+    "latitude": "latitude",
+    "longitude": "longitude",
+    "data": "data",
+    "precipitacao": "precipitacao",
+}
+
+# Sistema projetado (metros) usado nas distâncias da krigagem
+CRS_METRICO = "EPSG:5880"
+
+# Faixa das notas de clima; distribuídas entre máximas e mínimas gerais
+FAIXA_NOTAS_CLIMA = (1.0, 10.0)
+
+
+def ler_estacoes(diretorio, tamanho_bloco=500_000):
+    """Ler os CSVs de estações e calcular a precipitação média por trimestre.
+
+    Cada arquivo é lido em blocos; por estação e ano soma-se a precipitação de
+    cada trimestre e, depois, tira-se a média entre os anos.
+
+    Returns:
+        DataFrame indexado por estação com longitude, latitude e colunas q1..q4
+    """
+    c = COLUNAS_ESTACOES
+    arquivos = sorted(glob.glob(os.path.join(diretorio, "*.csv")))
+    if not arquivos:
+        raise FileNotFoundError(f"Nenhum CSV de estação encontrado em {diretorio}")
+
+    somas = []
+    coordenadas = []
+    for arquivo in arquivos:
+        leitor = pd.read_csv(
+            arquivo,
+            usecols=list(c.values()),
+            parse_dates=[c["data"]],
+            chunksize=tamanho_bloco,
+        )
+        for bloco in leitor:
+            bloco = bloco.dropna(subset=[c["precipitacao"]])
+            bloco["ano"] = bloco[c["data"]].dt.year
+            bloco["trimestre"] = bloco[c["data"]].dt.quarter
+            somas.append(
+                bloco.groupby([c["estacao"], "ano", "trimestre"])[c["precipitacao"]].sum()
+            )
+            coordenadas.append(
+                bloco.groupby(c["estacao"])[[c["longitude"], c["latitude"]]].first()
+            )
+
+    # Blocos podem dividir um mesmo ano de uma estação; somar novamente
+    por_ano = pd.concat(somas).groupby(level=[0, 1, 2]).sum()
+    medias = por_ano.groupby(level=[0, 2]).mean().unstack("trimestre")
+    medias.columns = [f"q{t}" for t in medias.columns]
+
+    coords = pd.concat(coordenadas).groupby(level=0).first()
+    coords.columns = ["longitude", "latitude"]
+    estacoes = coords.join(medias, how="inner")
+    estacoes.index.name = "estacao"
+    return estacoes
+
+
+def _modelo_esferico(h, pepita, patamar_parcial, alcance):
+    """Semivariância do modelo esférico."""
+    h = np.asarray(h, dtype=float)
+    r = np.minimum(h / alcance, 1.0)
+    gamma = pepita + patamar_parcial * (1.5 * r - 0.5 * r ** 3)
+    return np.where(h > 0, gamma, 0.0)
+
+
+def variograma_experimental(x, y, z, n_lags=15, max_pares=2_000_000, seed=0):
+    """Calcular o variograma experimental (semivariância média por classe de distância).
+
+    Para muitas estações, os pares são amostrados para limitar a memória.
+    """
+    n = len(z)
+    if n * (n - 1) // 2 <= max_pares:
+        i, j = np.triu_indices(n, k=1)
+    else:
+        rng = np.random.default_rng(seed)
+        i = rng.integers(0, n, max_pares)
+        j = rng.integers(0, n, max_pares)
+        validos = i != j
+        i, j = i[validos], j[validos]
+
+    h = np.hypot(x[i] - x[j], y[i] - y[j])
+    semi = 0.5 * (z[i] - z[j]) ** 2
+
+    # Considerar pares até metade da distância máxima, como usual
+    limite = h.max() / 2
+    bordas = np.linspace(0, limite, n_lags + 1)
+    classes = np.digitize(h, bordas) - 1
+    dentro = (classes >= 0) & (classes < n_lags)
+    contagem = np.bincount(classes[dentro], minlength=n_lags)
+    soma = np.bincount(classes[dentro], weights=semi[dentro], minlength=n_lags)
+
+    com_pares = contagem > 0
+    centros = (bordas[:-1] + bordas[1:]) / 2
+    return centros[com_pares], soma[com_pares] / contagem[com_pares], contagem[com_pares]
+
+
+def ajustar_variograma(lags, gamma, pesos=None, n_alcances=60):
+    """Ajustar um variograma esférico (pepita, patamar parcial, alcance).
+
+    Para cada alcance candidato a pepita e o patamar parcial são lineares e
+    resolvidos por mínimos quadrados ponderados (pelo número de pares).
+    """
+    pesos = np.ones_like(gamma) if pesos is None else np.asarray(pesos, dtype=float)
+    raiz_pesos = np.sqrt(pesos)
+    melhor = None
+    for alcance in np.linspace(lags.min(), lags.max() * 2, n_alcances):
+        r = np.minimum(lags / alcance, 1.0)
+        base = 1.5 * r - 0.5 * r ** 3
+        matriz = np.column_stack([np.ones_like(lags), base]) * raiz_pesos[:, None]
+        coef, *_ = np.linalg.lstsq(matriz, gamma * raiz_pesos, rcond=None)
+        pepita, patamar_parcial = np.maximum(coef, 0.0)
+        erro = np.sum(pesos * (pepita + patamar_parcial * base - gamma) ** 2)
+        if melhor is None or erro < melhor[0]:
+            melhor = (erro, float(pepita), float(patamar_parcial), float(alcance))
+
+    _, pepita, patamar_parcial, alcance = melhor
+    if patamar_parcial == 0 and pepita == 0:
+        # Campo constante: qualquer variograma positivo gera o mesmo resultado
+        patamar_parcial = 1.0
+    return pepita, patamar_parcial, alcance
+
+
+def vizinhos_mais_proximos(x, y, xi, yi, k, tamanho_bloco=1024):
+    """Índices e distâncias das `k` estações mais próximas de cada ponto, ordenadas.
+
+    Usa `scipy.spatial.cKDTree` quando instalado; sem o scipy, as distâncias
+    são calculadas em sub-blocos de `tamanho_bloco` pontos, sem montar a matriz
+    completa pontos × estações.
+
+    Returns:
+        Tupla (índices, distâncias), ambos com forma (len(xi), k)
+    """
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        cKDTree = None
+
+    if cKDTree is not None:
+        dist, vizinhos = cKDTree(np.column_stack([x, y])).query(np.column_stack([xi, yi]), k=k)
+        return vizinhos.reshape(len(xi), k), dist.reshape(len(xi), k)
+
+    vizinhos = np.empty((len(xi), k), dtype=np.int64)
+    dist = np.empty((len(xi), k))
+    for inicio in range(0, len(xi), tamanho_bloco):
+        fim = inicio + tamanho_bloco
+        bloco = np.hypot(xi[inicio:fim, None] - x[None, :], yi[inicio:fim, None] - y[None, :])
+        if k < len(x):
+            indices = np.argpartition(bloco, k - 1, axis=1)[:, :k]
+        else:
+            indices = np.broadcast_to(np.arange(k), (len(bloco), k))
+        distancias = np.take_along_axis(bloco, indices, axis=1)
+        ordem = np.argsort(distancias, axis=1)
+        vizinhos[inicio:fim] = np.take_along_axis(indices, ordem, axis=1)
+        dist[inicio:fim] = np.take_along_axis(distancias, ordem, axis=1)
+    return vizinhos, dist
+
+
+def krigagem_ordinaria(x, y, z, xi, yi, parametros, n_vizinhos=16):
+    """Krigagem ordinária com vizinhança local das `n_vizinhos` estações mais próximas.
+
+    Os sistemas de todos os pontos do bloco são resolvidos de uma vez
+    (np.linalg.solve em lote).
+
+    Returns:
+        Array com os valores estimados em (xi, yi)
+    """
+    k = min(n_vizinhos, len(z))
+    vizinhos, h_alvo = vizinhos_mais_proximos(x, y, xi, yi, k)
+
+    vx, vy, vz = x[vizinhos], y[vizinhos], z[vizinhos]
+    h_vizinhos = np.hypot(vx[:, :, None] - vx[:, None, :], vy[:, :, None] - vy[:, None, :])
+
+    m = len(xi)
+    sistema = np.ones((m, k + 1, k + 1))
+    sistema[:, :k, :k] = _modelo_esferico(h_vizinhos, *parametros)
+    sistema[:, k, k] = 0.0
+    lado_direito = np.ones((m, k + 1))
+    lado_direito[:, :k] = _modelo_esferico(h_alvo, *parametros)
+
+    pesos = np.linalg.solve(sistema, lado_direito[:, :, None])[:, :k, 0]
+    return np.sum(pesos * vz, axis=1)
+
+
+def _krigar_bloco(tarefa):
+    """Executar a krigagem de um bloco de pontos para um trimestre (processo filho)."""
+    trimestre, inicio, x, y, z, xi, yi, parametros, n_vizinhos = tarefa
+    return trimestre, inicio, krigagem_ordinaria(x, y, z, xi, yi, parametros, n_vizinhos)
+
+
+def pontos_municipios(municipios, espacamento=None):
+    """Gerar pontos de estimativa para cada município, no CRS métrico.
+
+    Args:
+        municipios: GeoDataFrame dos municípios
+        espacamento: Distância (m) da grade regular dentro de cada município; se
+            None, usa um ponto representativo (centroide interno) por município
+
+    Returns:
+        Tupla (coordenadas x, coordenadas y, posição do município de cada ponto)
+    """
+    geometrias = municipios.geometry.to_crs(CRS_METRICO)
+    representativos = geometrias.representative_point()
+    xs = [representativos.x.to_numpy()]
+    ys = [representativos.y.to_numpy()]
+    donos = [np.arange(len(municipios))]
+
+    if espacamento:
+        for posicao, geometria in enumerate(geometrias):
+            minx, miny, maxx, maxy = geometria.bounds
+            gx, gy = np.meshgrid(
+                np.arange(minx + espacamento / 2, maxx, espacamento),
+                np.arange(miny + espacamento / 2, maxy, espacamento),
+            )
+            gx, gy = gx.ravel(), gy.ravel()
+            dentro = shapely.contains_xy(geometria, gx, gy)
+            xs.append(gx[dentro])
+            ys.append(gy[dentro])
+            donos.append(np.full(dentro.sum(), posicao))
+
+    return np.concatenate(xs), np.concatenate(ys), np.concatenate(donos)
+
+
+def precipitacao_para_nota(precipitacao, faixa=FAIXA_NOTAS_CLIMA):
+    """Distribuir notas entre as máximas e mínimas gerais (todos os trimestres)."""
+    minimo, maximo = np.nanmin(precipitacao), np.nanmax(precipitacao)
+    if maximo == minimo:
+        return np.full_like(precipitacao, faixa[0], dtype=float)
+    return faixa[0] + (precipitacao - minimo) / (maximo - minimo) * (faixa[1] - faixa[0])
+
+
+def gerar_notas_clima(estacoes, municipios, espacamento=None, n_vizinhos=16,
+                      tamanho_bloco=2000, processos=None, chave="CD_MUN"):
+    """Gerar as notas trimestrais de precipitação por município.
+
+    Args:
+        estacoes: DataFrame de `ler_estacoes`
+        municipios: GeoDataFrame dos municípios (com a coluna `chave`)
+        espacamento: Espaçamento da grade de pontos por município (m), ou None
+        n_vizinhos: Número de estações usadas em cada estimativa
+        tamanho_bloco: Quantidade de pontos por bloco espacial
+        processos: Número de processos (1 executa no processo atual)
+
+    Returns:
+        DataFrame com `chave`, precipitação média krigada (`precip_q1..q4`) e `nota_p_q1..q4`
+    """
+    pontos = gpd.GeoSeries(
+        gpd.points_from_xy(estacoes["longitude"], estacoes["latitude"]), crs="EPSG:4326"
+    ).to_crs(CRS_METRICO)
+    x, y = pontos.x.to_numpy(), pontos.y.to_numpy()
+    xi, yi, donos = pontos_municipios(municipios, espacamento)
+
+    # Ordenar pontos espacialmente para que cada bloco seja compacto
+    ordem = np.lexsort((xi, np.floor(yi / 50_000)))
+    xi, yi, donos = xi[ordem], yi[ordem], donos[ordem]
+
+    tarefas = []
+    for q in range(1, 5):
+        z = estacoes[f"q{q}"].to_numpy(dtype=float)
+        validas = ~np.isnan(z)
+        lags, gamma, pares = variograma_experimental(x[validas], y[validas], z[validas])
+        parametros = ajustar_variograma(lags, gamma, pares)
+        logger.info("Trimestre %s: variograma esférico %s", q, parametros)
+        for inicio in range(0, len(xi), tamanho_bloco):
+            fim = inicio + tamanho_bloco
+            tarefas.append((q, inicio, x[validas], y[validas], z[validas],
+                            xi[inicio:fim], yi[inicio:fim], parametros, n_vizinhos))
+
+    estimativas = {q: np.empty(len(xi)) for q in range(1, 5)}
+    if processos == 1:
+        resultados = map(_krigar_bloco, tarefas)
+        for q, inicio, valores in resultados:
+            estimativas[q][inicio:inicio + len(valores)] = valores
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            for q, inicio, valores in executor.map(_krigar_bloco, tarefas):
+                estimativas[q][inicio:inicio + len(valores)] = valores
+
+    # Média dos pontos de cada município
+    contagem = np.bincount(donos, minlength=len(municipios))
+    resultado = pd.DataFrame({chave: municipios[chave].to_numpy()})
+    for q in range(1, 5):
+        resultado[f"precip_q{q}"] = np.bincount(donos, weights=estimativas[q], minlength=len(municipios)) / contagem
+
+    precipitacoes = resultado[[f"precip_q{q}" for q in range(1, 5)]].to_numpy()
+    notas = precipitacao_para_nota(precipitacoes)
+    for q in range(1, 5):
+        resultado[f"nota_p_q{q}"] = notas[:, q - 1]
+    return resultado
+
+
+def executar(diretorio_estacoes, caminho=None, **kwargs):
+    """Executar a etapa de clima e gravar nota_p_q1..q4 no dataset processado."""
+    municipios = ler_dataset_processado(caminho)
+    estacoes = ler_estacoes(diretorio_estacoes)
+    logger.info("%s estações lidas de %s", len(estacoes), diretorio_estacoes)
+    notas = gerar_notas_clima(estacoes, municipios, **kwargs)
+    colunas = ["CD_MUN"] + [f"nota_p_q{q}" for q in range(1, 5)]
+    return atualizar_colunas(notas[colunas], caminho, base=municipios)
+
+
+def main(argv=None):
+    """Executar a etapa de clima pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Krigagem das notas de clima por trimestre")
+    parser.add_argument("--estacoes", required=True, help="Diretório com os CSVs de estações")
+    parser.add_argument("--dataset", default=None, help="Dataset processado (GeoParquet)")
+    parser.add_argument("--espacamento", type=float, default=None, help="Grade por município (m)")
+    parser.add_argument("--vizinhos", type=int, default=16)
+    parser.add_argument("--processos", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    executar(
+        args.estacoes,
+        args.dataset,
+        espacamento=args.espacamento,
+        n_vizinhos=args.vizinhos,
+        processos=args.processos,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Leitura e gravação do dataset processado usado pelas etapas do pipeline."""
+
+import os
+
+import geopandas as gpd
+from mda_app.config.settings import DATA_CONFIG
+from mda_app.core.data_loader import ler_dados
+
+
+def ler_dataset_processado(caminho=None):
+    """Ler o dataset processado; na primeira execução parte do dataset de origem."""
+    caminho = caminho or DATA_CONFIG["dataset_processado"]
+    if os.path.exists(caminho):
+        return gpd.read_parquet(caminho)
+    return ler_dados()
+
+
+def gravar_dataset_processado(gdf, caminho=None):
+    """Gravar o dataset processado de forma atômica (arquivo temporário + rename)."""
+    caminho = caminho or DATA_CONFIG["dataset_processado"]
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    temporario = f"{caminho}.tmp"
+    # Coluna de bbox permite ao leitor filtrar por extensão sem ler todas as geometrias
+    gdf.to_parquet(temporario, write_covering_bbox=True)
+    os.replace(temporario, caminho)
+
+
+def atualizar_colunas(colunas, caminho=None, chave="CD_MUN", base=None):
+    """Gravar colunas calculadas por uma etapa no dataset processado.
+
+    Args:
+        colunas: DataFrame com a coluna `chave` e as colunas a gravar
+        caminho: Caminho do dataset processado (padrão: configuração)
+        chave: Coluna usada para alinhar as linhas
+        base: GeoDataFrame de partida; se None, lê o dataset processado
+
+    Returns:
+        GeoDataFrame atualizado
+    """
+    gdf = ler_dataset_processado(caminho) if base is None else base.copy()
+    valores = colunas.set_index(chave)
+    if not valores.index.is_unique:
+        raise ValueError(f"Chave '{chave}' duplicada nas colunas a gravar.")
+
+    chaves = gdf[chave]
+    for coluna in valores.columns:
+        novos = chaves.map(valores[coluna])
+        # Municípios sem resultado na etapa mantêm o valor anterior
+        gdf[coluna] = novos.where(chaves.isin(valores.index), gdf[coluna]) if coluna in gdf.columns else novos
+
+    gravar_dataset_processado(gdf, caminho)
+    return gdf
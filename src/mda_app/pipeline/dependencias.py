@@ -0,0 +1,238 @@
+"""Recalculo incremental das notas e valores derivados.
+
+As colunas derivadas formam uma cadeia declarada em `ETAPAS` (entradas ->
+saídas): `nota_insalub_media`, as notas totais de cada trimestre (soma dos
+critérios, com acesso = 1), `nota_media` (média das notas totais),
+`valor_mun_area` (área georreferenciável pela Tabela de Rendimento e Preço) e
+`valor_medio_car`, com as fórmulas do dicionário de dados e de
+`processar_dados_geograficos`. Para cada etapa guarda-se, por município, o hash
+do conteúdo das suas entradas; numa nova execução só são recalculadas as etapas
+e os municípios cujas entradas mudaram (ex.: novos casos de dengue mudam
+`nota_insalub`, o que recalcula `nota_insalub_media`, as notas totais,
+`nota_media` e os valores apenas desses municípios). Na primeira execução os
+valores já presentes no dataset são mantidos: só passam a ser recalculados
+quando as suas entradas mudarem. Os hashes ficam em
+`<dataset>.etapas.parquet`. Uso:
+
+    python -m mda_app.pipeline.dependencias
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+from mda_app.config.settings import DATA_CONFIG
+from mda_app.core.precificacao import calcular_valores_por_nota
+from mda_app.core.trimestres import TRIMESTRES, colunas_trimestrais
+from mda_app.pipeline.dataset_processado import gravar_dataset_processado, ler_dataset_processado
+
+logger = logging.getLogger(__name__)
+
+
+class Etapa:
+    """Cálculo de colunas derivadas a partir de colunas de entrada, linha a linha.
+
+    `calcular` recebe as linhas a recalcular e devolve um DataFrame com as
+    colunas `saidas`. Entradas ausentes do dataset são ignoradas no hash (o
+    cálculo decide o valor padrão). Mudar `versao` força o recálculo completo.
+    """
+
+    def __init__(self, nome, entradas, saidas, calcular, versao=1):
+        self.nome = nome
+        self.entradas = list(entradas)
+        self.saidas = list(saidas)
+        self.calcular = calcular
+        self.versao = versao
+
+    def __repr__(self):
+        return f"Etapa({self.nome!r})"
+
+    def hashes(self, df):
+        """Hash (uint64) do conteúdo das entradas de cada linha."""
+        colunas = [c for c in self.entradas if c in df.columns]
+        assinatura = f"{self.nome}:{self.versao}:{','.join(colunas)}"
+        sal = np.uint64(int(hashlib.sha256(assinatura.encode()).hexdigest()[:16], 16))
+        if not colunas:
+            return np.full(len(df), sal, dtype=np.uint64)
+        return pd.util.hash_pandas_object(df[colunas], index=False).to_numpy() ^ sal
+
+
+def _nota_insalub_media(df):
+    # nota_insalub_2 abaixo de 1 é tratada como 1, como em processar_dados_geograficos
+    return pd.DataFrame({
+        "nota_insalub_media": (df["nota_insalub"] + df["nota_insalub_2"].clip(lower=1)) / 2
+    })
+
+
+# Nota do critério de acesso: a mesma para todos os municípios (todos têm acesso rodoviário)
+NOTA_ACESSO = 1.0
+
+# Critérios somados em todas as notas totais (a de clima é a do trimestre)
+CRITERIOS_NOTA_TOTAL = ["nota_veg", "nota_area", "nota_relevo", "nota_insalub_media"]
+
+
+def _notas_totais(df):
+    # Critério ausente do dataset deixa a nota total nula
+    base = df.reindex(columns=CRITERIOS_NOTA_TOTAL).sum(axis=1, min_count=len(CRITERIOS_NOTA_TOTAL)) + NOTA_ACESSO
+    return pd.DataFrame(
+        {f"nota_total_q{q}": base + df.reindex(columns=[f"nota_p_q{q}"]).iloc[:, 0] for q in TRIMESTRES},
+        index=df.index,
+    )
+
+
+def _nota_media(df):
+    return pd.DataFrame({"nota_media": df[colunas_trimestrais("nota_total")].mean(axis=1, skipna=False)})
+
+
+def _valor_mun_area(df):
+    return pd.DataFrame({"valor_mun_area": calcular_valores_por_nota(df["nota_media"], df["area_georef"])},
+                        index=df.index)
+
+
+def _valor_medio_car(df):
+    valor = np.where(
+        df["area_car_total"] != 0,
+        ((df["area_car_total"] / df["area_georef"]) * df["valor_mun_area"]) / df["num_imoveis"],
+        0,
+    )
+    return pd.DataFrame({"valor_medio_car": valor}, index=df.index)
+
+
+ETAPAS = [
+    Etapa("nota_insalub_media", ["nota_insalub", "nota_insalub_2"], ["nota_insalub_media"],
+          _nota_insalub_media),
+    Etapa("notas_totais", [*CRITERIOS_NOTA_TOTAL, *colunas_trimestrais("nota_p")], colunas_trimestrais("nota_total"),
+          _notas_totais),
+    Etapa("nota_media", colunas_trimestrais("nota_total"), ["nota_media"], _nota_media),
+    Etapa("valor_mun_area", ["nota_media", "area_georef"], ["valor_mun_area"], _valor_mun_area),
+    Etapa("valor_medio_car", ["area_car_total", "area_georef", "valor_mun_area", "num_imoveis"],
+          ["valor_medio_car"], _valor_medio_car),
+]
+
+
+def ordenar_etapas(etapas):
+    """Ordenar as etapas de modo que cada uma venha depois das que produzem suas entradas."""
+    produtora = {}
+    for etapa in etapas:
+        for coluna in etapa.saidas:
+            if coluna in produtora:
+                raise ValueError(f"Coluna '{coluna}' produzida por mais de uma etapa.")
+            produtora[coluna] = etapa.nome
+
+    por_nome = {etapa.nome: etapa for etapa in etapas}
+    ordem, visitando, visitadas = [], set(), set()
+
+    def visitar(etapa):
+        if etapa.nome in visitadas:
+            return
+        if etapa.nome in visitando:
+            raise ValueError(f"Dependência circular envolvendo a etapa '{etapa.nome}'.")
+        visitando.add(etapa.nome)
+        for coluna in etapa.entradas:
+            if coluna in produtora:
+                visitar(por_nome[produtora[coluna]])
+        visitando.discard(etapa.nome)
+        visitadas.add(etapa.nome)
+        ordem.append(etapa)
+
+    for etapa in etapas:
+        visitar(etapa)
+    return ordem
+
+
+def etapas_afetadas(colunas, etapas=ETAPAS):
+    """Etapas (em ordem de execução) que dependem, direta ou indiretamente, de `colunas`."""
+    alteradas = set(colunas)
+    afetadas = []
+    for etapa in ordenar_etapas(etapas):
+        if alteradas.intersection(etapa.entradas):
+            afetadas.append(etapa)
+            alteradas.update(etapa.saidas)
+    return afetadas
+
+
+def recalcular(df, estado=None, etapas=ETAPAS, chave="CD_MUN"):
+    """Recalcular apenas as etapas e linhas cujas entradas mudaram.
+
+    Args:
+        df: DataFrame/GeoDataFrame com as colunas de origem e derivadas
+        estado: DataFrame (índice `chave`, uma coluna por etapa) com os hashes
+            da execução anterior; sem hash anterior, linhas que já têm todas as
+            saídas preenchidas são mantidas e as demais calculadas
+        etapas: Etapas declaradas
+
+    Returns:
+        Tupla (df atualizado, novo estado, {etapa: linhas recalculadas})
+    """
+    df = df.copy()
+    chaves = df[chave]
+    if not chaves.is_unique:
+        raise ValueError(f"Chave '{chave}' duplicada no dataset.")
+    novo_estado = pd.DataFrame(index=pd.Index(chaves.to_numpy(), name=chave))
+    relatorio = {}
+
+    for etapa in ordenar_etapas(etapas):
+        atuais = etapa.hashes(df)
+        novo_estado[etapa.nome] = atuais
+        # Sem hash anterior, saídas já preenchidas são adotadas como estão
+        if all(s in df.columns for s in etapa.saidas):
+            mudou = df[etapa.saidas].isna().any(axis=1).to_numpy()
+        else:
+            mudou = np.ones(len(df), dtype=bool)
+        if estado is not None and etapa.nome in estado.columns:
+            posicoes = estado.index.get_indexer(chaves.to_numpy())
+            conhecidos = posicoes >= 0
+            anteriores = estado[etapa.nome].to_numpy(dtype=np.uint64)[posicoes[conhecidos]]
+            mudou[conhecidos] |= anteriores != atuais[conhecidos]
+
+        relatorio[etapa.nome] = int(mudou.sum())
+        if not mudou.any():
+            continue
+        resultado = etapa.calcular(df.loc[mudou])
+        for coluna in etapa.saidas:
+            if coluna not in df.columns:
+                df[coluna] = np.nan
+            df.loc[mudou, coluna] = resultado[coluna].to_numpy()
+
+    return df, novo_estado, relatorio
+
+
+def caminho_estado(caminho=None):
+    """Arquivo com os hashes das etapas, ao lado do dataset processado."""
+    caminho = caminho or DATA_CONFIG["dataset_processado"]
+    return f"{os.path.splitext(caminho)[0]}.etapas.parquet"
+
+
+def executar(caminho=None, etapas=ETAPAS):
+    """Recalcular as colunas derivadas do dataset processado e gravar o resultado."""
+    gdf = ler_dataset_processado(caminho)
+    arquivo_estado = caminho_estado(caminho)
+    estado = pd.read_parquet(arquivo_estado) if os.path.exists(arquivo_estado) else None
+
+    gdf, novo_estado, relatorio = recalcular(gdf, estado, etapas)
+    for nome, linhas in relatorio.items():
+        logger.info("%s: %s municípios recalculados", nome, linhas)
+
+    if any(relatorio.values()):
+        gravar_dataset_processado(gdf, caminho)
+    temporario = f"{arquivo_estado}.tmp"
+    novo_estado.to_parquet(temporario)
+    os.replace(temporario, arquivo_estado)
+    return gdf, relatorio
+
+
+def main(argv=None):
+    """Executar o recálculo incremental pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Recálculo incremental das notas e valores derivados")
+    parser.add_argument("--dataset", default=None, help="Dataset processado (GeoParquet)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    executar(args.dataset)
+
+
+if __name__ == "__main__":
+    main()
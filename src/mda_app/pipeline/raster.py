@@ -0,0 +1,288 @@
+"""Etapa de relevo e vegetação: estatísticas zonais de rasters por município.
+
+Calcula, para cada município, a contagem de pixels por classe, a classe
+predominante e a classe média, lendo o raster em janelas limitadas (nunca o
+mosaico inteiro) e processando os municípios em paralelo. Dois modos:
+
+- "classes": raster categórico (ex.: MapBiomas 10 m), reclassificado por
+  `mapa_classes` (código do raster -> classe 1, 2, 3...)
+- "declividade": modelo digital de elevação (ex.: SRTM 30 m); a declividade é
+  calculada por janela e classificada segundo Lepsch (1983)
+
+Fontes suportadas: GeoTIFF (requer rasterio, leitura por janelas) e .npy com
+metadados em .json ao lado (leitura por memory-map). Uso:
+
+    python -m mda_app.pipeline.raster --raster srtm.tif --modo declividade --nota nota_relevo
+    python -m mda_app.pipeline.raster --raster mapbiomas.tif --modo classes --nota nota_veg
+"""
+
+import argparse
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import shapely
+from mda_app.pipeline.dataset_processado import atualizar_colunas, ler_dataset_processado
+
+logger = logging.getLogger(__name__)
+
+# Limites de declividade (%) das classes de relevo de Lepsch (1983):
+# plano, suave ondulado, ondulado, forte ondulado, montanhoso e escarpado
+LIMITES_LEPSCH = [3, 8, 20, 45, 75]
+
+# Códigos MapBiomas -> classe de vegetação (1 aberta, 2 intermediária, 3 fechada)
+CLASSES_VEGETACAO_MAPBIOMAS = {
+    3: 3, 5: 3, 6: 3,
+    4: 2, 9: 2, 49: 2,
+    11: 1, 12: 1, 15: 1, 21: 1, 29: 1, 32: 1, 50: 1,
+    18: 1, 19: 1, 20: 1, 35: 1, 36: 1, 39: 1, 40: 1, 41: 1, 46: 1, 47: 1, 48: 1, 62: 1,
+}
+
+# Tamanho máximo (pixels por lado) de cada janela lida do raster
+TAMANHO_JANELA = 1024
+
+# Metros por grau de latitude, para declividade em rasters geográficos
+METROS_POR_GRAU = 111_320.0
+
+
+class RasterNumpy:
+    """Raster em .npy lido por memory-map, com metadados em `<arquivo>.json`."""
+
+    def __init__(self, caminho):
+        self.dados = np.load(caminho, mmap_mode="r")
+        with open(os.path.splitext(caminho)[0] + ".json", encoding="utf-8") as arquivo:
+            meta = json.load(arquivo)
+        self.transform = tuple(meta["transform"])
+        self.crs = meta.get("crs")
+        self.nodata = meta.get("nodata")
+        self.altura, self.largura = self.dados.shape
+
+    def ler_janela(self, linha0, linha1, coluna0, coluna1):
+        return np.asarray(self.dados[linha0:linha1, coluna0:coluna1])
+
+
+class RasterGeoTIFF:
+    """GeoTIFF lido por janelas através do rasterio."""
+
+    def __init__(self, caminho):
+        try:
+            import rasterio
+        except ImportError as erro:
+            raise ImportError("A leitura de GeoTIFF requer rasterio: pip install rasterio") from erro
+        self._fonte = rasterio.open(caminho)
+        t = self._fonte.transform
+        self.transform = (t.a, t.b, t.c, t.d, t.e, t.f)
+        self.crs = self._fonte.crs.to_string() if self._fonte.crs else None
+        self.nodata = self._fonte.nodata
+        self.altura, self.largura = self._fonte.height, self._fonte.width
+
+    def ler_janela(self, linha0, linha1, coluna0, coluna1):
+        from rasterio.windows import Window
+        return self._fonte.read(1, window=Window(coluna0, linha0, coluna1 - coluna0, linha1 - linha0))
+
+
+def salvar_raster_numpy(caminho, dados, transform, crs=None, nodata=None):
+    """Gravar um raster em .npy + .json, no formato lido por `RasterNumpy`."""
+    np.save(caminho, dados)
+    meta = {"transform": list(transform), "crs": crs, "nodata": nodata}
+    with open(os.path.splitext(caminho)[0] + ".json", "w", encoding="utf-8") as arquivo:
+        json.dump(meta, arquivo)
+
+
+def abrir_raster(caminho):
+    """Abrir um raster conforme a extensão do arquivo."""
+    if caminho.endswith(".npy"):
+        return RasterNumpy(caminho)
+    return RasterGeoTIFF(caminho)
+
+
+# Rasters abertos em cada processo de trabalho
+_rasters_abertos = {}
+
+
+def _raster_do_processo(caminho):
+    if caminho not in _rasters_abertos:
+        _rasters_abertos[caminho] = abrir_raster(caminho)
+    return _rasters_abertos[caminho]
+
+
+def _janela_da_geometria(raster, bounds):
+    """Calcular a janela de pixels (linha0, linha1, coluna0, coluna1) que cobre os limites."""
+    a, b, c, d, e, f = raster.transform
+    if b != 0 or d != 0:
+        raise ValueError("Rasters com rotação não são suportados.")
+    minx, miny, maxx, maxy = bounds
+    coluna0 = int(np.floor((minx - c) / a))
+    coluna1 = int(np.ceil((maxx - c) / a))
+    linha0 = int(np.floor((maxy - f) / e))
+    linha1 = int(np.ceil((miny - f) / e))
+    return (
+        max(linha0, 0), min(linha1, raster.altura),
+        max(coluna0, 0), min(coluna1, raster.largura),
+    )
+
+
+def _classes_declividade(raster, linha0, linha1, coluna0, coluna1):
+    """Ler a janela do MDE com borda de 1 pixel e classificar a declividade (Lepsch)."""
+    a, _, _, _, e, f = raster.transform
+    l0, l1 = max(linha0 - 1, 0), min(linha1 + 1, raster.altura)
+    c0, c1 = max(coluna0 - 1, 0), min(coluna1 + 1, raster.largura)
+    elevacao = raster.ler_janela(l0, l1, c0, c1).astype(float)
+    if raster.nodata is not None:
+        elevacao[elevacao == raster.nodata] = np.nan
+
+    dx, dy = abs(a), abs(e)
+    if raster.crs and raster.crs.upper() in ("EPSG:4326", "EPSG:4674"):
+        latitude = f + e * (linha0 + linha1) / 2
+        dx *= METROS_POR_GRAU * np.cos(np.radians(latitude))
+        dy *= METROS_POR_GRAU
+
+    if elevacao.shape[0] < 2 or elevacao.shape[1] < 2:
+        declividade = np.zeros_like(elevacao)
+    else:
+        gy, gx = np.gradient(elevacao, dy, dx)
+        declividade = np.hypot(gx, gy) * 100
+    classes = np.digitize(declividade, LIMITES_LEPSCH) + 1
+    classes[np.isnan(declividade)] = 0
+    return classes[linha0 - l0:linha0 - l0 + (linha1 - linha0), coluna0 - c0:coluna0 - c0 + (coluna1 - coluna0)]
+
+
+def _contar_classes_municipio(tarefa):
+    """Contar pixels por classe dentro de um município, janela a janela (processo filho)."""
+    caminho, posicao, wkb, modo, tabela_classes, n_classes, tamanho_janela = tarefa
+    raster = _raster_do_processo(caminho)
+    geometria = shapely.from_wkb(wkb)
+    shapely.prepare(geometria)
+    a, _, c, _, e, f = raster.transform
+
+    contagens = np.zeros(n_classes + 1, dtype=np.int64)
+    linha0, linha1, coluna0, coluna1 = _janela_da_geometria(raster, geometria.bounds)
+    for l0 in range(linha0, linha1, tamanho_janela):
+        l1 = min(l0 + tamanho_janela, linha1)
+        for c0 in range(coluna0, coluna1, tamanho_janela):
+            c1 = min(c0 + tamanho_janela, coluna1)
+
+            if modo == "declividade":
+                classes = _classes_declividade(raster, l0, l1, c0, c1)
+            else:
+                valores = raster.ler_janela(l0, l1, c0, c1).astype(np.int64)
+                validos = (valores >= 0) & (valores < len(tabela_classes))
+                if raster.nodata is not None:
+                    validos &= valores != raster.nodata
+                classes = np.where(validos, tabela_classes[np.clip(valores, 0, len(tabela_classes) - 1)], 0)
+
+            # Pixels cujo centro está dentro do município
+            xs = c + a * (np.arange(c0, c1) + 0.5)
+            ys = f + e * (np.arange(l0, l1) + 0.5)
+            grade_x, grade_y = np.meshgrid(xs, ys)
+            dentro = shapely.contains_xy(geometria, grade_x, grade_y)
+            contagens += np.bincount(classes[dentro], minlength=n_classes + 1)[:n_classes + 1]
+
+    return posicao, contagens
+
+
+def combinar_nota(predominante, media):
+    """Nota do município a partir da classe predominante e da classe média."""
+    return (predominante + media) / 2
+
+
+def estatisticas_zonais(caminho_raster, municipios, modo="classes", mapa_classes=None,
+                        tamanho_janela=TAMANHO_JANELA, processos=None, chave="CD_MUN"):
+    """Calcular estatísticas de classe do raster por município.
+
+    Args:
+        caminho_raster: GeoTIFF ou .npy (com .json de metadados)
+        municipios: GeoDataFrame dos municípios
+        modo: "classes" (raster categórico) ou "declividade" (MDE)
+        mapa_classes: Código do raster -> classe (modo "classes"); padrão MapBiomas
+        tamanho_janela: Lado máximo, em pixels, de cada janela lida
+        processos: Número de processos (1 executa no processo atual)
+
+    Returns:
+        DataFrame com `chave`, `n_pixels`, `classe_predominante` e `classe_media`
+    """
+    if modo not in ("classes", "declividade"):
+        raise ValueError(f"Modo inválido: {modo}")
+
+    raster = abrir_raster(caminho_raster)
+    if raster.crs and municipios.crs is not None:
+        municipios = municipios.to_crs(raster.crs)
+
+    if modo == "declividade":
+        tabela_classes = np.zeros(0, dtype=np.int64)
+        n_classes = len(LIMITES_LEPSCH) + 1
+    else:
+        mapa_classes = mapa_classes or CLASSES_VEGETACAO_MAPBIOMAS
+        tabela_classes = np.zeros(max(mapa_classes) + 1, dtype=np.int64)
+        for codigo, classe in mapa_classes.items():
+            tabela_classes[codigo] = classe
+        n_classes = int(tabela_classes.max())
+
+    tarefas = [
+        (caminho_raster, posicao, shapely.to_wkb(geometria), modo, tabela_classes, n_classes, tamanho_janela)
+        for posicao, geometria in enumerate(municipios.geometry)
+    ]
+    contagens = np.zeros((len(municipios), n_classes + 1), dtype=np.int64)
+    if processos == 1:
+        resultados = map(_contar_classes_municipio, tarefas)
+        for posicao, contagem in resultados:
+            contagens[posicao] = contagem
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            for posicao, contagem in executor.map(_contar_classes_municipio, tarefas, chunksize=8):
+                contagens[posicao] = contagem
+
+    # A classe 0 representa pixels sem dado ou sem classe mapeada
+    por_classe = contagens[:, 1:]
+    n_pixels = por_classe.sum(axis=1)
+    classes = np.arange(1, n_classes + 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = (por_classe * classes).sum(axis=1) / n_pixels
+    predominante = np.where(n_pixels > 0, por_classe.argmax(axis=1) + 1, np.nan)
+
+    return pd.DataFrame({
+        chave: municipios[chave].to_numpy(),
+        "n_pixels": n_pixels,
+        "classe_predominante": predominante,
+        "classe_media": np.where(n_pixels > 0, media, np.nan),
+    })
+
+
+def executar(caminho_raster, coluna_nota, modo, caminho=None, **kwargs):
+    """Executar a etapa e gravar `coluna_nota` no dataset processado."""
+    municipios = ler_dataset_processado(caminho)
+    estatisticas = estatisticas_zonais(caminho_raster, municipios, modo=modo, **kwargs)
+    estatisticas[coluna_nota] = combinar_nota(
+        estatisticas["classe_predominante"], estatisticas["classe_media"]
+    )
+    logger.info("%s: %s municípios sem pixels", coluna_nota, int((estatisticas["n_pixels"] == 0).sum()))
+    return atualizar_colunas(estatisticas[["CD_MUN", coluna_nota]], caminho, base=municipios)
+
+
+def main(argv=None):
+    """Executar a etapa de estatísticas zonais pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Estatísticas zonais de raster por município")
+    parser.add_argument("--raster", required=True, help="GeoTIFF ou .npy")
+    parser.add_argument("--modo", choices=["classes", "declividade"], required=True)
+    parser.add_argument("--nota", required=True, help="Coluna de nota a gravar (ex.: nota_veg)")
+    parser.add_argument("--dataset", default=None, help="Dataset processado (GeoParquet)")
+    parser.add_argument("--janela", type=int, default=TAMANHO_JANELA)
+    parser.add_argument("--processos", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    executar(
+        args.raster,
+        args.nota,
+        args.modo,
+        args.dataset,
+        tamanho_janela=args.janela,
+        processos=args.processos,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Etapa de área georreferenciável: sobreposição dos municípios com as camadas de exclusão.
+
+`area_georef` é a área do município menos a união das camadas de exclusão
+(Terras Indígenas, Terras da União, Unidades de Conservação e parcelas do
+SIGEF); áreas cobertas por mais de uma camada são descontadas uma única vez.
+Cada UF é processada em um processo separado, lendo das camadas apenas as
+feições dentro dos seus limites; os candidatos de cada município vêm do índice
+espacial e geometrias muito grandes são divididas em blocos antes do recorte.
+Uso:
+
+    python -m mda_app.pipeline.sobreposicao --exclusao ti.gpkg uniao.gpkg uc.gpkg sigef.gpkg
+"""
+
+import argparse
+import logging
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyogrio
+import shapely
+from pyproj import CRS, Transformer
+from mda_app.pipeline.dataset_processado import atualizar_colunas, ler_dataset_processado
+
+logger = logging.getLogger(__name__)
+
+# Sistema projetado usado no cálculo de área
+CRS_METRICO = "EPSG:5880"
+
+# Geometrias com mais vértices que isso são divididas em blocos antes do recorte
+LIMITE_VERTICES = 5_000
+
+
+def _ler_exclusoes(caminhos, bounds, crs_bounds):
+    """Ler, no CRS métrico, as geometrias das camadas de exclusão dentro de `bounds`."""
+    geometrias = []
+    for caminho in caminhos:
+        crs_camada = pyogrio.read_info(caminho)["crs"]
+        bbox = tuple(bounds)
+        if crs_camada and crs_bounds:
+            bbox = Transformer.from_crs(crs_bounds, crs_camada, always_xy=True).transform_bounds(*bounds)
+        camada = pyogrio.read_dataframe(caminho, columns=[], bbox=bbox)
+        if len(camada) == 0:
+            continue
+        if camada.crs is not None:
+            camada = camada.to_crs(CRS_METRICO)
+        geometrias.append(np.asarray(camada.geometry))
+    if not geometrias:
+        return np.array([], dtype=object)
+    geometrias = np.concatenate(geometrias)
+    geometrias = geometrias[~(shapely.is_missing(geometrias) | shapely.is_empty(geometrias))]
+    return shapely.make_valid(geometrias)
+
+
+def dividir_em_blocos(geometria, limite_vertices=LIMITE_VERTICES):
+    """Dividir uma geometria grande em pedaços disjuntos por uma grade regular.
+
+    Returns:
+        Lista de (pedaço, bounds do bloco); geometrias pequenas voltam inteiras
+    """
+    n_vertices = shapely.get_num_coordinates(geometria)
+    if n_vertices <= limite_vertices:
+        return [(geometria, geometria.bounds)]
+
+    xmin, ymin, xmax, ymax = geometria.bounds
+    lado = math.ceil(math.sqrt(n_vertices / limite_vertices))
+    passo_x = (xmax - xmin) / lado
+    passo_y = (ymax - ymin) / lado
+    blocos = []
+    for i in range(lado):
+        for j in range(lado):
+            limites = (xmin + i * passo_x, ymin + j * passo_y,
+                       xmin + (i + 1) * passo_x, ymin + (j + 1) * passo_y)
+            pedaco = shapely.clip_by_rect(geometria, *limites)
+            if not pedaco.is_empty:
+                blocos.append((pedaco, limites))
+    return blocos
+
+
+def _area_excluida(municipio, exclusoes, arvore, limite_vertices):
+    """Área (m²) do município coberta pela união das exclusões candidatas."""
+    area = 0.0
+    for pedaco, limites in dividir_em_blocos(municipio, limite_vertices):
+        candidatos = arvore.query(pedaco, predicate="intersects")
+        if len(candidatos) == 0:
+            continue
+        recortes = shapely.clip_by_rect(exclusoes[candidatos], *limites)
+        uniao = shapely.union_all(recortes)
+        area += shapely.area(shapely.intersection(pedaco, uniao))
+    return area
+
+
+def _sobrepor_uf(tarefa):
+    """Calcular área total e excluída dos municípios de uma UF (processo filho)."""
+    uf, wkb_municipios, caminhos_exclusao, limite_vertices = tarefa
+    municipios = shapely.make_valid(shapely.from_wkb(wkb_municipios))
+    exclusoes = _ler_exclusoes(caminhos_exclusao, shapely.total_bounds(municipios), CRS_METRICO)
+    arvore = shapely.STRtree(exclusoes)
+
+    area_total = shapely.area(municipios)
+    area_excluida = np.zeros(len(municipios))
+    if len(exclusoes) > 0:
+        for posicao, municipio in enumerate(municipios):
+            area_excluida[posicao] = _area_excluida(municipio, exclusoes, arvore, limite_vertices)
+    return uf, area_total, area_excluida
+
+
+def calcular_area_georef(municipios, caminhos_exclusao, limite_vertices=LIMITE_VERTICES,
+                         processos=None, chave="CD_MUN"):
+    """Calcular a área georreferenciável de cada município.
+
+    Args:
+        municipios: GeoDataFrame dos municípios (com SIGLA_UF e `chave`)
+        caminhos_exclusao: Arquivos das camadas de exclusão (GeoPackage, GeoJSON...)
+        limite_vertices: Vértices a partir dos quais a geometria é dividida em blocos
+        processos: Número de processos (1 executa no processo atual)
+
+    Returns:
+        DataFrame com `chave`, `area_cidade`, `area_georef` (ha) e `percent_area_georef`
+    """
+    if municipios.crs is None or CRS.from_user_input(municipios.crs) != CRS.from_user_input(CRS_METRICO):
+        municipios = municipios.to_crs(CRS_METRICO)
+
+    tarefas = []
+    posicoes = {}
+    for uf, grupo in municipios.groupby("SIGLA_UF", observed=True):
+        posicoes[uf] = municipios.index.get_indexer(grupo.index)
+        tarefas.append((uf, shapely.to_wkb(np.asarray(grupo.geometry)), list(caminhos_exclusao), limite_vertices))
+
+    area_total = np.zeros(len(municipios))
+    area_excluida = np.zeros(len(municipios))
+    if processos == 1:
+        resultados = map(_sobrepor_uf, tarefas)
+    else:
+        executor = ProcessPoolExecutor(max_workers=processos)
+        resultados = executor.map(_sobrepor_uf, tarefas)
+    try:
+        for uf, total_uf, excluida_uf in resultados:
+            area_total[posicoes[uf]] = total_uf
+            area_excluida[posicoes[uf]] = excluida_uf
+            logger.info("%s: %.0f ha excluídos", uf, excluida_uf.sum() / 10_000)
+    finally:
+        if processos != 1:
+            executor.shutdown()
+
+    area_cidade = area_total / 10_000
+    area_georef = np.clip(area_total - area_excluida, 0, None) / 10_000
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percentual = np.where(area_cidade > 0, area_georef / area_cidade * 100, np.nan)
+
+    return pd.DataFrame({
+        chave: municipios[chave].to_numpy(),
+        "area_cidade": area_cidade,
+        "area_georef": area_georef,
+        "percent_area_georef": percentual,
+    })
+
+
+def executar(caminhos_exclusao, caminho=None, **kwargs):
+    """Executar a etapa de sobreposição e gravar as colunas no dataset processado."""
+    municipios = ler_dataset_processado(caminho)
+    resultado = calcular_area_georef(municipios, caminhos_exclusao, **kwargs)
+    return atualizar_colunas(resultado, caminho, base=municipios)
+
+
+def main(argv=None):
+    """Executar a etapa de sobreposição pela linha de comando."""
+    parser = argparse.ArgumentParser(description="Área georreferenciável por município")
+    parser.add_argument("--exclusao", nargs="+", required=True,
+                        help="Camadas de exclusão (Terras Indígenas, União, UCs, SIGEF)")
+    parser.add_argument("--dataset", default=None, help="Dataset processado (GeoParquet)")
+    parser.add_argument("--vertices", type=int, default=LIMITE_VERTICES)
+    parser.add_argument("--processos", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    executar(args.exclusao, args.dataset, limite_vertices=args.vertices, processos=args.processos)
+
+
+if __name__ == "__main__":
+    main()
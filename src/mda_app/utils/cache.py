@@ -0,0 +1,139 @@
+"""Utilitários de cache de resultados da aplicação."""
+
+import functools
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+
+def resultados_da_sessao():
+    """Resultados reutilizáveis guardados na sessão do usuário, por nome."""
+    return st.session_state.setdefault("_resultados_reutilizaveis", {})
+
+
+def reutilizar_na_sessao(nome, chave, construir):
+    """Reutilizar o último resultado de `construir` enquanto a chave não mudar.
+
+    Guarda apenas o resultado mais recente de cada nome na sessão do usuário,
+    de modo que voltar a uma visão com a mesma seleção não refaz o cálculo.
+
+    Args:
+        nome: Identificador do resultado na sessão
+        chave: Valor comparável que identifica as entradas do cálculo
+        construir: Função sem argumentos que produz o resultado
+    """
+    cache = resultados_da_sessao()
+    anterior = cache.get(nome)
+    if anterior is not None and anterior[0] == chave:
+        return anterior[1]
+    resultado = construir()
+    cache[nome] = (chave, resultado)
+    return resultado
+
+
+# Resultados pesados compartilhados entre as sessões do processo (ex.: mapas)
+LIMITE_COMPARTILHADOS = 32
+_compartilhados = OrderedDict()
+_trava_compartilhados = threading.Lock()
+
+
+def reutilizar_entre_sessoes(chave, construir):
+    """Como `reutilizar_na_sessao`, mas compartilhado por todas as sessões.
+
+    Mantém os `LIMITE_COMPARTILHADOS` resultados usados mais recentemente. Pode
+    ser chamado fora da thread do script (não usa comandos do Streamlit); quem
+    altera o resultado deve trabalhar em uma cópia.
+
+    Args:
+        chave: Valor hashable que identifica as entradas do cálculo
+        construir: Função sem argumentos que produz o resultado
+    """
+    with _trava_compartilhados:
+        if chave in _compartilhados:
+            _compartilhados.move_to_end(chave)
+            return _compartilhados[chave]
+    resultado = construir()
+    with _trava_compartilhados:
+        _compartilhados[chave] = resultado
+        while len(_compartilhados) > LIMITE_COMPARTILHADOS:
+            _compartilhados.popitem(last=False)
+    return resultado
+
+
+def descartar_compartilhados(descartar):
+    """Remover os resultados compartilhados cujas chaves satisfazem `descartar`."""
+    with _trava_compartilhados:
+        for chave in [chave for chave in _compartilhados if descartar(chave)]:
+            del _compartilhados[chave]
+
+
+def resultados_compartilhados():
+    """Cópia dos pares (chave, resultado) compartilhados, para relatórios de memória."""
+    with _trava_compartilhados:
+        return list(_compartilhados.items())
+
+
+# Cache de especificações de figuras plotly, compartilhado entre sessões
+LIMITE_FIGURAS = 256
+_figuras = OrderedDict()
+_trava_figuras = threading.Lock()
+
+
+def chave_entradas(*valores):
+    """Gerar hash estável dos valores exatos de entrada de um cálculo."""
+    h = hashlib.sha256()
+    for valor in valores:
+        if isinstance(valor, (pd.DataFrame, pd.Series)):
+            rotulos = valor.columns if isinstance(valor, pd.DataFrame) else [valor.name]
+            h.update(repr(list(rotulos)).encode())
+            h.update(pd.util.hash_pandas_object(valor, index=True).values.tobytes())
+        else:
+            h.update(repr(valor).encode())
+        h.update(b"|")
+    return h.hexdigest()
+
+
+def tamanho_especificacoes():
+    """Bytes ocupados pelas especificações de figuras em cache."""
+    with _trava_figuras:
+        return sum(len(spec) for spec in _figuras.values())
+
+
+def figura_de_spec(spec):
+    """Reconstruir uma figura a partir da especificação JSON serializada.
+
+    A especificação já foi validada pelo plotly quando foi gerada, por isso a
+    revalidação (a parte cara da construção) é desativada.
+    """
+    return go.Figure(json.loads(spec), _validate=False)
+
+
+def cache_figura(construir):
+    """Decorador que guarda a especificação serializada da figura gerada.
+
+    A chave é o hash dos valores exatos dos argumentos; enquanto eles não mudam a
+    figura não é reconstruída nem revalidada.
+    """
+    @functools.wraps(construir)
+    def wrapper(*args, **kwargs):
+        nomeados = [v for item in sorted(kwargs.items()) for v in item]
+        chave = chave_entradas(construir.__name__, *args, *nomeados)
+        with _trava_figuras:
+            spec = _figuras.get(chave)
+            if spec is not None:
+                _figuras.move_to_end(chave)
+        if spec is None:
+            spec = pio.to_json(construir(*args, **kwargs), validate=False)
+            with _trava_figuras:
+                _figuras[chave] = spec
+                while len(_figuras) > LIMITE_FIGURAS:
+                    _figuras.popitem(last=False)
+        return figura_de_spec(spec)
+
+    return wrapper
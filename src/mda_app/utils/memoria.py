@@ -0,0 +1,233 @@
+"""Contabilidade de memória por etapa da página (opcional, `MDA_MEMORIA=1`).
+
+Com o tracemalloc ativo, cada etapa de `main()` registra quanto deixou alocado
+e o pico atingido durante a execução. Periodicamente um relatório com os
+maiores pontos de alocação, os maiores objetos retidos (estado das sessões e
+caches compartilhados) e o tamanho do estado de cada sessão é registrado em
+log como JSON. O tracemalloc deixa o app mais lento: use para dimensionar
+containers, não em produção.
+"""
+
+import gc
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+from mda_app.config.settings import DATA_CONFIG
+from mda_app.utils.cache import resultados_compartilhados, tamanho_especificacoes
+
+logger = logging.getLogger(__name__)
+
+# Quadros de pilha guardados por alocação (1 basta para agrupar por linha)
+QUADROS_TRACEMALLOC = 1
+
+# Objetos visitados no máximo ao estimar o tamanho de um objeto
+LIMITE_OBJETOS_VISITADOS = 200_000
+
+# Sessões sem execução há mais tempo que isto saem do relatório (segundos)
+VALIDADE_SESSAO = 1800
+
+_sessoes = {}
+_ultimo_relatorio = {"criado_em": 0.0, "relatorio": None}
+_trava = threading.Lock()
+
+
+def ativa():
+    """Se a contabilidade de memória está ligada."""
+    return DATA_CONFIG["memoria"]
+
+
+def _kb(tamanho):
+    return round(tamanho / 1024, 1)
+
+
+def tamanho_objeto(obj, limite=LIMITE_OBJETOS_VISITADOS):
+    """Estimar os bytes retidos por um objeto e tudo o que ele referencia.
+
+    DataFrames e arrays contam os próprios dados (`memory_usage(deep=True)`,
+    `nbytes`, mais 16 bytes por coordenada das geometrias); os demais objetos
+    são percorridos pelo coletor de lixo, sem contar módulos, classes e
+    funções, até `limite` objetos.
+    """
+    vistos, pendentes, total = set(), [obj], 0
+    while pendentes and len(vistos) < limite:
+        atual = pendentes.pop()
+        if id(atual) in vistos or isinstance(atual, (type, type(sys), type(tamanho_objeto))):
+            continue
+        vistos.add(id(atual))
+        if isinstance(atual, (pd.DataFrame, pd.Series, pd.Index)):
+            uso = atual.memory_usage(deep=True)
+            total += int(uso.sum()) if isinstance(uso, pd.Series) else int(uso)
+            geometrias = [atual] if isinstance(atual, gpd.GeoSeries) else []
+            if isinstance(atual, gpd.GeoDataFrame):
+                geometrias = [atual[c] for c in atual.columns if isinstance(atual[c].dtype, gpd.array.GeometryDtype)]
+            for serie in geometrias:
+                total += 16 * int(shapely.get_num_coordinates(serie.array).sum())
+            continue
+        if isinstance(atual, np.ndarray):
+            total += atual.nbytes
+            continue
+        total += sys.getsizeof(atual, 0)
+        pendentes.extend(gc.get_referents(atual))
+    return total
+
+
+class ContabilidadeMemoria:
+    """Memória alocada por etapa de uma execução da página.
+
+    `marcar` encerra a etapa em andamento e inicia a próxima, de modo que as
+    etapas de `main()` são delimitadas sem reorganizar o código. Desligada
+    (`MDA_MEMORIA` diferente de 1), não mede nada. O pico é o do processo
+    inteiro: com várias sessões simultâneas ele inclui o trabalho delas.
+    """
+
+    def __init__(self, sessao=None):
+        self.sessao = sessao
+        self.etapas = []
+        self._atual = None
+        if ativa():
+            _configurar_log()
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(QUADROS_TRACEMALLOC)
+
+    def marcar(self, nome):
+        """Encerrar a etapa em andamento e iniciar a etapa `nome`."""
+        if not ativa():
+            return
+        self._encerrar()
+        tracemalloc.reset_peak()
+        self._atual = (nome, tracemalloc.get_traced_memory()[0], time.perf_counter())
+
+    def _encerrar(self):
+        if self._atual is None:
+            return
+        nome, inicio_atual, inicio = self._atual
+        atual, pico = tracemalloc.get_traced_memory()
+        self.etapas.append({
+            "etapa": nome,
+            "alocado_kb": _kb(atual - inicio_atual),
+            "pico_kb": _kb(pico - inicio_atual),
+            "duracao_ms": round((time.perf_counter() - inicio) * 1000, 1),
+        })
+        self._atual = None
+
+    def finalizar(self, estado_sessao=None, intervalo_relatorio=None):
+        """Registrar as etapas em log (JSON), o tamanho do estado da sessão e o relatório periódico.
+
+        Returns:
+            Último relatório de objetos retidos (ou None se desligada)
+        """
+        if not ativa():
+            return None
+        self._encerrar()
+        if estado_sessao is not None:
+            registrar_sessao(self.sessao, estado_sessao)
+        logger.info(json.dumps({"tipo": "memoria_etapas", "sessao": self.sessao, "etapas": self.etapas}))
+        return relatorio_periodico(intervalo_relatorio)
+
+
+def _configurar_log():
+    """Registros deste módulo vão para stderr, uma linha JSON por mensagem."""
+    if not logger.handlers:
+        saida = logging.StreamHandler()
+        saida.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(saida)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+def registrar_sessao(sessao, estado):
+    """Guardar o tamanho do estado da sessão e das suas maiores entradas."""
+    entradas = {}
+    for chave in list(estado.keys()):
+        valor = estado[chave]
+        if isinstance(valor, dict):
+            # Resultados reutilizáveis: uma entrada por nome
+            for nome, item in valor.items():
+                entradas[f"{chave}.{nome}"] = tamanho_objeto(item)
+        else:
+            entradas[str(chave)] = tamanho_objeto(valor)
+    with _trava:
+        _sessoes[sessao] = {"atualizada_em": time.time(), "entradas": entradas}
+
+
+def _maiores_objetos(limite):
+    """Maiores entradas retidas nas sessões e nos caches compartilhados."""
+    objetos = []
+    with _trava:
+        for sessao, info in _sessoes.items():
+            objetos.extend((f"sessão {sessao}: {nome}", tamanho) for nome, tamanho in info["entradas"].items())
+    objetos.extend(
+        (f"compartilhado: {chave[0]}", tamanho_objeto(valor)) for chave, valor in resultados_compartilhados()
+    )
+    objetos.append(("compartilhado: especificações de figuras", tamanho_especificacoes()))
+    objetos.sort(key=lambda item: item[1], reverse=True)
+    return [{"objeto": nome, "tamanho_kb": _kb(tamanho)} for nome, tamanho in objetos[:limite]]
+
+
+def _pico_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss é dado em KiB no Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def relatorio_memoria(limite=10):
+    """Relatório dos maiores pontos de alocação, objetos retidos e estados de sessão."""
+    agora = time.time()
+    with _trava:
+        for sessao in [s for s, info in _sessoes.items() if agora - info["atualizada_em"] > VALIDADE_SESSAO]:
+            del _sessoes[sessao]
+        sessoes = [
+            {"sessao": sessao, "tamanho_kb": _kb(sum(info["entradas"].values())), "entradas": len(info["entradas"])}
+            for sessao, info in _sessoes.items()
+        ]
+
+    alocacoes = []
+    if tracemalloc.is_tracing():
+        estatisticas = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+        ]).statistics("lineno")
+        alocacoes = [
+            {"local": str(estatistica.traceback[0]), "tamanho_kb": _kb(estatistica.size), "blocos": estatistica.count}
+            for estatistica in estatisticas[:limite]
+        ]
+    atual = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+    return {
+        "criado_em": agora,
+        "rastreado_kb": _kb(atual),
+        "pico_rss_mb": _pico_rss_mb(),
+        "alocacoes": alocacoes,
+        "objetos": _maiores_objetos(limite),
+        "sessoes": sorted(sessoes, key=lambda item: item["tamanho_kb"], reverse=True),
+    }
+
+
+def relatorio_periodico(intervalo=None):
+    """Gerar e registrar em log o relatório se o último tiver mais de `intervalo` segundos.
+
+    Returns:
+        Relatório mais recente
+    """
+    intervalo = DATA_CONFIG["intervalo_relatorio_memoria"] if intervalo is None else intervalo
+    with _trava:
+        vencido = time.time() - _ultimo_relatorio["criado_em"] >= intervalo
+        if vencido:
+            # Marca antes de gerar: só uma sessão produz cada relatório
+            _ultimo_relatorio["criado_em"] = time.time()
+    if vencido:
+        relatorio = relatorio_memoria()
+        logger.info(json.dumps({"tipo": "memoria_relatorio", **relatorio}))
+        with _trava:
+            _ultimo_relatorio["relatorio"] = relatorio
+    return _ultimo_relatorio["relatorio"]
@@ -0,0 +1,56 @@
+"""Construção concorrente dos componentes pesados da página."""
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from mda_app.utils.cache import resultados_da_sessao
+
+# Threads do pool compartilhado por todas as sessões do processo
+TRABALHADORES = min(8, (os.cpu_count() or 1) + 2)
+
+_executor = None
+_trava_executor = threading.Lock()
+
+
+def obter_executor():
+    """Pool de threads compartilhado, criado no primeiro uso."""
+    global _executor
+    with _trava_executor:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=TRABALHADORES, thread_name_prefix="mda-construcao")
+        return _executor
+
+
+class ConstrucoesPagina:
+    """Componentes da página construídos em paralelo e lidos na ordem da página.
+
+    `agendar` é chamado para todos os componentes assim que a seleção é
+    conhecida; `obter` espera o resultado no momento de exibi-lo. Como em
+    `reutilizar_na_sessao`, o último resultado de cada nome é guardado na sessão
+    e reaproveitado enquanto a chave não mudar.
+
+    As funções agendadas rodam fora da thread do script e não podem chamar
+    comandos do Streamlit (nem ler `st.session_state`).
+    """
+
+    def __init__(self, executor=None):
+        self._executor = executor or obter_executor()
+        self._agendados = {}
+
+    def agendar(self, nome, chave, construir):
+        """Iniciar a construção de `nome`, a menos que já esteja na sessão."""
+        anterior = resultados_da_sessao().get(nome)
+        if anterior is not None and anterior[0] == chave:
+            futuro = Future()
+            futuro.set_result(anterior[1])
+        else:
+            futuro = self._executor.submit(construir)
+        self._agendados[nome] = (chave, futuro)
+
+    def obter(self, nome):
+        """Esperar o resultado de `nome` e guardá-lo na sessão."""
+        chave, futuro = self._agendados.pop(nome)
+        resultado = futuro.result()
+        resultados_da_sessao()[nome] = (chave, resultado)
+        return resultado
@@ -0,0 +1,145 @@
+"""Testes para a API HTTP de precificação."""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import geopandas as gpd
+from shapely.geometry import box
+
+from mda_app.api.servidor import ServicoPrecificacao, criar_servidor
+
+
+def criar_gdf():
+    """Criar GeoDataFrame sintético com três municípios."""
+    dados = {
+        "CD_MUN": ["2704302", "2700300", "2800308"],
+        "NM_MUN": ["Maceió", "Arapiraca", "Aracaju"],
+        "SIGLA_UF": ["AL", "AL", "SE"],
+        "nota_media": [20.0, 30.0, 50.0],
+        "area_georef": [100.0, 200.0, 300.0],
+        "valor_mun_area": [1000.0, 2000.0, 3000.0],
+        "valor_mun_perim": [500.0, 600.0, 700.0],
+        "perimetro_total_car": [10.0, 20.0, 30.0],
+    }
+    for q in range(1, 5):
+        dados[f"nota_total_q{q}"] = [10.0 * q, 20.0, 56.0]
+    return gpd.GeoDataFrame(
+        dados, geometry=[box(0, 0, 1, 1), box(1, 0, 2, 1), box(2, 0, 3, 1)], crs="EPSG:4326"
+    )
+
+
+@pytest.fixture
+def url_base():
+    """Subir a API em uma porta livre durante o teste."""
+    servidor = criar_servidor(ServicoPrecificacao(criar_gdf(), "v1"), porta=0)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{servidor.server_address[1]}"
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def test_precos_por_uf_com_etag(url_base):
+    """Testar consulta de preços e revalidação por ETag."""
+    with urllib.request.urlopen(f"{url_base}/precos?uf=AL") as resposta:
+        etag = resposta.headers["ETag"]
+        corpo = json.loads(resposta.read())
+
+    assert corpo["total"] == 2
+    assert corpo["versao"] == "v1"
+    assert corpo["registros"][0]["valor_q1"] == pytest.approx(100 * 49.83)
+
+    requisicao = urllib.request.Request(f"{url_base}/precos?uf=AL", headers={"If-None-Match": etag})
+    with pytest.raises(urllib.error.HTTPError) as erro:
+        urllib.request.urlopen(requisicao)
+    assert erro.value.code == 304
+
+
+def test_consulta_em_lote(url_base):
+    """Testar consulta em lote por código IBGE e agregados."""
+    consulta = json.dumps({"tipo": "agregados", "municipios": ["2704302", "Aracaju"]}).encode()
+    requisicao = urllib.request.Request(f"{url_base}/consulta", data=consulta, method="POST")
+    with urllib.request.urlopen(requisicao) as resposta:
+        corpo = json.loads(resposta.read())
+
+    assert corpo["indicadores"]["num_municipios"] == 2
+    assert corpo["totais_trimestrais"][0] == pytest.approx(100 * 49.83 + 300 * 202.87)
+
+
+def test_tipo_invalido(url_base):
+    """Testar rejeição de tipo de consulta desconhecido."""
+    consulta = json.dumps({"tipo": "inexistente"}).encode()
+    requisicao = urllib.request.Request(f"{url_base}/consulta", data=consulta, method="POST")
+    with pytest.raises(urllib.error.HTTPError) as erro:
+        urllib.request.urlopen(requisicao)
+    assert erro.value.code == 400
+
+
+def test_localizar_pontos_e_parcelas(url_base):
+    """Testar localização em lote de pontos e de parcelas GeoJSON."""
+    consulta = json.dumps({"pontos": [[0.5, 0.5], [2.5, 0.5], [9, 9]]}).encode()
+    requisicao = urllib.request.Request(f"{url_base}/localizar", data=consulta, method="POST")
+    with urllib.request.urlopen(requisicao) as resposta:
+        corpo = json.loads(resposta.read())
+
+    assert corpo["total"] == 3
+    assert corpo["localizadas"] == 2
+    assert [r["municipio"] for r in corpo["registros"]] == ["Maceió", "Aracaju", None]
+    assert corpo["registros"][0]["valor_ha_q1"] == pytest.approx(49.83)
+    assert corpo["registros"][0]["area_ha"] is None
+
+    parcelas = {"type": "FeatureCollection", "features": [{
+        "type": "Feature", "properties": {"id": "p1"},
+        "geometry": {"type": "Polygon", "coordinates": [[[1.1, 0.1], [1.9, 0.1], [1.9, 0.2], [1.1, 0.2], [1.1, 0.1]]]},
+    }]}
+    requisicao = urllib.request.Request(f"{url_base}/localizar", data=json.dumps(parcelas).encode(), method="POST")
+    with urllib.request.urlopen(requisicao) as resposta:
+        registro = json.loads(resposta.read())["registros"][0]
+    assert registro["id"] == "p1"
+    assert registro["municipio"] == "Arapiraca"
+    assert registro["valor_q2"] == pytest.approx(registro["area_ha"] * 59.80)
+
+    requisicao = urllib.request.Request(f"{url_base}/localizar", data=b'{"x": 1}', method="POST")
+    with pytest.raises(urllib.error.HTTPError) as erro:
+        urllib.request.urlopen(requisicao)
+    assert erro.value.code == 400
+
+
+def test_etag_revalidado_sem_executar_consulta():
+    """Testar 304 antes de montar o corpo da resposta."""
+    servico = ServicoPrecificacao(criar_gdf(), "v1")
+    servidor = criar_servidor(servico, porta=0)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    try:
+        etag = servico.etag("precos", ["AL"])
+        requisicao = urllib.request.Request(
+            f"http://127.0.0.1:{servidor.server_address[1]}/precos?uf=AL", headers={"If-None-Match": etag}
+        )
+        with pytest.raises(urllib.error.HTTPError) as erro:
+            urllib.request.urlopen(requisicao)
+        assert erro.value.code == 304
+        assert len(servico._respostas) == 0
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def test_consulta_ufs_em_texto(url_base):
+    """Testar `ufs` enviado como texto separado por vírgula e valores inválidos."""
+    consulta = json.dumps({"tipo": "precos", "ufs": "AL,SE"}).encode()
+    requisicao = urllib.request.Request(f"{url_base}/consulta", data=consulta, method="POST")
+    with urllib.request.urlopen(requisicao) as resposta:
+        assert json.loads(resposta.read())["total"] == 3
+
+    for corpo in ({"tipo": "precos", "ufs": 5}, {"tipo": "precos", "municipios": [{"a": 1}]}, ["AL"]):
+        requisicao = urllib.request.Request(f"{url_base}/consulta", data=json.dumps(corpo).encode(), method="POST")
+        with pytest.raises(urllib.error.HTTPError) as erro:
+            urllib.request.urlopen(requisicao)
+        assert erro.value.code == 400
@@ -0,0 +1,71 @@
+"""Testes para o índice de busca de municípios."""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pandas as pd
+
+from mda_app.core.busca import IndiceMunicipios, normalizar
+
+
+@pytest.fixture
+def indice():
+    return IndiceMunicipios(pd.DataFrame({
+        "CD_MUN": ["2704302", "2800308", "3550308", "2611606", "3304557", "2800100"],
+        "mun_nome": ["Maceió", "Aracaju", "São Paulo", "Recife", "Rio de Janeiro", "Amparo de São Francisco"],
+        "SIGLA_UF": ["AL", "SE", "SP", "PE", "RJ", "SE"],
+        "ckey": ["maceio-al", "aracaju-se", "sao paulo-sp", "recife-pe", "rio de janeiro-rj", "amparo-se"],
+        "nota_media": [10.0, 20.0, 30.0, 15.0, 25.0, 12.0],
+    }))
+
+
+def test_normalizar():
+    """Testar remoção de acentos, caixa e pontuação."""
+    assert normalizar("  São   JOÃO d'Aliança ") == "sao joao d alianca"
+
+
+def test_busca_por_prefixo_sem_acentos(indice):
+    """Testar prefixo do nome, de outra palavra e ordem de relevância."""
+    assert indice.buscar("mace") == ["Maceió"]
+    assert indice.buscar("SAO") == ["São Paulo", "Amparo de São Francisco"]
+    assert indice.buscar("janeiro") == ["Rio de Janeiro"]
+
+
+def test_busca_por_codigo_e_ckey(indice):
+    """Testar busca pelo código IBGE e pela ckey."""
+    assert indice.buscar("2800") == ["Amparo de São Francisco", "Aracaju"]
+    assert indice.buscar("recife-pe") == ["Recife"]
+
+
+def test_busca_com_erro_de_digitacao(indice):
+    """Testar busca aproximada por trigramas."""
+    assert indice.buscar("macaio")[0] == "Maceió"
+    assert indice.buscar("xyzw") == []
+
+
+def test_busca_filtra_ufs_e_limita(indice):
+    """Testar filtro de UFs, limite de resultados e consulta vazia."""
+    assert indice.buscar("sao", ufs=["SE"]) == ["Amparo de São Francisco"]
+    assert indice.buscar("", ufs=["SE", "AL"]) == ["Amparo de São Francisco", "Aracaju", "Maceió"]
+    assert len(indice.buscar("", limite=2)) == 2
+
+
+def test_opcoes_dos_filtros(indice):
+    """Testar UFs, faixa da nota e seleção restrita às UFs."""
+    assert indice.ufs == ["AL", "PE", "RJ", "SE", "SP"]
+    assert indice.faixa_nota == (10.0, 30.0)
+    assert indice.nas_ufs(["Maceió", "Recife", "Inexistente"], ["AL"]) == ["Maceió"]
+
+
+def test_consulta_vazia_em_ordem_alfabetica_entre_ufs():
+    """Testar que a consulta vazia devolve os primeiros nomes em ordem alfabética de todas as UFs."""
+    nomes_ac = [f"Z{i:02d}" for i in range(60)]
+    nomes_al = [f"A{i:02d}" for i in range(60)]
+    indice = IndiceMunicipios(pd.DataFrame({
+        "NM_MUN": nomes_ac + nomes_al,
+        "SIGLA_UF": ["AC"] * 60 + ["AL"] * 60,
+    }))
+    assert indice.buscar("", ["AC", "AL"], limite=5) == ["A00", "A01", "A02", "A03", "A04"]
+    assert indice.buscar("", ["AC"], limite=2) == ["Z00", "Z01"]
@@ -0,0 +1,41 @@
+"""Testes para a agregação em streaming dos imóveis do CAR."""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import geopandas as gpd
+from shapely.geometry import box
+
+from mda_app.pipeline.car import agregar_car
+
+
+def test_agregar_car_em_lotes(tmp_path):
+    """Testar área, perímetro e contagem, inclusive de imóvel parcialmente dentro."""
+    municipios = gpd.GeoDataFrame(
+        {"CD_MUN": ["1", "2", "3"], "SIGLA_UF": ["AL", "AL", "SE"]},
+        geometry=[box(0, 0, 10_000, 10_000), box(10_000, 0, 20_000, 10_000), box(50_000, 0, 60_000, 10_000)],
+        crs="EPSG:5880",
+    )
+    imoveis = gpd.GeoDataFrame(
+        {"cod_imovel": ["a", "b", "c", "d", "e"]},
+        geometry=[
+            box(1_000, 1_000, 2_000, 2_000),   # 100 ha no município 1
+            box(9_500, 1_000, 10_500, 2_000),  # divisa entre 1 e 2
+            box(15_000, 1_000, 15_500, 1_500),  # 25 ha no município 2
+            box(30_000, 0, 31_000, 1_000),     # fora de todos
+            box(10_000, 3_000, 10_500, 3_500),  # 25 ha no município 2, tocando a divisa com o 1
+        ],
+        crs="EPSG:5880",
+    )
+    caminho = str(tmp_path / "car.gpkg")
+    imoveis.to_file(caminho, driver="GPKG")
+
+    resultado = agregar_car(caminho, municipios, tamanho_lote=1, processos=1).set_index("CD_MUN")
+
+    assert list(resultado["num_imoveis"]) == [2, 3, 0]
+    assert resultado.loc["1", "area_car_total"] == pytest.approx(200.0)
+    assert resultado.loc["2", "area_car_media"] == pytest.approx((100.0 + 25.0 + 25.0) / 3)
+    assert resultado.loc["2", "perimetro_total_car"] == pytest.approx(4.0 + 2.0 + 2.0)
+    assert resultado.loc["3", "area_car_media"] == 0.0
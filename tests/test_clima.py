@@ -0,0 +1,72 @@
+"""Testes para a etapa de krigagem das notas de clima."""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from shapely.geometry import box
+
+from mda_app.pipeline.clima import krigagem_ordinaria, ler_estacoes, executar, vizinhos_mais_proximos
+
+
+def test_krigagem_exata_nas_estacoes():
+    """Testar que a krigagem sem pepita reproduz o valor nas estações."""
+    rng = np.random.default_rng(1)
+    x, y = rng.uniform(0, 1000, 30), rng.uniform(0, 1000, 30)
+    z = x / 10 + rng.normal(0, 1, 30)
+
+    estimado = krigagem_ordinaria(x, y, z, x[:5], y[:5], (0.0, 50.0, 500.0), n_vizinhos=8)
+
+    np.testing.assert_allclose(estimado, z[:5], atol=1e-6)
+
+
+def test_executar_grava_notas(tmp_path):
+    """Testar a etapa completa: CSVs de estações até o dataset processado."""
+    datas = pd.date_range("2020-01-01", "2021-12-31", freq="7D")
+    for arquivo, longitudes in (("a.csv", [-37.0, -36.5]), ("b.csv", [-36.0, -35.5])):
+        linhas = []
+        for i, lon in enumerate(longitudes):
+            for lat in (-10.0, -9.0):
+                estacao = f"{arquivo}-{i}-{lat}"
+                # Mais chuva a leste e no segundo trimestre
+                chuva = (lon + 38) * np.where(datas.quarter == 2, 2.0, 1.0)
+                linhas.append(pd.DataFrame({
+                    "estacao": estacao, "latitude": lat, "longitude": lon,
+                    "data": datas, "precipitacao": chuva,
+                }))
+        pd.concat(linhas).to_csv(tmp_path / arquivo, index=False)
+
+    municipios = gpd.GeoDataFrame(
+        {"CD_MUN": ["1", "2", "3"], "nota_p_q1": [0.0, 0.0, 0.0]},
+        geometry=[box(-36.9, -9.8, -36.7, -9.6), box(-36.3, -9.8, -36.1, -9.6), box(-35.8, -9.8, -35.6, -9.6)],
+        crs="EPSG:4326",
+    )
+    caminho = str(tmp_path / "processado.parquet")
+    municipios.to_parquet(caminho)
+
+    assert len(ler_estacoes(str(tmp_path))) == 8
+
+    resultado = executar(str(tmp_path), caminho, processos=1)
+    gravado = gpd.read_parquet(caminho)
+
+    for q in range(1, 5):
+        assert gravado[f"nota_p_q{q}"].between(1.0, 10.0).all()
+    assert gravado["nota_p_q1"].is_monotonic_increasing
+    assert (gravado["nota_p_q2"] > gravado["nota_p_q1"]).all()
+    assert list(resultado["CD_MUN"]) == ["1", "2", "3"]
+
+
+def test_vizinhos_mais_proximos_em_sub_blocos():
+    """Testar a busca das estações mais próximas contra a matriz completa de distâncias."""
+    rng = np.random.default_rng(2)
+    x, y = rng.uniform(0, 1000, 40), rng.uniform(0, 1000, 40)
+    xi, yi = rng.uniform(0, 1000, 25), rng.uniform(0, 1000, 25)
+
+    vizinhos, dist = vizinhos_mais_proximos(x, y, xi, yi, 6, tamanho_bloco=7)
+
+    completa = np.hypot(xi[:, None] - x[None, :], yi[:, None] - y[None, :])
+    np.testing.assert_array_equal(vizinhos, np.argsort(completa, axis=1)[:, :6])
+    np.testing.assert_allclose(dist, np.sort(completa, axis=1)[:, :6])
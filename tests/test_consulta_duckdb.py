@@ -0,0 +1,116 @@
+"""Testes para o backend de consultas DuckDB."""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from shapely.geometry import box
+
+from mda_app.core import consulta_duckdb
+from mda_app.core.filtros import aplicar_filtros
+from mda_app.core.precificacao import calcular_totais_trimestrais
+
+
+def test_montar_filtros():
+    """Testar cláusula WHERE e parâmetros da seleção."""
+    sql, parametros = consulta_duckdb.montar_filtros(
+        ufs=["AL", "SE"], municipios=["Maceió"], coluna_nome="mun_nome", criterio="nota_media", faixa=(10, 20)
+    )
+    assert sql == 'WHERE "SIGLA_UF" IN (?, ?) AND "mun_nome" IN (?) AND "nota_media" BETWEEN ? AND ?'
+    assert parametros == ["AL", "SE", "Maceió", 10.0, 20.0]
+    assert consulta_duckdb.montar_filtros() == ("", [])
+
+
+def test_montar_filtros_bbox():
+    """Testar filtro por extensão sobre a coluna de bbox do GeoParquet."""
+    colunas_bbox = {limite: ["bbox", limite] for limite in ("xmin", "ymin", "xmax", "ymax")}
+    sql, parametros = consulta_duckdb.montar_filtros(bbox=(1, 2, 3, 4), colunas_bbox=colunas_bbox)
+    assert "struct_extract(\"bbox\", 'xmax') >= ?" in sql
+    assert parametros == [1.0, 3.0, 2.0, 4.0]
+    # Sem coluna de bbox o filtro fica para depois da leitura
+    assert consulta_duckdb.montar_filtros(bbox=(1, 2, 3, 4)) == ("", [])
+
+
+def test_expressao_preco():
+    """Testar que o CASE segue as faixas da tabela de preços."""
+    expressao = consulta_duckdb.expressao_preco("nota_total_q1")
+    assert expressao.startswith('CASE WHEN "nota_total_q1" <= 15 THEN 49.83')
+    assert expressao.endswith("ELSE 202.87 END")
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    pytest.importorskip("duckdb")
+    n = 12
+    rng = np.random.default_rng(3)
+    gdf = gpd.GeoDataFrame({
+        "CD_MUN": [f"27{i:05d}" for i in range(n)],
+        "NM_MUN": [f"Município {i}" for i in range(n)],
+        "SIGLA_UF": ["AL"] * 5 + ["SE"] * 4 + ["PE"] * 3,
+        "nota_media": rng.uniform(10, 60, n),
+        "nota_insalub": rng.uniform(0, 5, n),
+        "nota_insalub_2": rng.uniform(0, 5, n),
+        "nota_veg": rng.uniform(0, 10, n),
+        "area_municip": rng.uniform(100, 1000, n),
+        "area_car_media": rng.uniform(5, 50, n),
+        "area_georef": np.r_[0.0, rng.uniform(50, 500, n - 1)],
+        "valor_mun_area": rng.uniform(1e4, 1e5, n),
+        **{f"nota_total_q{q}": rng.uniform(10, 60, n) for q in range(1, 5)},
+    }, geometry=[box(i, 0, i + 1, 1) for i in range(n)], crs="EPSG:4674")
+    caminho = str(tmp_path / "processado.parquet")
+    gdf.to_parquet(caminho, write_covering_bbox=True)
+    return gdf, caminho
+
+
+def test_filtrar_igual_ao_pandas(dataset):
+    """Testar que o SQL devolve as mesmas linhas e geometrias de `aplicar_filtros`."""
+    gdf, caminho = dataset
+    faixa = (20.0, 50.0)
+    esperado = aplicar_filtros(gdf, ["AL", "PE"], [], "nota_media", faixa)
+    resultado = consulta_duckdb.filtrar(["AL", "PE"], [], "nota_media", faixa, caminho=caminho)
+    assert list(resultado["CD_MUN"]) == list(esperado["CD_MUN"])
+    assert resultado.crs == gdf.crs
+    assert resultado.geometry.geom_equals(esperado.geometry.reset_index(drop=True)).all()
+    assert "bbox" not in resultado.columns
+
+    por_nome = consulta_duckdb.filtrar(municipios=["Município 7"], colunas=["CD_MUN", "x"], caminho=caminho)
+    assert list(por_nome.columns) == ["CD_MUN", "geometry"]
+    assert list(por_nome["CD_MUN"]) == ["2700007"]
+
+
+def test_filtrar_por_extensao_e_ponto(dataset):
+    """Testar filtro por bbox e busca do município que contém um ponto."""
+    _, caminho = dataset
+    resultado = consulta_duckdb.filtrar(bbox=(2.5, 0.2, 4.5, 0.8), caminho=caminho)
+    assert list(resultado["CD_MUN"]) == ["2700002", "2700003", "2700004"]
+    assert consulta_duckdb.municipio_no_ponto(3.5, 0.5, caminho=caminho) == "2700003"
+    assert consulta_duckdb.municipio_no_ponto(3.5, 5.0, caminho=caminho) is None
+
+
+def test_agregacoes_iguais_ao_pandas(dataset):
+    """Testar totais trimestrais, resumo das métricas e médias por UF."""
+    gdf, caminho = dataset
+    totais = consulta_duckdb.totais_trimestrais(ufs=["AL", "SE"], caminho=caminho)
+    assert totais == pytest.approx(calcular_totais_trimestrais(gdf[gdf["SIGLA_UF"].isin(["AL", "SE"])]))
+
+    resumo = consulta_duckdb.resumo_selecao(caminho=caminho)
+    com_area = gdf[gdf["area_georef"] > 0]
+    valor_ha = com_area["valor_mun_area"] / com_area["area_georef"]
+    assert resumo["area_total"] == pytest.approx(gdf["area_municip"].sum())
+    assert resumo["area_car_media"] == pytest.approx(gdf["area_car_media"].mean())
+    assert resumo["valor_ha_medio"] == pytest.approx(valor_ha.mean())
+    assert resumo["valor_ha_minimo"] == pytest.approx(valor_ha.min())
+    assert consulta_duckdb.resumo_selecao(ufs=["XX"], caminho=caminho) == {}
+
+    medias = consulta_duckdb.medias_por_uf(["AL", "SE"], ["nota_veg", "nota_insalub_media", "ausente"],
+                                           caminho=caminho)
+    insalub_media = (gdf["nota_insalub"] + gdf["nota_insalub_2"].clip(lower=1)) / 2
+    esperado = (
+        gdf.assign(nota_insalub_media=insalub_media)[gdf["SIGLA_UF"].isin(["AL", "SE"])]
+        .groupby("SIGLA_UF")[["nota_veg", "nota_insalub_media"]].mean().reset_index()
+    )
+    pd.testing.assert_frame_equal(medias, esperado, check_dtype=False)
@@ -6,7 +6,15 @@ import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from mda_app.core.data_loader import processar_dados_geograficos
+import geopandas as gpd
+from shapely.geometry import box
+
+from mda_app.config.settings import DATA_CONFIG
+from mda_app.core.data_loader import (
+    carregar_dados, carregar_dados_compactos, carregar_dados_uf, descartar_versao, processar_dados_geograficos
+)
+from mda_app.core import data_loader
+from mda_app.core.esquema_compacto import descompactar_dados
 
 
 def test_processar_dados_geograficos():
@@ -20,4 +28,72 @@ def test_processar_dados_geograficos():
     resultado = processar_dados_geograficos(mock_gdf)
     
     # Verificar se to_crs foi chamado
-    mock_gdf.to_crs.assert_called_once_with(epsg=4326)
\ No newline at end of file
+    mock_gdf.to_crs.assert_called_once_with(epsg=4326)
+
+
+@pytest.mark.parametrize("extensao", [".parquet", ".geojson"])
+def test_carregar_dados_por_uf(tmp_path, monkeypatch, extensao):
+    """Testar a seleção montada a partir das entradas de cada UF e as leituras da origem."""
+    gdf = gpd.GeoDataFrame(
+        {
+            "CD_MUN": ["1", "2", "3"],
+            "NM_MUN": ["A", "B", "C"],
+            "SIGLA_UF": ["SE", "AL", "AL"],
+            "nota_media": [1.0, 2.0, 3.0],
+            "nota_insalub": [2.0, 2.0, 2.0],
+            "nota_insalub_2": [0.5, 3.0, 4.0],
+            "area_georef": [10.0, 20.0, 30.0],
+            "area_car_total": [0.0, 10.0, 10.0],
+            "num_imoveis": [0, 1, 2],
+            "valor_mun_area": [100.0, 200.0, 300.0],
+            "valor_mun_perim": [10.0, 20.0, 30.0],
+        },
+        geometry=[box(0, 0, 1, 1), box(1, 0, 2, 1), box(2, 0, 3, 1)],
+        crs="EPSG:4326",
+    )
+    caminho = str(tmp_path / f"dados{extensao}")
+    if extensao == ".parquet":
+        gdf.to_parquet(caminho)
+    else:
+        gdf.to_file(caminho)
+    monkeypatch.setitem(DATA_CONFIG, "dataset", caminho)
+    monkeypatch.setitem(DATA_CONFIG, "backend", "pandas")
+    lidas = []
+    ler_fonte = data_loader.ler_fonte
+    monkeypatch.setattr(data_loader, "ler_fonte", lambda ufs=None: lidas.append(list(ufs)) or ler_fonte(ufs))
+    versao = f"teste-uf{extensao}"
+
+    dados = carregar_dados(("SE", "AL"), versao)
+    # GeoParquet filtra cada UF na leitura; GeoJSON lê as UFs que faltam de uma vez
+    assert lidas == ([["AL"], ["SE"]] if extensao == ".parquet" else [["AL", "SE"]])
+    assert list(dados["CD_MUN"]) == ["2", "3", "1"]
+    assert list(dados.index) == [0, 1, 2]
+    assert list(carregar_dados(None, versao)["CD_MUN"]) == ["2", "3", "1"]
+    assert list(carregar_dados_uf("AL", versao)["CD_MUN"]) == ["2", "3"]
+    # UFs já em cache não são lidas de novo
+    assert len(lidas) == (2 if extensao == ".parquet" else 1)
+
+    df, geometrias = carregar_dados_compactos(("AL", "SE"), versao)
+    assert list(df["CD_MUN"]) == ["2", "3", "1"]
+    assert descompactar_dados(df.iloc[[2]], geometrias).geometry.iloc[0].equals(box(0, 0, 1, 1))
+
+
+def test_descartar_versao(monkeypatch):
+    """Testar que as entradas por UF da versão descartada são lidas de novo e as das outras não."""
+    lidas = []
+
+    def ler_fonte(ufs=None):
+        lidas.append(ufs)
+        return gpd.GeoDataFrame(
+            {"SIGLA_UF": list(ufs), "nota_insalub": [2.0], "nota_insalub_2": [3.0], "area_georef": [1.0],
+             "area_car_total": [0.0], "num_imoveis": [0], "valor_mun_area": [1.0], "leitura": [len(lidas)]},
+            geometry=[box(0, 0, 1, 1)], crs="EPSG:4326",
+        )
+
+    monkeypatch.setattr(data_loader, "ler_fonte", ler_fonte)
+    assert carregar_dados_uf("AL", "teste-descarte-v1")["leitura"].iat[0] == 1
+    assert carregar_dados_uf("AL", "teste-descarte-v2")["leitura"].iat[0] == 2
+
+    descartar_versao("teste-descarte-v1", ["AL"])
+    assert carregar_dados_uf("AL", "teste-descarte-v2")["leitura"].iat[0] == 2
+    assert carregar_dados_uf("AL", "teste-descarte-v1")["leitura"].iat[0] == 3
@@ -0,0 +1,137 @@
+"""Testes para o recálculo incremental das colunas derivadas."""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pandas as pd
+
+from mda_app.config.settings import DATA_CONFIG
+from mda_app.core.data_loader import ler_dados
+from mda_app.pipeline.dependencias import ETAPAS, Etapa, etapas_afetadas, ordenar_etapas, recalcular
+
+
+@pytest.fixture
+def dados():
+    return pd.DataFrame({
+        "CD_MUN": ["1", "2", "3"],
+        "nota_veg": [2.0, 4.0, 6.0],
+        "nota_area": [1.0, 3.0, 5.0],
+        "nota_relevo": [2.0, 2.0, 8.0],
+        "nota_insalub": [4.0, 2.0, 6.0],
+        "nota_insalub_2": [0.5, 2.0, 4.0],
+        **{f"nota_p_q{q}": [float(q), float(q), q + 10.0] for q in range(1, 5)},
+        "area_georef": [100.0, 0.0, 50.0],
+        "area_car_total": [80.0, 0.0, 40.0],
+        "num_imoveis": [4, 0, 2],
+    })
+
+
+def test_recalcular_completo(dados):
+    """Testar a cadeia completa na primeira execução (sem estado anterior nem saídas)."""
+    resultado, estado, relatorio = recalcular(dados)
+
+    assert resultado["nota_insalub_media"].tolist() == [2.5, 2.0, 5.0]
+    # Critérios + acesso (1) + clima do trimestre
+    assert resultado.loc[0, [f"nota_total_q{q}" for q in range(1, 5)]].tolist() == [9.5, 10.5, 11.5, 12.5]
+    assert resultado["nota_media"].tolist() == [11.0, 14.5, 37.5]
+    assert resultado.loc[0, "valor_mun_area"] == pytest.approx(100 * 49.83)
+    assert resultado.loc[2, "valor_mun_area"] == pytest.approx(50 * 134.88)
+    assert resultado.loc[0, "valor_medio_car"] == pytest.approx(80 / 100 * 100 * 49.83 / 4)
+    assert resultado.loc[1, "valor_medio_car"] == 0
+    assert set(relatorio.values()) == {3}
+    assert list(estado.columns) == [etapa.nome for etapa in ordenar_etapas(ETAPAS)]
+
+
+def test_primeira_execucao_mantem_valores_do_dataset(dados):
+    """Testar que a primeira execução sobre o dataset publicado não altera valores."""
+    # Valores publicados que não coincidem com as fórmulas (ex.: arredondados)
+    publicado = recalcular(dados)[0]
+    publicado["nota_media"] += 0.001
+    publicado["valor_mun_area"] = publicado["valor_mun_area"].round(-2)
+
+    resultado, estado, relatorio = recalcular(publicado)
+
+    pd.testing.assert_frame_equal(resultado, publicado)
+    assert set(relatorio.values()) == {0}
+
+    # A partir daí, só municípios com entradas alteradas são recalculados, em cadeia
+    alterado = resultado.copy()
+    alterado.loc[2, "nota_insalub"] = 8.0
+    resultado, _, relatorio = recalcular(alterado, estado)
+    assert set(relatorio.values()) == {1}
+    assert resultado["nota_insalub_media"].tolist() == [2.5, 2.0, 6.0]
+    assert resultado.loc[2, "nota_media"] == 38.5
+    pd.testing.assert_frame_equal(resultado.iloc[:2], publicado.iloc[:2])
+
+
+def test_recalcular_apenas_linhas_alteradas(dados):
+    """Testar que só as etapas e municípios afetados são recalculados."""
+    anterior, estado, _ = recalcular(dados)
+
+    alterado = anterior.copy()
+    alterado.loc[2, "area_georef"] = 80.0
+    resultado, _, relatorio = recalcular(alterado, estado)
+
+    assert relatorio == {"nota_insalub_media": 0, "notas_totais": 0, "nota_media": 0, "valor_mun_area": 1,
+                         "valor_medio_car": 1}
+    assert resultado.loc[2, "valor_mun_area"] == pytest.approx(80 * 134.88)
+    assert resultado.loc[2, "valor_medio_car"] == pytest.approx(40 / 80 * 80 * 134.88 / 2)
+    pd.testing.assert_frame_equal(resultado.iloc[:2], anterior.iloc[:2])
+
+    _, _, relatorio = recalcular(resultado, recalcular(resultado)[1])
+    assert set(relatorio.values()) == {0}
+
+
+def test_etapas_afetadas():
+    """Testar a propagação pelo grafo declarado."""
+    etapas = [
+        Etapa("b", ["a"], ["b"], None),
+        Etapa("d", ["c"], ["d"], None),
+        Etapa("c", ["b"], ["c"], None),
+    ]
+    assert [etapa.nome for etapa in etapas_afetadas(["a"], etapas)] == ["b", "c", "d"]
+    assert [etapa.nome for etapa in etapas_afetadas(["nota_insalub"])] == [
+        "nota_insalub_media", "notas_totais", "nota_media", "valor_mun_area", "valor_medio_car"
+    ]
+    assert [etapa.nome for etapa in etapas_afetadas(["nota_p_q2", "nota_relevo"])] == [
+        "notas_totais", "nota_media", "valor_mun_area", "valor_medio_car"
+    ]
+    assert [etapa.nome for etapa in etapas_afetadas(["area_georef"])] == ["valor_mun_area", "valor_medio_car"]
+
+
+def test_dependencia_circular():
+    """Testar a detecção de ciclo no grafo."""
+    etapas = [Etapa("a", ["y"], ["x"], None), Etapa("b", ["x"], ["y"], None)]
+    with pytest.raises(ValueError):
+        ordenar_etapas(etapas)
+
+
+@pytest.fixture
+def origem():
+    """Dataset de origem publicado (os testes são pulados sem ele)."""
+    caminho = os.path.join(os.path.dirname(__file__), '..', DATA_CONFIG["dataset"])
+    if not os.path.exists(caminho):
+        pytest.skip("Dataset de origem ausente")
+    with open(caminho, "rb") as arquivo:
+        if arquivo.read(40).startswith(b"version https://git-lfs"):
+            pytest.skip("Dataset de origem é um ponteiro Git LFS")
+    return ler_dados(caminho)
+
+
+def test_primeira_execucao_no_dataset_de_origem(origem):
+    """Testar que a primeira execução sobre o dataset de origem não altera colunas existentes."""
+    resultado, _, _ = recalcular(origem)
+
+    pd.testing.assert_frame_equal(pd.DataFrame(resultado[origem.columns]), pd.DataFrame(origem))
+
+
+def test_formulas_reproduzem_o_dataset_de_origem(origem):
+    """Testar que as fórmulas das etapas reproduzem as colunas derivadas publicadas."""
+    derivadas = [coluna for etapa in ETAPAS for coluna in etapa.saidas]
+    resultado, _, _ = recalcular(origem.drop(columns=[c for c in derivadas if c in origem.columns]))
+
+    for coluna in derivadas:
+        if coluna in origem.columns:
+            pd.testing.assert_series_equal(resultado[coluna], origem[coluna], check_dtype=False, rtol=1e-3)
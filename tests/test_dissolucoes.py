@@ -0,0 +1,84 @@
+"""Testes para as dissoluções por UF/região e os níveis do mapa."""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import geopandas as gpd
+from shapely.geometry import box
+
+from mda_app.core.dissolucoes import calcular_dissolucoes, identificar_poligonos, montar_niveis_mapa
+
+
+@pytest.fixture
+def gdf():
+    """Dois municípios em AL, um em SE e um em SP (duas regiões)."""
+    return gpd.GeoDataFrame(
+        {
+            "NM_MUN": ["A", "B", "C", "D"],
+            "SIGLA_UF": ["AL", "AL", "SE", "SP"],
+            "nota_media": [10.0, 40.0, 20.0, 30.0],
+            "percent_area_georef": [50.0, 100.0, 80.0, 60.0],
+            "area_cidade": [300.0, 100.0, 50.0, 10.0],
+        },
+        geometry=[box(0, 0, 1, 1), box(1, 0, 2, 1), box(2, 0, 3, 1), box(5, 0, 6, 1)],
+        crs="EPSG:4326",
+    )
+
+
+def test_calcular_dissolucoes(gdf):
+    """Testar geometrias dissolvidas e médias ponderadas pela área."""
+    dissolucoes = calcular_dissolucoes(gdf)
+    ufs, regioes = dissolucoes["uf"], dissolucoes["regiao"]
+
+    assert ufs.loc["AL", "nota_media"] == pytest.approx((10 * 300 + 40 * 100) / 400)
+    assert ufs.loc["AL", "num_municipios"] == 2
+    assert ufs.loc["AL"].geometry.equals(box(0, 0, 2, 1))
+    assert sorted(regioes.index) == ["Nordeste", "Sudeste"]
+    assert regioes.loc["Nordeste", "ufs"] == ("AL", "SE")
+    assert regioes.loc["Nordeste", "percent_area_georef"] == pytest.approx(
+        (50 * 300 + 100 * 100 + 80 * 50) / 450
+    )
+
+
+def test_montar_niveis_mapa(gdf):
+    """Testar a escolha do nível mais agregado e o detalhamento por clique."""
+    dissolucoes = calcular_dissolucoes(gdf)
+    ufs_dataset = {"AL", "SE", "SP"}
+
+    nacional = montar_niveis_mapa(gdf, dissolucoes, ufs_dataset, ufs_dataset)
+    assert sorted(zip(nacional["nivel"], nacional["NM_MUN"])) == [("regiao", "Nordeste"), ("regiao", "Sudeste")]
+
+    # Região incompleta (só AL do Nordeste) aparece por UF
+    parcial = montar_niveis_mapa(gdf, dissolucoes, ["AL", "SP"], ufs_dataset)
+    assert sorted(parcial["NM_MUN"]) == ["AL", "Sudeste"]
+
+    # Um único polígono agregado é detalhado automaticamente
+    nordeste = montar_niveis_mapa(gdf, dissolucoes, ["AL", "SE"], ufs_dataset)
+    assert sorted(nordeste["NM_MUN"]) == ["AL", "SE"]
+
+    detalhado = montar_niveis_mapa(gdf, dissolucoes, ufs_dataset, ufs_dataset, expandidos=("Nordeste", "AL"))
+    assert sorted(zip(detalhado["nivel"], detalhado["NM_MUN"])) == [
+        ("municipio", "A"), ("municipio", "B"), ("regiao", "Sudeste"), ("uf", "SE")
+    ]
+
+    assert montar_niveis_mapa(gdf, dissolucoes, ["AL"], ufs_dataset) is None
+    assert montar_niveis_mapa(gdf, dissolucoes, ufs_dataset, ufs_dataset, municipios_explicitos=True) is None
+
+
+def test_identificar_poligonos(gdf):
+    """Testar identificadores e rótulos únicos com nomes de municípios repetidos entre UFs."""
+    gdf = gdf.assign(CD_MUN=["2700001", "2700002", "2800001", "3500001"], NM_MUN=["A", "B", "A", "D"])
+    dissolucoes = calcular_dissolucoes(gdf)
+    ufs_dataset = {"AL", "SE", "SP"}
+
+    camada = montar_niveis_mapa(gdf, dissolucoes, ufs_dataset, ufs_dataset, expandidos=("Nordeste", "AL"))
+    poligonos = identificar_poligonos(camada).sort_values("id")
+    assert list(poligonos["id"]) == ["municipio:2700001", "municipio:2700002", "regiao:Sudeste", "uf:SE"]
+    assert list(poligonos["rotulo"]) == ["A (AL)", "B (AL)", "Sudeste", "SE"]
+    assert list(poligonos["nome"]) == ["A", "B", "Sudeste", "SE"]
+
+    municipios = identificar_poligonos(gdf)
+    assert municipios["rotulo"].is_unique and municipios["id"].is_unique
+    assert set(municipios["nivel"]) == {"municipio"}
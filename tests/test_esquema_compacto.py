@@ -0,0 +1,73 @@
+"""Testes para o esquema compacto em memória."""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import geopandas as gpd
+import numpy as np
+from shapely.geometry import box
+
+from mda_app.core.esquema_compacto import (
+    compactar_dados, concatenar_compactos, descompactar_dados, relatorio_colunas
+)
+
+
+def criar_gdf():
+    """Criar GeoDataFrame sintético com três municípios."""
+    return gpd.GeoDataFrame(
+        {
+            "SIGLA_UF": ["AL", "AL", "SE"],
+            "NM_MUN": ["Maceió", "Arapiraca", "Aracaju"],
+            "nota_media": [10.5, 20.25, 30.0],
+            "area_georef": [100.0, 200.0, 300.0],
+        },
+        geometry=[box(0, 0, 1, 1), box(1, 0, 2, 1), box(2, 0, 3, 1)],
+        crs="EPSG:4326",
+    )
+
+
+def test_compactar_dados_tipos():
+    """Testar conversão de tipos no esquema compacto."""
+    df, geometrias = compactar_dados(criar_gdf())
+
+    assert "geometry" not in df.columns
+    assert df["nota_media"].dtype == np.float32
+    assert df["area_georef"].dtype == np.float64
+    assert df["SIGLA_UF"].dtype == "category"
+    assert len(geometrias) == 3
+
+
+def test_descompactar_apenas_selecao():
+    """Testar materialização das geometrias apenas das linhas filtradas."""
+    gdf = criar_gdf()
+    df, geometrias = compactar_dados(gdf)
+
+    filtrado = descompactar_dados(df[df["SIGLA_UF"] == "AL"], geometrias)
+
+    assert list(filtrado.index) == [0, 1]
+    assert filtrado.crs == gdf.crs
+    assert filtrado.geometry.equals(gdf.geometry.iloc[:2])
+
+
+def test_relatorio_colunas():
+    """Testar relatório de memória por coluna."""
+    df, geometrias = compactar_dados(criar_gdf())
+
+    relatorio = relatorio_colunas(df, geometrias)
+
+    assert set(relatorio["coluna"]) == set(df.columns) | {"geometry"}
+    assert relatorio["bytes"].is_monotonic_decreasing
+
+
+def test_concatenar_compactos_por_uf():
+    """Testar a junção das partes compactadas de cada UF."""
+    gdf = criar_gdf()
+    partes = [compactar_dados(gdf[gdf["SIGLA_UF"] == uf].reset_index(drop=True)) for uf in ("AL", "SE")]
+
+    df, geometrias = concatenar_compactos(partes)
+
+    assert list(df.index) == [0, 1, 2]
+    assert df["SIGLA_UF"].dtype == "category"
+    assert list(df["NM_MUN"]) == ["Maceió", "Arapiraca", "Aracaju"]
+    assert descompactar_dados(df.iloc[1:], geometrias).geometry.equals(gdf.geometry.iloc[1:])
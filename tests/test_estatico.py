@@ -0,0 +1,100 @@
+"""Testes para a exportação estática do dashboard."""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import json
+
+import geopandas as gpd
+import numpy as np
+from shapely.geometry import box
+
+from mda_app.config.settings import DATA_CONFIG
+from mda_app.core.precificacao import calcular_totais_trimestrais
+from mda_app.core import estatico
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    n = 9
+    rng = np.random.default_rng(7)
+    ufs = ["AL"] * 4 + ["SE"] * 3 + ["PE"] * 2
+    dados = {
+        "CD_MUN": [f"27{i:05d}" for i in range(n)],
+        "NM_MUN": [f"Município {i}" for i in range(n)],
+        "SIGLA_UF": ufs,
+        "ckey": [f"Município {i}-{uf}" for i, uf in enumerate(ufs)],
+        "area_municip": rng.uniform(100, 1000, n),
+        "area_cidade": rng.uniform(100, 1000, n),
+        "area_georef": rng.uniform(50, 90, n),
+        "percent_area_georef": rng.uniform(0, 100, n),
+        "num_imoveis": rng.integers(1, 50, n),
+        "area_car_total": rng.uniform(10, 40, n),
+        "area_car_media": rng.uniform(5, 50, n),
+        "valor_mun_area": rng.uniform(1e4, 1e5, n),
+        "valor_mun_perim": rng.uniform(1e4, 1e5, n),
+    }
+    for coluna in ["nota_veg", "nota_area", "nota_relevo", "nota_insalub", "nota_insalub_2",
+                   "nota_p_q1", "nota_p_q2", "nota_p_q3", "nota_p_q4"]:
+        dados[coluna] = rng.uniform(0.5, 8, n)
+    for q in range(1, 5):
+        dados[f"nota_total_q{q}"] = rng.uniform(6, 60, n)
+    dados["nota_media"] = np.mean([dados[f"nota_total_q{q}"] for q in range(1, 5)], axis=0)
+    gdf = gpd.GeoDataFrame(dados, geometry=[box(-36 + i * 0.1, -9, -35.9 + i * 0.1, -8.9) for i in range(n)],
+                           crs="EPSG:4674")
+    caminho = tmp_path / "municipios.geojson"
+    gdf.to_file(caminho, driver="GeoJSON")
+    monkeypatch.setitem(DATA_CONFIG, "dataset", str(caminho))
+    monkeypatch.setitem(DATA_CONFIG, "backend", "pandas")
+    return gdf
+
+
+def test_exportar_visoes(dataset, tmp_path):
+    """Testar pacote com visão nacional e por UF, tabela paginada e totais do app."""
+    saida = tmp_path / "estatico"
+    manifesto = estatico.exportar(saida, processos=1, linhas_pagina=2)
+
+    assert manifesto["visoes"] == ["nacional", "AL", "PE", "SE"]
+    assert json.loads((saida / "manifesto.json").read_text(encoding="utf-8")) == manifesto
+    assert (saida / "plotly.min.js").exists()
+
+    for visao in manifesto["visoes"]:
+        assert {"index.html", "mapa.html", "dados.json"} <= set(os.listdir(saida / visao))
+        assert (saida / visao / "graficos" / "gauge.json").exists()
+
+    al = json.loads((saida / "AL" / "dados.json").read_text(encoding="utf-8"))
+    assert al["municipios"] == 4
+    assert al["paginas_tabela"] == 2
+    assert al["totais_trimestrais"] == pytest.approx(
+        calcular_totais_trimestrais(dataset[dataset["SIGLA_UF"] == "AL"])
+    )
+    pagina = json.loads((saida / "AL" / "tabela" / "0002.json").read_text(encoding="utf-8"))
+    assert [linha["NM_MUN"] for linha in pagina] == ["Município 2", "Município 3"]
+    assert "geometry" not in pagina[0]
+
+    nacional = json.loads((saida / "nacional" / "dados.json").read_text(encoding="utf-8"))
+    assert nacional["municipios"] == 9
+    assert nacional["metricas"][0]["rotulo"] == "Área Total (ha)"
+    assert set(nacional["graficos"]) == {"grafico_trimestral", "gauge", "composicao_uf"}
+    assert '<a href="../SE/index.html">SE</a>' in (saida / "nacional" / "index.html").read_text(encoding="utf-8")
+
+
+def test_exportar_substitui_pacote(dataset, tmp_path):
+    """Testar que uma nova exportação troca o pacote anterior por inteiro."""
+    saida = tmp_path / "estatico"
+    estatico.exportar(saida, processos=1)
+    manifesto = estatico.exportar(saida, ufs=["SE"], processos=1)
+
+    assert manifesto["visoes"] == ["nacional", "SE"]
+    assert sorted(os.listdir(saida)) == ["SE", "index.html", "manifesto.json", "nacional", "plotly.min.js"]
+    assert [nome for nome in os.listdir(tmp_path) if nome.startswith(".estatico")] == []
+
+
+def test_exportar_sem_visoes(dataset, tmp_path, monkeypatch):
+    """Testar erro claro (e nenhum pacote) quando nenhuma visão é gerada."""
+    monkeypatch.setattr(estatico, "renderizar_visao", lambda tarefa: None)
+    with pytest.raises(ValueError, match="Nenhuma visão"):
+        estatico.exportar(tmp_path / "estatico", processos=1)
+    assert os.listdir(tmp_path) == ["municipios.geojson"]
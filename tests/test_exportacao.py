@@ -0,0 +1,68 @@
+"""Testes para a exportação da seleção filtrada."""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import geopandas as gpd
+import pandas as pd
+from shapely.geometry import box
+
+from mda_app.core.exportacao import exportar_selecao, gravar_exportacao, url_download
+
+
+@pytest.fixture
+def gdf():
+    return gpd.GeoDataFrame(
+        {
+            "CD_MUN": [str(i) for i in range(5)],
+            "SIGLA_UF": pd.Categorical(["AL", "SE", "AL", "PE", "AL"]),
+            "nota_media": [10.0, 20.0, 30.0, 40.0, 50.0],
+            "fid": range(5),
+        },
+        geometry=[box(i, 0, i + 1, 1) for i in range(5)],
+        crs="EPSG:4326",
+    )
+
+
+@pytest.mark.parametrize("formato", ["gpkg", "parquet", "csv"])
+def test_gravar_exportacao_em_lotes(gdf, formato, tmp_path):
+    """Testar que os lotes somados reproduzem a seleção inteira."""
+    caminho = str(tmp_path / f"saida.{formato}")
+    gravar_exportacao(gdf, formato, caminho, tamanho_lote=2)
+
+    if formato == "csv":
+        lido = pd.read_csv(caminho, dtype={"CD_MUN": str})
+        assert list(lido.columns) == ["CD_MUN", "SIGLA_UF", "nota_media"]
+    else:
+        lido = gpd.read_file(caminho) if formato == "gpkg" else gpd.read_parquet(caminho)
+        assert lido.crs == gdf.crs
+        assert lido.geometry.geom_equals(gdf.geometry).all()
+        assert "fid" not in lido.columns
+    assert lido["CD_MUN"].tolist() == gdf["CD_MUN"].tolist()
+    assert lido["nota_media"].tolist() == gdf["nota_media"].tolist()
+
+
+def test_exportar_selecao_usa_cache(gdf, tmp_path):
+    """Testar a reutilização do arquivo para a mesma versão, seleção e formato."""
+    primeiro = exportar_selecao(gdf, "csv", "v1", ("AL",), diretorio=str(tmp_path))
+    assert exportar_selecao(gdf.iloc[:1], "csv", "v1", ("AL",), diretorio=str(tmp_path)) == primeiro
+    assert exportar_selecao(gdf, "csv", "v2", ("AL",), diretorio=str(tmp_path)) != primeiro
+    assert len(pd.read_csv(primeiro)) == 5
+    assert not [nome for nome in os.listdir(tmp_path) if nome.endswith(".tmp")]
+
+    with pytest.raises(ValueError):
+        exportar_selecao(gdf, "shp", "v1", ("AL",), diretorio=str(tmp_path))
+
+
+def test_url_download_apenas_em_static(gdf, tmp_path, monkeypatch):
+    """Testar a URL servida pelo Streamlit para arquivos dentro de static/."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.join("static", "exportacoes"))
+    os.makedirs("outro")
+    caminho = exportar_selecao(gdf, "csv", "v1", ("AL",), diretorio=os.path.join("static", "exportacoes"))
+    fora = exportar_selecao(gdf, "csv", "v1", ("AL",), diretorio="outro")
+
+    assert url_download(caminho) == f"app/static/exportacoes/{os.path.basename(caminho)}"
+    assert url_download(fora) is None
@@ -0,0 +1,139 @@
+"""Testes para a localização e precificação em lote."""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from shapely.geometry import Point, box
+
+from mda_app.core.geolocalizacao import LocalizadorMunicipios, ler_entradas, precificar_arquivo
+from mda_app.core.precificacao import calcular_valor_por_nota
+
+
+def criar_municipios():
+    """Dois municípios vizinhos: A em [0, 1] e B em [1, 2] de longitude."""
+    dados = {"CD_MUN": ["1", "2"], "NM_MUN": ["A", "B"], "SIGLA_UF": ["AL", "SE"], "nota_media": [20.0, 50.0]}
+    for q in range(1, 5):
+        dados[f"nota_total_q{q}"] = [10.0 * q, 56.0]
+    return gpd.GeoDataFrame(dados, geometry=[box(0, 0, 1, 1), box(1, 0, 2, 1)], crs="EPSG:4326")
+
+
+@pytest.fixture
+def localizador():
+    return LocalizadorMunicipios(criar_municipios())
+
+
+def test_localizar_pontos_e_parcelas(localizador):
+    """Testar pontos dentro, na divisa e fora, e parcelas pela maior interseção."""
+    geometrias = [
+        Point(0.5, 0.5),
+        Point(1.5, 0.5),
+        Point(1, 0.5),        # divisa: menor posição
+        Point(5, 5),          # fora
+        None,
+        box(0.2, 0.2, 1.1, 0.4),  # mais em A
+        box(0.9, 0.2, 1.8, 0.4),  # mais em B
+    ]
+    assert list(localizador.localizar(geometrias)) == [0, 1, 0, -1, -1, 0, 1]
+
+
+def test_precificar(localizador):
+    """Testar notas, preço por hectare da faixa trimestral e valor das parcelas."""
+    entradas = gpd.GeoDataFrame(
+        {"id": [1, 2, 3], "SIGLA_UF": ["x", "y", "z"]},
+        geometry=[Point(0.5, 0.5), box(1.2, 0.2, 1.4, 0.4), Point(9, 9)],
+        crs="EPSG:4326",
+    )
+    precos = localizador.precificar(entradas)
+
+    assert list(precos["id"]) == [1, 2, 3]
+    assert list(precos["SIGLA_UF_entrada"]) == ["x", "y", "z"]
+    assert list(precos["municipio"][:2]) == ["A", "B"]
+    assert precos["CD_MUN"].isna()[2]
+    for q in range(1, 5):
+        assert precos[f"valor_ha_q{q}"][0] == calcular_valor_por_nota(10.0 * q, 1.0)
+        assert precos[f"valor_ha_q{q}"][1] == 202.87
+    assert np.isnan(precos["area_ha"][0])
+    area = gpd.GeoSeries([box(1.2, 0.2, 1.4, 0.4)], crs="EPSG:4326").to_crs("EPSG:5880").area[0] / 10_000
+    assert precos["area_ha"][1] == pytest.approx(area)
+    assert precos["valor_q3"][1] == pytest.approx(area * 202.87)
+
+
+def test_precificar_reprojeta_entradas(localizador):
+    """Testar entradas em outro CRS."""
+    entradas = gpd.GeoDataFrame(geometry=[Point(1.5, 0.5)], crs="EPSG:4326").to_crs("EPSG:3857")
+    assert list(localizador.precificar(entradas)["municipio"]) == ["B"]
+
+
+def test_precificar_arquivo_csv_em_lotes(localizador, tmp_path):
+    """Testar CSV de coordenadas lido e gravado em lotes."""
+    rng = np.random.default_rng(1)
+    n = 250
+    entrada = tmp_path / "imoveis.csv"
+    pd.DataFrame({"id": range(n), "Lon": rng.uniform(-0.5, 2.5, n), "Lat": rng.uniform(0, 1, n)}).to_csv(
+        entrada, index=False
+    )
+    saida = tmp_path / "precos.csv"
+    resumo = precificar_arquivo(entrada, saida, localizador, tamanho_lote=100)
+
+    precos = pd.read_csv(saida)
+    assert list(precos["id"]) == list(range(n))
+    dentro = (precos["Lon"] >= 0) & (precos["Lon"] <= 2)
+    assert resumo == {"entradas": n, "localizadas": int(dentro.sum()), "area_ha": 0.0, "valores": [0.0] * 4}
+    assert (precos.loc[dentro & (precos["Lon"] > 1), "municipio"] == "B").all()
+
+
+def test_ler_entradas_wkt_e_formatos(localizador, tmp_path):
+    """Testar WKT em CSV, GeoParquet e GeoPackage."""
+    parcelas = gpd.GeoDataFrame({"id": [1, 2]}, geometry=[box(0.1, 0.1, 0.2, 0.2), box(1.1, 0.1, 1.3, 0.3)],
+                                crs="EPSG:4326")
+    csv = tmp_path / "parcelas.csv"
+    pd.DataFrame({"id": [1, 2], "WKT": parcelas.geometry.to_wkt()}).to_csv(csv, index=False)
+    parquet = tmp_path / "parcelas.parquet"
+    parcelas.to_crs("EPSG:4674").to_parquet(parquet, write_covering_bbox=True)
+    gpkg = tmp_path / "parcelas.gpkg"
+    parcelas.to_file(gpkg)
+
+    for caminho in (csv, parquet, gpkg):
+        lotes = list(ler_entradas(str(caminho), tamanho_lote=1))
+        assert len(lotes) == 2
+        assert list(pd.concat(lotes)["id"]) == [1, 2]
+        resumo = precificar_arquivo(str(caminho), tmp_path / "saida.csv", localizador)
+        assert resumo["localizadas"] == 2
+        assert resumo["area_ha"] > 0
+    assert list(pd.read_csv(tmp_path / "saida.csv").columns[:2]) == ["id", "CD_MUN"]
+
+
+def test_csv_sem_coordenadas(tmp_path):
+    """Testar erro claro quando o CSV não tem coordenadas nem WKT."""
+    caminho = tmp_path / "sem.csv"
+    caminho.write_text("id,valor\n1,2\n")
+    with pytest.raises(ValueError, match="coordenadas"):
+        list(ler_entradas(str(caminho)))
+
+
+def test_csv_wkt_vazio_ou_invalido(localizador, tmp_path):
+    """Testar que WKT vazio ou inválido vira entrada não localizada em vez de erro."""
+    caminho = tmp_path / "parcelas.csv"
+    caminho.write_text('id,wkt\n1,"POLYGON ((0.1 0.1, 0.2 0.1, 0.2 0.2, 0.1 0.1))"\n2,\n3,não é wkt\n')
+    # Lotes de uma linha: a coluna do lote só com a célula vazia é lida como float (NaN)
+    resumo = precificar_arquivo(str(caminho), tmp_path / "saida.csv", localizador, tamanho_lote=1)
+    assert resumo["entradas"] == 3
+    assert resumo["localizadas"] == 1
+    assert list(pd.read_csv(tmp_path / "saida.csv")["CD_MUN"].isna()) == [False, True, True]
+
+
+def test_parquet_sem_metadados_geo_e_crs_invalido(localizador, tmp_path):
+    """Testar Parquet comum com coordenadas e erro claro para CRS inválido."""
+    caminho = tmp_path / "imoveis.parquet"
+    pd.DataFrame({"id": [1, 2], "lon": [0.5, 1.5], "lat": [0.5, 0.5]}).to_parquet(caminho)
+    resumo = precificar_arquivo(str(caminho), tmp_path / "saida.csv", localizador)
+    assert resumo["localizadas"] == 2
+    assert list(pd.read_csv(tmp_path / "saida.csv")["CD_MUN"]) == [1, 2]
+
+    with pytest.raises(ValueError, match="CRS inválido"):
+        precificar_arquivo(str(caminho), tmp_path / "saida.csv", localizador, crs="EPSG:99999")
@@ -0,0 +1,62 @@
+"""Testes para a leitura projetada do dataset."""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import geopandas as gpd
+import pandas as pd
+from shapely.geometry import box
+
+from mda_app.core.leitor import colunas_disponiveis, ler_dataset, ler_em_lotes
+
+
+@pytest.fixture(params=["geojson", "parquet", "parquet_bbox"])
+def caminho(request, tmp_path):
+    """Mesmo dataset gravado em GeoJSON e em GeoParquet."""
+    gdf = gpd.GeoDataFrame(
+        {
+            "SIGLA_UF": ["AL", "SE", "AL", "PE"],
+            "NM_MUN": ["A", "B", "C", "D"],
+            "nota_media": [10.0, 20.0, 30.0, 40.0],
+            "area_georef": [1.0, 2.0, 3.0, 4.0],
+        },
+        geometry=[box(i, 0, i + 1, 1) for i in range(4)],
+        crs="EPSG:4674",
+    )
+    if request.param.startswith("parquet"):
+        arquivo = tmp_path / "dados.parquet"
+        gdf.to_parquet(arquivo, write_covering_bbox=request.param == "parquet_bbox")
+    else:
+        arquivo = tmp_path / "dados.geojson"
+        gdf.to_file(arquivo, driver="GeoJSON")
+    return str(arquivo)
+
+
+def test_colunas_disponiveis(caminho):
+    """Testar a leitura das colunas apenas pelos metadados."""
+    assert colunas_disponiveis(caminho) == ["SIGLA_UF", "NM_MUN", "nota_media", "area_georef"]
+
+
+def test_ler_dataset_projetado(caminho):
+    """Testar projeção de colunas (ignorando ausentes) e filtro por UF sem geometria."""
+    df = ler_dataset(caminho, colunas=["SIGLA_UF", "mun_nome", "nota_media"], ufs=["AL"], geometria=False)
+    assert not isinstance(df, gpd.GeoDataFrame)
+    assert list(df.columns) == ["SIGLA_UF", "nota_media"]
+    assert df["nota_media"].tolist() == [10.0, 30.0]
+
+
+def test_ler_dataset_bbox(caminho):
+    """Testar filtro por extensão com geometria."""
+    gdf = ler_dataset(caminho, colunas=["NM_MUN"], bbox=(1.5, 0.2, 2.5, 0.8))
+    assert sorted(gdf["NM_MUN"]) == ["B", "C"]
+    assert gdf.crs == "EPSG:4674"
+
+
+def test_ler_em_lotes(caminho):
+    """Testar leitura em RecordBatches com projeção e filtro por UF."""
+    lotes = list(ler_em_lotes(caminho, colunas=["NM_MUN"], ufs=["AL", "PE"], tamanho_lote=2))
+    tabela = pd.concat([lote.to_pandas() for lote in lotes])
+    assert sorted(tabela["NM_MUN"]) == ["A", "C", "D"]
+    assert all(lote.num_rows <= 2 for lote in lotes)
@@ -0,0 +1,87 @@
+"""Testes para a contabilidade de memória por etapa."""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import tracemalloc
+from shapely.geometry import Polygon
+
+from mda_app.config.settings import DATA_CONFIG
+from mda_app.utils import memoria
+
+
+@pytest.fixture
+def ligada(monkeypatch):
+    monkeypatch.setitem(DATA_CONFIG, "memoria", True)
+    monkeypatch.setattr(memoria, "_sessoes", {})
+    monkeypatch.setattr(memoria, "_ultimo_relatorio", {"criado_em": 0.0, "relatorio": None})
+    estava_ativo = tracemalloc.is_tracing()
+    yield
+    if not estava_ativo:
+        tracemalloc.stop()
+
+
+def test_tamanho_objeto_conta_dados():
+    """Testar que arrays, DataFrames e geometrias contam os próprios dados."""
+    array = np.zeros(100_000)
+    assert memoria.tamanho_objeto({"a": array}) >= array.nbytes
+
+    df = pd.DataFrame({"x": np.arange(10_000)})
+    assert memoria.tamanho_objeto(df) == int(df.memory_usage(deep=True).sum())
+    # Objeto referenciado duas vezes conta uma vez só
+    assert memoria.tamanho_objeto([df, df]) - memoria.tamanho_objeto([df]) < 100
+
+    quadrado = Polygon([(0, 0), (1, 0), (1, 1), (0, 1)])
+    gdf = gpd.GeoDataFrame({"v": [1, 2]}, geometry=[quadrado, quadrado])
+    assert memoria.tamanho_objeto(gdf) >= int(gdf.memory_usage(deep=True).sum()) + 2 * 5 * 16
+
+
+def test_desligada_nao_mede(monkeypatch):
+    """Testar que, desligada, a contabilidade não registra nada."""
+    monkeypatch.setitem(DATA_CONFIG, "memoria", False)
+    contabilidade = memoria.ContabilidadeMemoria("s")
+    contabilidade.marcar("dados")
+    assert contabilidade.finalizar({"x": 1}) is None
+    assert contabilidade.etapas == []
+
+
+def test_etapas_e_relatorio(ligada):
+    """Testar alocação por etapa, estado da sessão e relatório periódico."""
+    contabilidade = memoria.ContabilidadeMemoria("s1")
+    contabilidade.marcar("pequena")
+    contabilidade.marcar("grande")
+    retido = np.ones(500_000)
+    relatorio = contabilidade.finalizar({"_resultados_reutilizaveis": {"tabela": retido}, "filtro": "AL"},
+                                        intervalo_relatorio=0)
+
+    assert [etapa["etapa"] for etapa in contabilidade.etapas] == ["pequena", "grande"]
+    grande = contabilidade.etapas[1]
+    assert grande["alocado_kb"] >= retido.nbytes / 1024
+    assert grande["pico_kb"] >= grande["alocado_kb"]
+
+    assert set(relatorio) == {"criado_em", "rastreado_kb", "pico_rss_mb", "alocacoes", "objetos", "sessoes"}
+    assert relatorio["objetos"][0]["objeto"] == "sessão s1: _resultados_reutilizaveis.tabela"
+    assert relatorio["sessoes"][0]["sessao"] == "s1"
+    assert relatorio["sessoes"][0]["entradas"] == 2
+    assert relatorio["alocacoes"]
+
+
+def test_relatorio_periodico_respeita_intervalo(ligada):
+    """Testar que o relatório só é refeito depois do intervalo."""
+    primeiro = memoria.relatorio_periodico(intervalo=3600)
+    assert primeiro is not None
+    assert memoria.relatorio_periodico(intervalo=3600) is primeiro
+    assert memoria.relatorio_periodico(intervalo=0) is not primeiro
+
+
+def test_sessoes_antigas_saem_do_relatorio(ligada, monkeypatch):
+    """Testar que sessões sem execução recente são descartadas."""
+    memoria.registrar_sessao("antiga", {"x": 1})
+    memoria.registrar_sessao("nova", {"x": 1})
+    memoria._sessoes["antiga"]["atualizada_em"] -= memoria.VALIDADE_SESSAO + 1
+    assert [s["sessao"] for s in memoria.relatorio_memoria()["sessoes"]] == ["nova"]
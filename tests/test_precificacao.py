@@ -0,0 +1,39 @@
+"""Testes para as regras de precificação."""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+
+from mda_app.core.precificacao import (
+    calcular_valor_por_nota, calcular_valores_por_nota, calcular_totais_trimestrais
+)
+
+
+def test_valores_por_nota_igual_escalar():
+    """Testar que a versão vetorizada segue as mesmas faixas da tabela INCRA."""
+    notas = [0, 15, 15.01, 25, 30, 35, 44.9, 45, 55, 55.5, 70, np.nan]
+    areas = np.arange(1, len(notas) + 1, dtype=float)
+
+    esperado = [calcular_valor_por_nota(n, a) for n, a in zip(notas, areas)]
+
+    np.testing.assert_allclose(calcular_valores_por_nota(notas, areas), esperado)
+
+
+def test_totais_trimestrais():
+    """Testar totais trimestrais pela nota total do período."""
+    df = pd.DataFrame({
+        "nota_total_q1": [10, 50],
+        "nota_total_q2": [20, 60],
+        "nota_total_q3": [30, 30],
+        "nota_total_q4": [40, 40],
+        "area_georef": [100.0, 10.0],
+    })
+
+    totais = calcular_totais_trimestrais(df)
+
+    assert totais[0] == pytest.approx(100 * 49.83 + 10 * 164.95)
+    assert totais[1] == pytest.approx(100 * 59.80 + 10 * 202.87)
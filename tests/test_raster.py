@@ -0,0 +1,58 @@
+"""Testes para a etapa de estatísticas zonais de raster."""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+from shapely.geometry import box
+
+from mda_app.pipeline.raster import estatisticas_zonais, salvar_raster_numpy, executar
+
+
+def criar_municipios():
+    """Dois municípios lado a lado sobre um raster de 20x20 pixels de 1 m."""
+    return gpd.GeoDataFrame(
+        {"CD_MUN": ["1", "2"]},
+        geometry=[box(0, 0, 10, 20), box(10, 0, 20, 20)],
+        crs="EPSG:5880",
+    )
+
+
+def test_classes_por_janela(tmp_path):
+    """Testar classes predominante e média, com janelas menores que o município."""
+    dados = np.full((20, 20), 3, dtype=np.uint8)   # Formação florestal (fechada)
+    dados[:, 10:] = 15                              # Pastagem (aberta)
+    dados[:5, 10:] = 4                              # Savana (intermediária)
+    dados[0, 0] = 255                               # Sem dado
+    caminho = str(tmp_path / "veg.npy")
+    salvar_raster_numpy(caminho, dados, (1, 0, 0, 0, -1, 20), crs="EPSG:5880", nodata=255)
+
+    inteiro = estatisticas_zonais(caminho, criar_municipios(), processos=1)
+    janelas = estatisticas_zonais(caminho, criar_municipios(), tamanho_janela=3, processos=1)
+
+    pd.testing.assert_frame_equal(inteiro, janelas)
+    assert list(inteiro["n_pixels"]) == [199, 200]
+    assert list(inteiro["classe_predominante"]) == [3, 1]
+    assert inteiro["classe_media"].iloc[1] == pytest.approx((150 * 1 + 50 * 2) / 200)
+
+
+def test_declividade_lepsch(tmp_path):
+    """Testar classificação de declividade em um plano inclinado a 10%."""
+    linhas, colunas = np.mgrid[0:20, 0:20]
+    elevacao = (colunas * 3.0).astype(np.float32)    # 3 m a cada 30 m: 10%
+    caminho = str(tmp_path / "mde.npy")
+    salvar_raster_numpy(caminho, elevacao, (30, 0, 0, 0, -30, 600), crs="EPSG:5880")
+    municipios = gpd.GeoDataFrame(
+        {"CD_MUN": ["1"]}, geometry=[box(0, 0, 600, 600)], crs="EPSG:5880"
+    )
+    processado = str(tmp_path / "processado.parquet")
+    municipios.to_parquet(processado)
+
+    executar(caminho, "nota_relevo", "declividade", processado, tamanho_janela=7, processos=1)
+
+    # 8% < 10% <= 20%: classe 3 (ondulado) em todos os pixels
+    assert gpd.read_parquet(processado)["nota_relevo"].iloc[0] == pytest.approx(3.0)
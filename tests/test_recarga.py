@@ -0,0 +1,106 @@
+"""Testes para a recarga do dataset em segundo plano."""
+
+import pytest
+import sys
+import os
+import threading
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from mda_app.core.recarga import RecarregadorDataset
+
+
+class Origem:
+    """Versão de origem controlada pelo teste, com registro do aquecimento."""
+
+    def __init__(self):
+        self.versao = "v1"
+        self.aquecidas = []
+        self.falhar = False
+        self.recarregador = None
+        self.ativa_durante_aquecimento = []
+
+    def obter_versao(self):
+        return self.versao
+
+    def aquecer(self, versao):
+        if self.falhar:
+            raise OSError("arquivo incompleto")
+        if self.recarregador is not None:
+            self.ativa_durante_aquecimento.append(self.recarregador.versao)
+        self.aquecidas.append(versao)
+
+
+def test_troca_versao_somente_apos_aquecer():
+    """Testar aquecimento inicial, troca após aquecer e versão repetida."""
+    origem = Origem()
+    recarregador = RecarregadorDataset(origem.obter_versao, origem.aquecer, intervalo=3600)
+    origem.recarregador = recarregador
+    recarregador.iniciar()
+    assert recarregador.versao == "v1"
+    assert recarregador.verificar() is False
+
+    origem.versao = "v2"
+    assert recarregador.verificar() is True
+    assert recarregador.versao == "v2"
+    assert origem.aquecidas == ["v1", "v2"]
+    # Enquanto a v2 aquecia, a versão ativa ainda era a v1
+    assert origem.ativa_durante_aquecimento == [None, "v1"]
+    recarregador.parar()
+
+
+def test_falha_no_aquecimento_mantem_versao_ativa():
+    """Testar que uma versão que falha ao aquecer não é ativada."""
+    origem = Origem()
+    recarregador = RecarregadorDataset(origem.obter_versao, origem.aquecer, intervalo=3600).iniciar()
+    origem.versao, origem.falhar = "v2", True
+    with pytest.raises(OSError):
+        recarregador.verificar()
+    assert recarregador.versao == "v1"
+
+    origem.falhar = False
+    assert recarregador.verificar() is True
+    assert recarregador.versao == "v2"
+    recarregador.parar()
+
+
+def test_verificacao_periodica_em_segundo_plano():
+    """Testar a troca feita pela thread de verificação."""
+    origem = Origem()
+    trocou = threading.Event()
+
+    def aquecer(versao):
+        origem.aquecer(versao)
+        if versao == "v2":
+            trocou.set()
+
+    recarregador = RecarregadorDataset(origem.obter_versao, aquecer, intervalo=0.01).iniciar()
+    origem.versao = "v2"
+    assert trocou.wait(5)
+    recarregador.parar()
+    assert recarregador.versao == "v2"
+
+
+def test_descarta_versao_substituida():
+    """Testar que só a versão substituída é descartada, depois da troca."""
+    origem = Origem()
+    descartadas = []
+
+    def descartar(versao):
+        descartadas.append((versao, recarregador.versao))
+        if versao == "v2":
+            raise KeyError(versao)
+
+    recarregador = RecarregadorDataset(origem.obter_versao, origem.aquecer, intervalo=3600, descartar=descartar)
+    recarregador.iniciar()
+    assert descartadas == []
+
+    origem.versao = "v2"
+    assert recarregador.verificar() is True
+    assert descartadas == [("v1", "v2")]
+
+    # Falha no descarte não desfaz a troca
+    origem.versao = "v3"
+    assert recarregador.verificar() is True
+    assert recarregador.versao == "v3"
+    assert descartadas[-1] == ("v2", "v3")
+    recarregador.parar()
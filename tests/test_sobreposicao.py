@@ -0,0 +1,61 @@
+"""Testes para a sobreposição com as camadas de exclusão."""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import geopandas as gpd
+from shapely.geometry import box
+
+from mda_app.pipeline.sobreposicao import calcular_area_georef
+
+# Origem em coordenadas válidas do EPSG:5880 (Alagoas)
+X0, Y0 = 5_800_000, 8_950_000
+
+
+def caixa(xmin, ymin, xmax, ymax):
+    """Retângulo em metros relativo à origem X0, Y0."""
+    return box(X0 + xmin, Y0 + ymin, X0 + xmax, Y0 + ymax)
+
+
+@pytest.fixture
+def camadas(tmp_path):
+    """Duas camadas de exclusão que se sobrepõem no município 1."""
+    terras_indigenas = gpd.GeoDataFrame(geometry=[caixa(0, 0, 5_000, 10_000)], crs="EPSG:5880")
+    unidades_conservacao = gpd.GeoDataFrame(
+        geometry=[caixa(2_500, 0, 7_500, 10_000), caixa(18_000, 8_000, 22_000, 12_000)], crs="EPSG:5880"
+    )
+    caminhos = [str(tmp_path / "ti.gpkg"), str(tmp_path / "uc.gpkg")]
+    terras_indigenas.to_file(caminhos[0], driver="GPKG")
+    unidades_conservacao.to_file(caminhos[1], driver="GPKG")
+    return caminhos
+
+
+@pytest.fixture
+def municipios():
+    return gpd.GeoDataFrame(
+        {"CD_MUN": ["1", "2"], "SIGLA_UF": ["AL", "SE"]},
+        geometry=[caixa(0, 0, 10_000, 10_000), caixa(10_000, 0, 20_000, 10_000)],
+        crs="EPSG:5880",
+    )
+
+
+@pytest.mark.parametrize("limite_vertices", [5_000, 2])
+def test_calcular_area_georef(camadas, municipios, limite_vertices):
+    """Testar a união das exclusões (sem contar a sobreposição duas vezes), com e sem blocos."""
+    resultado = calcular_area_georef(
+        municipios, camadas, limite_vertices=limite_vertices, processos=1
+    ).set_index("CD_MUN")
+
+    assert resultado["area_cidade"].tolist() == pytest.approx([10_000.0, 10_000.0])
+    # Município 1: exclusões cobrem x de 0 a 7.500 m; município 2: 2 km x 2 km
+    assert resultado.loc["1", "area_georef"] == pytest.approx(2_500.0)
+    assert resultado.loc["2", "area_georef"] == pytest.approx(10_000.0 - 400.0)
+    assert resultado.loc["1", "percent_area_georef"] == pytest.approx(25.0)
+
+
+def test_calcular_area_georef_crs_geografico(camadas, municipios):
+    """Testar municípios em CRS geográfico, reprojetados para o cálculo."""
+    resultado = calcular_area_georef(municipios.to_crs("EPSG:4674"), camadas, processos=1)
+    assert resultado["percent_area_georef"].iloc[0] == pytest.approx(25.0, abs=0.1)
@@ -0,0 +1,33 @@
+"""Testes para o array de notas trimestrais."""
+
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np
+import pandas as pd
+
+from mda_app.core.trimestres import medias_trimestrais, tensor_trimestral
+
+
+def test_tensor_trimestral():
+    """Testar formato, ordem dos eixos e critérios ausentes."""
+    df = pd.DataFrame({
+        "nota_total_q1": [10.0, 20.0], "nota_total_q2": [11.0, 21.0],
+        "nota_total_q3": [12.0, 22.0], "nota_total_q4": [13.0, 23.0],
+    })
+
+    tensor = tensor_trimestral(df, criterios=("nota_total", "nota_p"))
+
+    assert tensor.shape == (2, 4, 2)
+    assert list(tensor[1, :, 0]) == [20.0, 21.0, 22.0, 23.0]
+    assert np.isnan(tensor[:, :, 1]).all()
+
+
+def test_medias_trimestrais_ignora_ausentes():
+    """Testar médias por trimestre com valores e colunas ausentes."""
+    df = pd.DataFrame({"nota_total_q1": [10.0, np.nan], "nota_total_q2": [10.0, 30.0]})
+
+    medias = medias_trimestrais(tensor_trimestral(df, criterios=("nota_total",)))
+
+    assert list(medias) == [10.0, 20.0, 0.0, 0.0]
@@ -18,4 +18,120 @@ def test_reais_formatter():
 def test_reais_large_numbers():
     """Testar formatador com números grandes."""
     assert reais(1000000) == "R$ 1.000.000,00"
-    assert reais(1234567.89) == "R$ 1.234.567,89"
\ No newline at end of file
+    assert reais(1234567.89) == "R$ 1.234.567,89"
+
+
+def test_reutilizar_na_sessao():
+    """Testar reutilização do último resultado enquanto a chave não muda."""
+    from mda_app.utils.cache import reutilizar_na_sessao
+
+    chamadas = []
+
+    def construir():
+        chamadas.append(1)
+        return len(chamadas)
+
+    assert reutilizar_na_sessao("teste", ("AL",), construir) == 1
+    assert reutilizar_na_sessao("teste", ("AL",), construir) == 1
+    assert reutilizar_na_sessao("teste", ("SE",), construir) == 2
+
+
+def test_cache_figura_reutiliza_especificacao():
+    """Testar que a figura só é construída uma vez para as mesmas entradas."""
+    import plotly.graph_objects as go
+    from mda_app.utils.cache import cache_figura
+
+    construcoes = []
+
+    @cache_figura
+    def criar(valores):
+        construcoes.append(valores)
+        return go.Figure(go.Bar(y=valores))
+
+    primeira = criar([1.0, 2.0])
+    segunda = criar([1.0, 2.0])
+    criar([1.0, 3.0])
+
+    assert len(construcoes) == 2
+    assert list(segunda.data[0].y) == list(primeira.data[0].y) == [1.0, 2.0]
+
+
+def test_criar_gauge_altera_apenas_valor():
+    """Testar que o medidor parte do modelo e altera valor e limiar."""
+    from mda_app.components.visualizations import criar_gauge, GAUGE_STEPS
+
+    fig = criar_gauge(42.5)
+
+    assert fig.data[0].value == 42.5
+    assert fig.data[0].gauge.threshold.value == 42.5
+    assert len(fig.data[0].gauge.steps) == len(GAUGE_STEPS)
+
+
+def test_construcoes_pagina_em_paralelo():
+    """Testar construção simultânea, leitura em ordem e reutilização na sessão."""
+    import threading
+    from mda_app.utils.paralelo import ConstrucoesPagina
+
+    # Cada construção só termina quando a outra também começou
+    barreira = threading.Barrier(2, timeout=5)
+    chamadas = []
+
+    def construir(valor):
+        def tarefa():
+            chamadas.append(valor)
+            barreira.wait()
+            return valor
+        return tarefa
+
+    construcoes = ConstrucoesPagina()
+    construcoes.agendar("paralelo_a", 1, construir("a"))
+    construcoes.agendar("paralelo_b", 1, construir("b"))
+    assert construcoes.obter("paralelo_a") == "a"
+    assert construcoes.obter("paralelo_b") == "b"
+
+    # Mesma chave: resultado da sessão, sem nova construção
+    construcoes = ConstrucoesPagina()
+    construcoes.agendar("paralelo_a", 1, construir("c"))
+    assert construcoes.obter("paralelo_a") == "a"
+    assert sorted(chamadas) == ["a", "b"]
+
+
+def test_gerar_cores_igual_a_get_color():
+    """Testar que a versão vetorizada reproduz `get_color` e marca NaN."""
+    from mda_app.components.visualizations import COR_SEM_DADOS, gerar_cores, get_color
+
+    valores = [-5.0, 0.0, 6.0, 23.9, 24.0, 30.5, 59.9, 60.0, 80.0]
+
+    assert gerar_cores(valores, 0, 60) == [get_color(v, None, None, 0, 60) for v in valores]
+    assert gerar_cores([float("nan")], 0, 60) == [COR_SEM_DADOS]
+
+
+def test_reutilizar_entre_sessoes():
+    """Testar reutilização por chave e descarte do resultado menos usado."""
+    from mda_app.utils import cache
+
+    chamadas = []
+
+    def construir():
+        chamadas.append(1)
+        return len(chamadas)
+
+    assert cache.reutilizar_entre_sessoes(("teste", 1), construir) == 1
+    assert cache.reutilizar_entre_sessoes(("teste", 1), construir) == 1
+    assert len(chamadas) == 1
+
+    for i in range(cache.LIMITE_COMPARTILHADOS):
+        cache.reutilizar_entre_sessoes(("teste", "outro", i), lambda: i)
+    assert cache.reutilizar_entre_sessoes(("teste", 1), construir) == 2
+
+
+def test_descartar_compartilhados():
+    """Testar a remoção dos resultados compartilhados por chave."""
+    from mda_app.utils import cache
+
+    cache.reutilizar_entre_sessoes(("descarte", "v1"), lambda: 1)
+    cache.reutilizar_entre_sessoes(("descarte", "v2"), lambda: 2)
+    cache.descartar_compartilhados(lambda chave: chave == ("descarte", "v1"))
+    chaves = [chave for chave, _ in cache.resultados_compartilhados()]
+    assert ("descarte", "v1") not in chaves
+    assert ("descarte", "v2") in chaves
@@ -0,0 +1,61 @@
+"""Testes para o repositório de versões do dataset."""
+
+import pytest
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import geopandas as gpd
+from shapely.geometry import box
+
+from mda_app.core.versoes import diferencas_versoes, ler_versao, listar_versoes, registrar_versao
+
+
+@pytest.fixture
+def gdf():
+    return gpd.GeoDataFrame(
+        {
+            "CD_MUN": ["1", "2", "3"],
+            "NM_MUN": ["A", "B", "C"],
+            "nota_media": [10.0, 20.0, 30.0],
+            "valor_mun_area": [100.0, 200.0, 300.0],
+        },
+        geometry=[box(0, 0, 1, 1), box(1, 0, 2, 1), box(2, 0, 3, 1)],
+        crs="EPSG:4326",
+    )
+
+
+def test_registrar_e_ler_versao(gdf, tmp_path):
+    """Testar ida e volta, imutabilidade e colunas compartilhadas entre versões."""
+    registrar_versao(gdf, "v1", diretorio=str(tmp_path))
+    alterado = gdf.assign(valor_mun_area=[100.0, 250.0, 300.0])
+    registrar_versao(alterado, "v2", diretorio=str(tmp_path))
+
+    lido = ler_versao("v2", diretorio=str(tmp_path))
+    assert lido.crs == gdf.crs
+    assert lido.geometry.equals(gdf.geometry)
+    assert list(lido["valor_mun_area"]) == [100.0, 250.0, 300.0]
+    assert [m["versao"] for m in listar_versoes(str(tmp_path))] == ["v1", "v2"]
+
+    # 5 colunas na v1 + apenas a coluna alterada na v2
+    assert len(os.listdir(tmp_path / "colunas")) == 6
+    with pytest.raises(ValueError):
+        registrar_versao(gdf, "v1", diretorio=str(tmp_path))
+
+
+def test_diferencas_versoes(gdf, tmp_path):
+    """Testar municípios alterados, novos e removidos e os deltas."""
+    registrar_versao(gdf, "v1", diretorio=str(tmp_path))
+    atual = gdf.iloc[[1, 2]].assign(valor_mun_area=[250.0, 300.0])
+    atual.loc[3] = ["4", "D", 40.0, 400.0, box(3, 0, 4, 1)]
+    registrar_versao(atual, "v2", diretorio=str(tmp_path))
+
+    diferencas = diferencas_versoes("v1", "v2", diretorio=str(tmp_path))
+
+    assert diferencas.loc["2", "situacao"] == "alterado"
+    assert diferencas.loc["2", "valor_mun_area_delta"] == pytest.approx(50.0)
+    assert diferencas.loc["4", "situacao"] == "novo"
+    assert diferencas.loc["1", "situacao"] == "removido"
+    assert "3" not in diferencas.index
+    # nota_media tem o mesmo conteúdo nos municípios comuns: não aparece
+    assert "nota_media_delta" not in diferencas.columns